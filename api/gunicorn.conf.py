@@ -0,0 +1,9 @@
+# Gunicorn loads this automatically, from the working directory
+from typing import Any
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    # Drop live gauges for the dead worker (see core.metrics)
+    multiprocess.mark_process_dead(worker.pid)
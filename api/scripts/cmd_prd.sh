@@ -2,4 +2,10 @@
 
 set -ex
 
+# Let gunicorn workers share metrics (see core.metrics). This has to be empty
+# on startup
+export PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus
+rm -rf $PROMETHEUS_MULTIPROC_DIR
+mkdir -p $PROMETHEUS_MULTIPROC_DIR
+
 gunicorn beta_spray.wsgi -b :8000
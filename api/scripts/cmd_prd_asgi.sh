@@ -0,0 +1,14 @@
+#!/bin/sh
+
+# Serve the API via ASGI, with async GraphQL resolvers. Use this instead of
+# cmd_prd.sh, so slow requests (e.g. image uploads) don't block a worker
+
+set -ex
+
+# Let gunicorn workers share metrics (see core.metrics). This has to be empty
+# on startup
+export PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus
+rm -rf $PROMETHEUS_MULTIPROC_DIR
+mkdir -p $PROMETHEUS_MULTIPROC_DIR
+
+gunicorn beta_spray.asgi -k uvicorn.workers.UvicornWorker -b :8000
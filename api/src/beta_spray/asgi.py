@@ -0,0 +1,17 @@
+"""
+ASGI config for beta_spray project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+# Switch to the async GraphQL view. This has to happen before settings load
+os.environ.setdefault("BETA_SPRAY_ASGI", "1")
+
+application = get_asgi_application()
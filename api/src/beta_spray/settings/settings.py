@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ServerTimingMiddleware",
     "strawberry_django.middlewares.debug_toolbar.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -124,6 +125,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "beta_spray.wsgi.application"
+ASGI_APPLICATION = "beta_spray.asgi.application"
+# Are we being served via ASGI? Set by beta_spray.asgi, and determines which
+# GraphQL view is used
+ASGI = bool(os.getenv("BETA_SPRAY_ASGI"))
 
 
 # Database
@@ -143,6 +148,20 @@ DATABASES = {
     }
 }
 
+# Cache for GraphQL responses (see core.schema.response_cache). This is local
+# memory by default, i.e. per-process. Set the backend/location to use a shared
+# cache instead, e.g. django.core.cache.backends.redis.RedisCache
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "BETA_SPRAY_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("BETA_SPRAY_CACHE_LOCATION", ""),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
 # TODO encrypt backups
 # https://django-dbbackup.readthedocs.io/en/master/configuration.html#encrypting-your-backups
 DBBACKUP_STORAGE = "storages.backends.gcloud.GoogleCloudStorage"
@@ -175,6 +194,31 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Home-rolled field, we'll export the schema to this path on every startup
 GRAPHQL_SCHEMA_PATH = BASE_DIR / "schema.graphql"
+# Manifest of persisted GraphQL queries, generated by the Relay compiler in the
+# UI (see ui/relay.config.js)
+GRAPHQL_PERSISTED_QUERIES_PATH = BASE_DIR / "persisted_queries.json"
+# Reject any query that isn't in the persisted manifest
+GRAPHQL_PERSISTED_QUERIES_ONLY = False
+# Max number of parsed GraphQL documents to keep in memory, not including
+# persisted queries (those are always kept)
+GRAPHQL_DOCUMENT_CACHE_SIZE = 256
+# Limits on the size of GraphQL operations (see core.schema.cost)
+GRAPHQL_MAX_QUERY_DEPTH = 12
+GRAPHQL_MAX_QUERY_COST = 5000
+# Max number of operations in a single batched request (see core.views)
+GRAPHQL_MAX_BATCH_SIZE = 50
+# How long to cache GraphQL responses for anonymous users, in seconds. This is
+# also how long ETags can be stale for data that isn't tracked. Set to 0 to
+# disable both (see core.schema.response_cache)
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = 5 * 60
+# Fraction of GraphQL operations to time and log, between 0 and 1 (see
+# core.schema.instrumentation)
+GRAPHQL_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv("BETA_SPRAY_GRAPHQL_SAMPLE_RATE", "0.01")
+)
+# Add a Server-Timing header to every response. Otherwise, it's only added for
+# staff users (see core.middleware.ServerTimingMiddleware)
+SERVER_TIMING = bool(os.getenv("BETA_SPRAY_SERVER_TIMING"))
 
 APPEND_SLASH = False
 
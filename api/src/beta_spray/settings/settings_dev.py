@@ -19,6 +19,10 @@ ip = socket.gethostbyname(hostname)
 subnet = ip[: ip.rfind(".")] + ".0/24"
 INTERNAL_IPS += [str(ip) for ip in ipaddress.ip_network(subnet)]
 
+# Log every GraphQL operation
+GRAPHQL_INSTRUMENTATION_SAMPLE_RATE = 1.0
+SERVER_TIMING = True
+
 # In dev, we store static files and media on the local FS. In prod, both live
 # in GCS buckets and are served directly by nginx, so we don't need any of these
 # rules.
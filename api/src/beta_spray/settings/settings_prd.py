@@ -4,6 +4,10 @@ from .settings import *  # noqa: F401,F403
 
 BETA_SPRAY_HOSTNAME = os.getenv("BETA_SPRAY_HOSTNAME")
 ALLOWED_HOSTS = ["localhost", "api", BETA_SPRAY_HOSTNAME]
+# Prometheus scrapes each pod directly, by its IP (see the API deployment)
+BETA_SPRAY_POD_IP = os.getenv("BETA_SPRAY_POD_IP")
+if BETA_SPRAY_POD_IP:
+    ALLOWED_HOSTS.append(BETA_SPRAY_POD_IP)
 
 # WARNING: This is only save if nginx is configured to strip the
 # X-Forwarded-Proto and replace it with its own value. Needed to make CSRF work.
@@ -16,3 +20,7 @@ SECRET_KEY = os.getenv("BETA_SPRAY_SECRET_KEY")
 # By not starting this URL with /api/, we avoid collisions between URL matches
 # in nginx
 STATIC_URL = "/api-static/"
+# Only allow queries that the UI was built with
+GRAPHQL_PERSISTED_QUERIES_ONLY = bool(
+    os.getenv("BETA_SPRAY_PERSISTED_QUERIES_ONLY")
+)
@@ -17,9 +17,16 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
-from strawberry.django.views import GraphQLView
 
+from core.metrics import metrics_view
 from core.schema import schema
+from core.views import AsyncGraphQLView, GraphQLView
+
+# Under ASGI, use the async view so slow requests don't block the worker
+if settings.ASGI:
+    graphql_view = AsyncGraphQLView.as_view(schema=schema)
+else:
+    graphql_view = GraphQLView.as_view(schema=schema)
 
 urlpatterns = [
     path(
@@ -28,7 +35,9 @@ urlpatterns = [
             [
                 path("admin/", admin.site.urls),
                 path("social/", include("social_django.urls")),
-                path("graphql", GraphQLView.as_view(schema=schema)),
+                path("graphql", graphql_view),
+                # Blocked by the ingress, for scraping from inside the cluster
+                path("metrics", metrics_view),
                 # Disable in prod via INTERNAL_IPS
                 path("__debug__/", include("debug_toolbar.urls")),
             ]
@@ -6,6 +6,7 @@ from django.db import models
 from django.http import HttpRequest
 from random_username.generate import generate_username
 
+from core import metrics
 from core.models import Beta, Problem
 
 logger = logging.getLogger(__name__)
@@ -40,6 +41,7 @@ class UserProfile(models.Model):
             )
             user = User.objects.create_user(username=username)
             cls.objects.create(user=user, is_guest=True)
+            metrics.GUEST_USERS.inc()
 
             user = authenticate(request=request, username=username)
             login(request, user)
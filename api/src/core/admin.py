@@ -1,6 +1,13 @@
+from typing import Optional
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import URLPattern, path, reverse
+from django.utils.html import format_html
 
-from .models import Beta, BetaMove, Boulder, Hold, Problem
+from .models import Beta, BetaMove, Boulder, Hold, Problem, RequestProfile
 
 
 @admin.register(Boulder)
@@ -26,3 +33,81 @@ class BetaMoveAdmin(admin.ModelAdmin):
 @admin.register(Beta)
 class BetaAdmin(admin.ModelAdmin):
     exclude = ("id",)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Profiles are recorded by requests (see `core.profiling`), so they're
+    read-only here. The raw stats can be downloaded, and opened with any tool
+    that reads pstats files (e.g. snakeviz).
+    """
+
+    list_display = (
+        "created_at",
+        "path",
+        "operation_name",
+        "status_code",
+        "duration",
+        "peak_memory",
+        "user",
+    )
+    list_filter = ("operation_name",)
+    fields = (
+        "created_at",
+        "user",
+        "path",
+        "operation_name",
+        "status_code",
+        "duration",
+        "peak_memory",
+        "download",
+        "summary_text",
+        "memory_summary_text",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(
+        self, request: HttpRequest, obj: Optional[RequestProfile] = None
+    ) -> bool:
+        return False
+
+    def get_urls(self) -> list[URLPattern]:
+        return [
+            path(
+                "<path:object_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_requestprofile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(
+        self, request: HttpRequest, object_id: str
+    ) -> HttpResponse:
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+        response = HttpResponse(
+            bytes(profile.stats), content_type="application/octet-stream"
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="profile-{profile.id}.prof"'
+        return response
+
+    @admin.display(description="Stats")
+    def download(self, obj: RequestProfile) -> str:
+        url = reverse("admin:core_requestprofile_download", args=[obj.id])
+        return format_html('<a href="{}">Download</a>', url)
+
+    @admin.display(description="Summary")
+    def summary_text(self, obj: RequestProfile) -> str:
+        return format_html("<pre>{}</pre>", obj.summary)
+
+    @admin.display(description="Memory summary")
+    def memory_summary_text(self, obj: RequestProfile) -> str:
+        return format_html("<pre>{}</pre>", obj.memory_summary)
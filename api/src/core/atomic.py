@@ -0,0 +1,28 @@
+import functools
+from typing import Any, Callable, TypeVar
+
+from django.db import transaction
+from strawberry_django.resolvers import django_resolver
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def atomic_resolver(resolver: _F) -> _F:
+    """
+    Make a resolver that accesses the DB safe to call from both sync and async
+    views. In an async view, the resolver is run in a thread (see
+    `django_resolver`), and returns an awaitable.
+
+    The resolver also runs in a transaction. Under WSGI, every request is
+    already in one (`ATOMIC_REQUESTS`), so this is a no-op. Async views can't
+    use `ATOMIC_REQUESTS`, so each resolver gets its own transaction instead.
+    """
+
+    @functools.wraps(resolver)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if transaction.get_connection().in_atomic_block:
+            return resolver(*args, **kwargs)
+        with transaction.atomic():
+            return resolver(*args, **kwargs)
+
+    return django_resolver(wrapper, qs_hook=None)  # type: ignore[return-value]
@@ -0,0 +1,62 @@
+import time
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Cached GraphQL responses are tagged with everything they contain (see
+# core.schema.response_cache). Each tag has a version, which is the time it
+# was last invalidated. A cached response is only valid as long as the
+# versions of its tags haven't changed since it was stored. Versions never
+# repeat, even if a tag is evicted from the cache and has to be given a new
+# one, so a stale response (or ETag) can never match again.
+TAG_KEY_PREFIX = "graphql-tag"
+# Any list of problems, which can change whenever any problem does
+PROBLEM_LIST_TAG = "problem-list"
+# Prefix for the tag of each individual problem
+PROBLEM_TAG_PREFIX = "problem:"
+
+
+def get_problem_tag(problem_id: int) -> str:
+    """
+    Get the tag for anything within a single problem
+    """
+    return f"{PROBLEM_TAG_PREFIX}{problem_id}"
+
+
+def get_tag_versions(tags: Iterable[str]) -> dict[str, int]:
+    """
+    Get the current version of each tag. Tags that have never been
+    invalidated (or have been evicted from the cache) are excluded.
+    """
+    keys = {f"{TAG_KEY_PREFIX}:{tag}": tag for tag in tags}
+    return {keys[key]: version for key, version in cache.get_many(keys).items()}
+
+
+def initialize_tags(tags: Iterable[str], version: Optional[int] = None) -> None:
+    """
+    Give a version to any tags that don't have one yet, without modifying any
+    existing versions. The version defaults to the current time, the same as
+    `invalidate_tags`.
+    """
+    if version is None:
+        version = time.time_ns()
+    for tag in tags:
+        cache.add(f"{TAG_KEY_PREFIX}:{tag}", version, timeout=None)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """
+    Invalidate all cached responses with any of the given tags. This waits
+    until the current transaction is committed, so a response can't be cached
+    with the old data after it's been invalidated.
+    """
+
+    def invalidate() -> None:
+        version = time.time_ns()
+        cache.set_many(
+            {f"{TAG_KEY_PREFIX}:{tag}": version for tag in tags},
+            timeout=None,
+        )
+
+    transaction.on_commit(invalidate)
@@ -7,6 +7,8 @@ from strawberry.types import Info
 
 from bs_auth.models import UserProfile
 
+from .atomic import atomic_resolver
+
 
 @strawberry.schema_directive(
     locations=[Location.FIELD_DEFINITION],
@@ -20,6 +22,8 @@ class CreateGuestUser(FieldExtension):
     anonymous to guest.
     """
 
+    # The guest user is created in the same transaction as the mutation
+    @atomic_resolver
     def resolve(
         self,
         next_: Callable[..., Any],
@@ -1,6 +1,7 @@
 from typing import Any, Optional
 
 from django.db import models
+from django.db.models import Func, Lookup
 from typing_extensions import Self
 
 
@@ -19,10 +20,11 @@ class BoulderPosition:
     @classmethod
     def parse(cls, value: str) -> Self:
         """
-        Parse a string position to a struct value
+        Parse a string position to a struct value. Accepts either `x,y` or
+        postgres's point format, `(x,y)`
         """
-        x, y = (float(v) for v in value.split(","))
-        return cls(x, y)
+        x, y = value.strip("()").split(",")
+        return cls(float(x), float(y))
 
     def serialize(self) -> str:
         """
@@ -34,21 +36,19 @@ class BoulderPosition:
 class BoulderPositionField(models.Field):
     """
     A model field that contains a visual position within a boulder. This could
-    be the position of a hold, move, etc. The value is stored as a stringified
-    version of x/y, where each coordinate is [0,1], representing its position
-    as a fraction of the full width/height of the image, respectively. This
-    makes the coordinates dimension-independent, allowing for scaling without
-    creating data issues.
-
-    Technically it would be better/cleaner to use a composite type in postgres
-    to store this, but Django doesn't have native support for that and it's a
-    lot more work to set it up than it's worth, considering we're never doing
-    any filtering/math with the float values in the database. If we ever find
-    that need, then we can migrate this to a composite type.
+    be the position of a hold, move, etc. Each coordinate is [0,1],
+    representing its position as a fraction of the full width/height of the
+    image, respectively. This makes the coordinates dimension-independent,
+    allowing for scaling without creating data issues.
+
+    The value is stored in postgres's native `point` type, which is a pair of
+    float8s. That's a third the size of the old stringified version, and it
+    means we can do geometry in SQL (distance operators, GiST indexes, etc.).
+    Note that points don't support `=`, so don't filter on exact position.
     """
 
     def db_type(self, connection: Any) -> str:
-        return "char(50)"
+        return "point"
 
     def from_db_value(
         self, value: Optional[str], expression: Any, connection: Any
@@ -81,6 +81,47 @@ class BoulderPositionField(models.Field):
         return self.get_prep_value(value)
 
 
+@BoulderPositionField.register_lookup
+class WithinBox(Lookup):
+    """
+    `position__within_box=(corner1, corner2)`: Is the position within the
+    rectangle defined by two opposite corners (inclusive)? This can be served
+    by a GiST index on the position column.
+    """
+
+    lookup_name = "within_box"
+    prepare_rhs = False
+
+    def get_db_prep_lookup(
+        self, value: tuple[BoulderPosition, BoulderPosition], connection: Any
+    ) -> tuple[str, list[str]]:
+        (corner1, corner2) = value
+        return ("%s", [f"({corner1.serialize()}),({corner2.serialize()})"])
+
+    def as_sql(self, compiler: Any, connection: Any) -> tuple[str, list[Any]]:
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} <@ {rhs}::box", [*lhs_params, *rhs_params]
+
+
+class PositionX(Func):
+    """The X component of a position column"""
+
+    template = "(%(expressions)s)[0]"
+    output_field = models.FloatField()
+
+
+class PositionY(Func):
+    """The Y component of a position column"""
+
+    template = "(%(expressions)s)[1]"
+    output_field = models.FloatField()
+
+
+# Largest value that can be stored in a MoveOrderField
+MOVE_ORDER_MAX = 2147483647
+
+
 class MoveOrderField(models.PositiveIntegerField):
     """
     A field type for the `order` field on `BetaMove`. This field is commonly
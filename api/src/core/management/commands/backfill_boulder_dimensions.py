@@ -0,0 +1,57 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Q
+
+from core.models import Boulder
+
+
+class Command(BaseCommand):
+    help = (
+        "Populate stored image dimensions (pixel and SVG) for boulders that"
+        " were created before those columns existed. New boulders get these"
+        " automatically upon upload. This has to read each image from media"
+        " storage, so it may be slow."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Don't actually modify anything",
+        )
+
+    def handle(self, dry_run: bool, **kwargs: Any) -> None:
+        if dry_run:
+            print("Dry run, nothing will be modified")
+
+        boulders = Boulder.objects.filter(
+            Q(image_width__isnull=True)
+            | Q(image_height__isnull=True)
+            | Q(svg_width__isnull=True)
+            | Q(svg_height__isnull=True)
+        )
+
+        num_updated = 0
+        # Use an iterator so we don't hold every image in memory at once
+        for boulder in boulders.iterator():
+            # Django reads the image and fills in image_width/image_height when
+            # the row is loaded, because they're empty. The pre-save signal
+            # then fills in the SVG dimensions.
+            print(
+                f"  Boulder {boulder.id} ({boulder.image.name}):"
+                f" {boulder.image_width}x{boulder.image_height}"
+            )
+            if not dry_run:
+                # Don't touch updated_at, this isn't a user modification
+                boulder.save(
+                    update_fields=[
+                        "image_width",
+                        "image_height",
+                        "svg_width",
+                        "svg_height",
+                    ]
+                )
+            num_updated += 1
+
+        print(f"Updated {num_updated} boulders")
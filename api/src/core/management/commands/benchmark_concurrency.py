@@ -0,0 +1,238 @@
+import io
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from typing import Any, Optional
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from PIL import Image
+
+UPLOAD_MUTATION = """
+    mutation($input: CreateBoulderWithFriendsInput!) {
+        createBoulderWithFriends(input: $input) {
+            problem { id }
+        }
+    }
+"""
+
+PROBLEMS_QUERY = """
+    query {
+        problems(first: 20) {
+            edges { node { id name boulder { image { url } } } }
+        }
+    }
+"""
+
+PROBLEM_QUERY = """
+    query($problemId: ID!) {
+        problem(id: $problemId) {
+            name
+            permissions { canEdit canDelete }
+            holds(first: 50) { edges { node { id position { x y } } } }
+            betas(first: 10) {
+                edges {
+                    node {
+                        name
+                        moves(first: 50) {
+                            edges { node { order bodyPart isStart } }
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how a running API server handles a mix of concurrent image"
+        " uploads and queries. Run it once against the sync server"
+        " (scripts/cmd_prd.sh) and once against the async one"
+        " (scripts/cmd_prd_asgi.sh), with the same worker count, and compare."
+        " Uploads create data, so don't point this at production."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8000/api/graphql",
+            help="GraphQL endpoint of the server to benchmark",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=16,
+            help="Number of clients sending requests concurrently",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="How long to send requests for, in seconds",
+        )
+        parser.add_argument(
+            "--upload-ratio",
+            type=float,
+            default=0.1,
+            help="Fraction of requests that are image uploads",
+        )
+        parser.add_argument(
+            "--image-size",
+            type=int,
+            default=800,
+            help="Width of uploaded images, in pixels",
+        )
+
+    def handle(
+        self,
+        url: str,
+        clients: int,
+        duration: float,
+        upload_ratio: float,
+        image_size: int,
+        **kwargs: Any,
+    ) -> None:
+        image = get_image(image_size)
+        # Make sure there's at least one problem to query
+        Client(url).upload(image)
+        (_, data) = Client(url).query(PROBLEMS_QUERY)
+        if not data:
+            raise CommandError(f"Failed to query problems from {url}")
+        problem_ids = [edge["node"]["id"] for edge in data["problems"]["edges"]]
+
+        def run_client(seed: int) -> list[tuple[str, float, bool]]:
+            client = Client(url)
+            rand = random.Random(seed)
+            timings = []
+            end = time.monotonic() + duration
+            while time.monotonic() < end:
+                if rand.random() < upload_ratio:
+                    (elapsed, _) = client.upload(image)
+                    kind = "upload"
+                elif rand.random() < 0.5:
+                    (elapsed, _) = client.query(PROBLEMS_QUERY)
+                    kind = "problems"
+                else:
+                    (elapsed, _) = client.query(
+                        PROBLEM_QUERY,
+                        {"problemId": rand.choice(problem_ids)},
+                    )
+                    kind = "problem"
+                timings.append((kind, elapsed, client.failed))
+            return timings
+
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(run_client, range(clients)))
+
+        by_kind: dict[str, list[float]] = defaultdict(list)
+        failures = 0
+        for timings in results:
+            for kind, elapsed, failed in timings:
+                by_kind[kind].append(elapsed)
+                by_kind["Total"].append(elapsed)
+                failures += failed
+
+        print(
+            f"{clients} clients for {duration:.0f}s against {url}"
+            f" ({failures} failed requests)"
+        )
+        print(
+            f"{'Request':<10}  {'Count':>6}  {'Req/s':>6}  {'p50':>8}"
+            f"  {'p95':>8}  {'Max':>8}"
+        )
+        for kind in ["problems", "problem", "upload", "Total"]:
+            elapsed_list = sorted(by_kind[kind])
+            if not elapsed_list:
+                continue
+            p95 = elapsed_list[int(len(elapsed_list) * 0.95)]
+            print(
+                f"{kind:<10}  {len(elapsed_list):>6}"
+                f"  {len(elapsed_list) / duration:>6.1f}"
+                f"  {statistics.median(elapsed_list) * 1000:>6.0f}ms"
+                f"  {p95 * 1000:>6.0f}ms  {elapsed_list[-1] * 1000:>6.0f}ms"
+            )
+
+
+class Client:
+    """
+    A single API client, with its own session
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+        # Did the last request fail?
+        self.failed = False
+
+    def query(
+        self, query: str, variables: Optional[dict[str, Any]] = None
+    ) -> tuple[float, Any]:
+        body = json.dumps({"query": query, "variables": variables or {}})
+        return self.send(body.encode(), "application/json")
+
+    def upload(self, image: bytes) -> tuple[float, Any]:
+        """
+        Upload a boulder image, which creates a problem
+        """
+        operations = {
+            "query": UPLOAD_MUTATION,
+            "variables": {"input": {"image": None}},
+        }
+        boundary = uuid.uuid4().hex
+        parts = [
+            ("operations", None, json.dumps(operations).encode()),
+            ("map", None, b'{"image": ["variables.input.image"]}'),
+            ("image", "boulder.jpg", image),
+        ]
+        body = io.BytesIO()
+        for name, filename, content in parts:
+            body.write(f"--{boundary}\r\n".encode())
+            disposition = f'form-data; name="{name}"'
+            if filename:
+                disposition += f'; filename="{filename}"'
+            body.write(f"Content-Disposition: {disposition}\r\n".encode())
+            if filename:
+                body.write(b"Content-Type: image/jpeg\r\n")
+            body.write(b"\r\n" + content + b"\r\n")
+        body.write(f"--{boundary}--\r\n".encode())
+        return self.send(
+            body.getvalue(), f"multipart/form-data; boundary={boundary}"
+        )
+
+    def send(self, body: bytes, content_type: str) -> tuple[float, Any]:
+        """
+        Send a request, and return how long it took, and the response data
+        """
+        request = Request(
+            self.url, data=body, headers={"Content-Type": content_type}
+        )
+        start = time.monotonic()
+        try:
+            with self.opener.open(request) as response:
+                result = json.load(response)
+        except OSError:
+            result = {}
+        elapsed = time.monotonic() - start
+        self.failed = "data" not in result or bool(result.get("errors"))
+        return (elapsed, result.get("data"))
+
+
+def get_image(width: int) -> bytes:
+    """
+    Generate a JPEG image of random noise, which doesn't compress well, so
+    it's about the size of a real photo
+    """
+    height = width * 4 // 3
+    image = Image.frombytes(
+        "RGB", (width, height), random.randbytes(width * height * 3)
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
@@ -0,0 +1,115 @@
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from graphql import ExecutionResult as GraphQLExecutionResult
+from strawberry.extensions import SchemaExtension
+
+from core.schema import schema
+from core.schema.document_cache import DocumentCache, document_cache
+from core.schema.operations import load_ui_operations
+
+
+class SkipExecution(SchemaExtension):
+    """
+    Skip executing the operation, so only the overhead that comes before
+    execution (parsing, validation, etc.) gets measured, and the DB isn't
+    needed
+    """
+
+    def on_execute(self) -> Iterator[None]:
+        self.execution_context.result = GraphQLExecutionResult(data=None)
+        yield
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request CPU time that the GraphQL document cache"
+        " saves, for each query in the UI. The UI source has to be available"
+        " (it isn't in the API container by default). Resolvers aren't run, so"
+        " this only measures the work done before execution."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--ui-src",
+            type=Path,
+            default=settings.BASE_DIR.parent.parent / "ui" / "src",
+            help="Path to the UI source directory",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=500,
+            help="Number of requests to time for each query",
+        )
+        parser.add_argument(
+            "--include-mutations",
+            action="store_true",
+            help="Benchmark mutations too, not just queries",
+        )
+
+    def handle(
+        self,
+        ui_src: Path,
+        iterations: int,
+        include_mutations: bool,
+        **kwargs: Any,
+    ) -> None:
+        operations = {
+            name: query
+            for name, query in load_ui_operations(
+                ui_src, schema._schema
+            ).items()
+            if include_mutations or query.startswith("query")
+        }
+        # Strawberry types can only be converted to one schema, so run
+        # everything on the real schema, with its extensions swapped out
+        original_extensions = schema.extensions
+        uncached_extensions = [
+            extension
+            for extension in original_extensions
+            if extension is not DocumentCache
+        ]
+
+        def time_requests(cached: bool, query: str) -> float:
+            """Get mean CPU time per request, in µs"""
+            schema.extensions = [
+                *(original_extensions if cached else uncached_extensions),
+                SkipExecution,
+            ]
+            # Warm up, which also primes the cache
+            schema.execute_sync(query)
+            start = time.process_time_ns()
+            for _ in range(iterations):
+                result = schema.execute_sync(query)
+            elapsed = time.process_time_ns() - start
+            assert result.errors is None, result.errors
+            return elapsed / iterations / 1000
+
+        document_cache.clear()
+        try:
+            results = {
+                name: (time_requests(False, query), time_requests(True, query))
+                for name, query in operations.items()
+            }
+        finally:
+            schema.extensions = original_extensions
+        results["Total"] = (
+            sum(uncached for uncached, _ in results.values()),
+            sum(cached for _, cached in results.values()),
+        )
+
+        name_width = max(len(name) for name in results)
+        print(
+            f"{'Operation':<{name_width}}  {'Uncached':>10}  {'Cached':>10}"
+            f"  {'Reduction':>9}"
+        )
+        for name, (uncached, cached) in results.items():
+            print(
+                f"{name:<{name_width}}  {uncached:>8.0f}µs  {cached:>8.0f}µs"
+                f"  {1 - cached / uncached:>9.0%}"
+            )
+        print(document_cache.info())
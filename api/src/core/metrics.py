@@ -0,0 +1,61 @@
+import os
+
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+GRAPHQL_OPERATION_SECONDS = Histogram(
+    "beta_spray_graphql_operation_seconds",
+    "Time to execute a GraphQL operation. Operations that aren't persisted"
+    " (i.e. not from the UI) are all named `other`, to keep the number of"
+    " labels bounded",
+    ["operation_name", "operation_type"],
+)
+GRAPHQL_ERRORS = Counter(
+    "beta_spray_graphql_errors",
+    "GraphQL operations that returned errors",
+    ["operation_name", "operation_type"],
+)
+GUEST_USERS = Counter("beta_spray_guest_users", "Guest users created")
+UPLOAD_BYTES = Histogram(
+    "beta_spray_upload_bytes",
+    "Size of uploaded boulder images. The count is the number of uploads",
+    buckets=[2**power for power in range(16, 26)],  # 64KB to 32MB
+)
+DB_QUERY_SECONDS = Histogram(
+    "beta_spray_db_query_seconds", "Time to execute a DB query"
+)
+DB_QUERIES_IN_FLIGHT = Gauge(
+    "beta_spray_db_queries_in_flight",
+    "DB queries that are currently executing, across all workers",
+    multiprocess_mode="livesum",
+)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Render all metrics in the Prometheus text format. This is only reachable
+    from inside the cluster (see the API ingress).
+
+    Under gunicorn, each worker has its own copy of each metric. If
+    `PROMETHEUS_MULTIPROC_DIR` is set (see scripts/cmd_prd.sh), workers write
+    their values to files in that directory, which are combined on each
+    scrape, so it doesn't matter which worker serves it.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        # No type hints on this one
+        multiprocess.MultiProcessCollector(registry)  # type: ignore
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
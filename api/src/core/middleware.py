@@ -1,10 +1,18 @@
 import logging
 import time
-from typing import Callable
+from typing import Any, Awaitable, Callable
 
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
 from django.http.request import HttpRequest
 from django.http.response import HttpResponse
 
+from .timing import ServerTiming, current_server_timing
+
 graphql_logger = logging.getLogger("beta_spray.graphql")
 
 
@@ -27,3 +35,65 @@ class TimeDelayMiddleware:
         if request.path == "/api/graphql":
             time.sleep(self.delay)
         return self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Add a `Server-Timing` header, with a breakdown of where the request's time
+    went (see `core.timing`), so it shows up in browser devtools. It's only
+    added for staff users, unless `SERVER_TIMING` is enabled. The user is only
+    checked on the way out, so this can come before `AuthenticationMiddleware`
+    (and should come first, to time as much as possible).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        server_timing = ServerTiming()
+        token = current_server_timing.set(server_timing)
+        start = time.perf_counter()
+        try:
+            response: HttpResponse = self.get_response(request)
+        finally:
+            current_server_timing.reset(token)
+        server_timing.add("total", time.perf_counter() - start)
+        if settings.SERVER_TIMING or self.is_staff(request):
+            response["Server-Timing"] = server_timing.to_header()
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        server_timing = ServerTiming()
+        token = current_server_timing.set(server_timing)
+        start = time.perf_counter()
+        try:
+            get_response: Callable[
+                [HttpRequest], Awaitable[HttpResponse]
+            ] = self.get_response
+            response = await get_response(request)
+        finally:
+            current_server_timing.reset(token)
+        server_timing.add("total", time.perf_counter() - start)
+        if settings.SERVER_TIMING or await sync_to_async(self.is_staff)(
+            request
+        ):
+            response["Server-Timing"] = server_timing.to_header()
+        return response
+
+    @staticmethod
+    def is_staff(request: HttpRequest) -> bool:
+        """
+        Check if the request is from a staff user. Requests that were rejected
+        before `AuthenticationMiddleware` ran (e.g. for a disallowed host)
+        don't have a user at all.
+        """
+        user = getattr(request, "user", None)
+        return user is not None and user.is_staff
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.3 on 2026-10-17 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0017_betamove_hold_position_mutually_exclusive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="boulder",
+            name="image_height",
+            field=models.PositiveIntegerField(
+                editable=False, help_text="Image height, in pixels", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="boulder",
+            name="image_width",
+            field=models.PositiveIntegerField(
+                editable=False, help_text="Image width, in pixels", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="boulder",
+            name="svg_height",
+            field=models.FloatField(
+                editable=False,
+                help_text="Image height in the SVG coordinate system."
+                " Calculated automatically from the image dimensions.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="boulder",
+            name="svg_width",
+            field=models.FloatField(
+                editable=False,
+                help_text="Image width in the SVG coordinate system."
+                " Calculated automatically from the image dimensions.",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="boulder",
+            name="image",
+            field=models.ImageField(
+                height_field="image_height",
+                unique=True,
+                upload_to="boulders",
+                width_field="image_width",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.3 on 2026-10-17 20:16
+
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import F
+
+import core.fields
+
+# Frozen copy of core.models.MOVE_ORDER_GAP, so this migration doesn't change
+# if that does
+MOVE_ORDER_GAP = 1024
+
+
+def spread_orders(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """
+    Existing orders are dense (1..N). Spread them out so there's room to insert
+    moves between them without shifting anything
+    """
+    BetaMove = apps.get_model("core", "BetaMove")
+    BetaMove.objects.update(order=F("order") * MOVE_ORDER_GAP)
+
+
+def compact_orders(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """
+    Reverse of spread_orders. Orders may not be multiples of the gap anymore,
+    so renumber each beta densely
+    """
+    BetaMove = apps.get_model("core", "BetaMove")
+    for beta_id in BetaMove.objects.values_list(
+        "beta_id", flat=True
+    ).distinct():
+        moves = BetaMove.objects.filter(beta_id=beta_id).order_by("order")
+        for i, move_id in enumerate(moves.values_list("id", flat=True)):
+            BetaMove.objects.filter(id=move_id).update(order=i + 1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0018_boulder_image_dimensions"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="betamove",
+            name="order",
+            field=core.fields.MoveOrderField(
+                blank=True,
+                db_index=True,
+                help_text="Sort key of the move within the beta. These are"
+                " sparse, so only the relative ordering is meaningful. Use"
+                " `Beta.get_move_order` to place a move at a particular"
+                " position.",
+            ),
+        ),
+        migrations.RunPython(spread_orders, compact_orders),
+    ]
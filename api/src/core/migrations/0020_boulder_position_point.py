@@ -0,0 +1,132 @@
+import logging
+
+from django.db import migrations, transaction
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import CheckConstraint, Model
+
+logger = logging.getLogger(__name__)
+
+# Number of rows to convert per UPDATE. Each batch is committed on its own, so
+# this bounds how long any row locks are held
+BATCH_SIZE = 1000
+
+
+def positions_to_point(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """
+    Convert all position columns from stringified `x,y` to native points
+    """
+    for model_name in ["Hold", "BetaMove"]:
+        convert_position_column(
+            apps.get_model("core", model_name), schema_editor
+        )
+
+
+def convert_position_column(
+    model: type[Model], schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """
+    Convert a model's position column from char(50) to point. Rather than
+    rewriting the table in one ALTER (which locks it for the whole duration),
+    the values are copied into a new column in small batches, then the columns
+    are swapped. This is resumable: if interrupted, running it again will pick
+    up with the rows that haven't been converted yet.
+    """
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    field = model._meta.get_field("position")
+
+    with connection.cursor() as cursor:
+        # On a fresh DB, the column was created as a point to begin with
+        cursor.execute(
+            "SELECT data_type FROM information_schema.columns"
+            " WHERE table_name = %s AND column_name = 'position'",
+            [model._meta.db_table],
+        )
+        (data_type,) = cursor.fetchone()
+        if data_type == "point":
+            return
+
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS position_new point"
+        )
+        convert_sql = f"""
+            UPDATE {table} SET position_new = position::text::point
+            WHERE id IN (
+                SELECT id FROM {table}
+                WHERE position IS NOT NULL AND position_new IS NULL
+                LIMIT %s
+            )
+        """
+        while True:
+            cursor.execute(convert_sql, [BATCH_SIZE])
+            logger.info(f"Converted {cursor.rowcount} rows in {table}")
+            if cursor.rowcount < BATCH_SIZE:
+                break
+
+    # Check constraints may reference the old column, so they would be dropped
+    # along with it. Re-create them on the new column
+    constraints = [
+        constraint
+        for constraint in model._meta.constraints
+        if isinstance(constraint, CheckConstraint)
+    ]
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            # Block writes while we catch up on anything that was created or
+            # modified since its batch ran, so nothing gets lost. Points don't
+            # have an = operator, so compare their text forms
+            cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                f"""
+                UPDATE {table} SET position_new = position::text::point
+                WHERE position_new::text
+                    IS DISTINCT FROM position::text::point::text
+                """
+            )
+            # Swap the columns
+            for constraint in constraints:
+                schema_editor.remove_constraint(model, constraint)
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN position")
+            cursor.execute(
+                f"ALTER TABLE {table} RENAME COLUMN position_new TO position"
+            )
+            if not field.null:
+                cursor.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN position SET NOT NULL"
+                )
+            for constraint in constraints:
+                schema_editor.add_constraint(model, constraint)
+
+
+def positions_to_string(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """
+    Reverse of positions_to_point. This just rewrites the tables in place,
+    since rolling back isn't something we want to optimize for.
+    """
+    for model_name in ["Hold", "BetaMove"]:
+        model = apps.get_model("core", model_name)
+        table = schema_editor.connection.ops.quote_name(model._meta.db_table)
+        schema_editor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN position TYPE char(50)"
+            " USING trim(BOTH '()' FROM position::text)"
+        )
+
+
+class Migration(migrations.Migration):
+    # Each batch needs to commit separately for the conversion to be
+    # resumable, so this can't run in one big transaction
+    atomic = False
+
+    dependencies = [
+        ("core", "0019_sparse_betamove_order"),
+    ]
+
+    operations = [
+        migrations.RunPython(positions_to_point, positions_to_string),
+    ]
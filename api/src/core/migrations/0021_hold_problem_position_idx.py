@@ -0,0 +1,22 @@
+# Generated by Django 4.2.3 on 2026-10-17 20:32
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0020_boulder_position_point"),
+    ]
+
+    operations = [
+        # Needed to include the problem FK in a GiST index
+        BtreeGistExtension(),
+        migrations.AddIndex(
+            model_name="hold",
+            index=django.contrib.postgres.indexes.GistIndex(
+                fields=["problem", "position"], name="hold_problem_position_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.3 on 2026-10-17 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0021_hold_problem_position_idx"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="problem",
+            options={"ordering": ["-created_at", "-id"]},
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="problem_created_at_id_idx"
+            ),
+        ),
+    ]
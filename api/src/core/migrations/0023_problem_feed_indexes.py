@@ -0,0 +1,27 @@
+# Generated by Django 4.2.3 on 2026-10-17 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0022_problem_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                condition=models.Q(("visibility", "public")),
+                fields=["-created_at", "-id"],
+                name="problem_public_created_at_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="problem_owner_created_at_idx",
+            ),
+        ),
+    ]
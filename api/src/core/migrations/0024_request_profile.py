@@ -0,0 +1,85 @@
+# Generated by Django 4.2.3 on 2026-10-17 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0023_problem_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "path",
+                    models.TextField(help_text="Path of the profiled request"),
+                ),
+                (
+                    "operation_name",
+                    models.TextField(
+                        blank=True,
+                        help_text="Name of the GraphQL operation, if given",
+                    ),
+                ),
+                ("status_code", models.PositiveSmallIntegerField()),
+                (
+                    "duration",
+                    models.FloatField(help_text="Wall time, in seconds"),
+                ),
+                (
+                    "peak_memory",
+                    models.PositiveBigIntegerField(
+                        help_text="Peak memory allocated by Python during the"
+                        " request, in bytes. Includes any other requests that"
+                        " were running at the time."
+                    ),
+                ),
+                (
+                    "stats",
+                    models.BinaryField(
+                        help_text="Raw cProfile stats, in the format read by"
+                        " pstats"
+                    ),
+                ),
+                (
+                    "summary",
+                    models.TextField(
+                        help_text="Functions with the highest cumulative time"
+                    ),
+                ),
+                (
+                    "memory_summary",
+                    models.TextField(
+                        help_text="Lines of code that allocated the most memory"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="Staff user who made the request",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -1,11 +1,14 @@
-from typing import Any, Literal, Optional
+from typing import Any, Optional, Union
+from weakref import WeakKeyDictionary
 
 import strawberry
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GistIndex
+from django.core.exceptions import ValidationError
+from django.db import connection, models
 from django.db.models import (
+    Count,
     ExpressionWrapper,
-    F,
     Max,
     Min,
     OuterRef,
@@ -13,11 +16,20 @@ from django.db.models import (
     Subquery,
 )
 from django.db.models.functions import Coalesce
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
+from django.utils import timezone
 
 from . import fields, util
-from .queryset import BetaMoveQuerySet
+from .cache import PROBLEM_LIST_TAG, get_problem_tag, invalidate_tags
+from .fields import MOVE_ORDER_MAX
+from .queryset import BetaMoveQuerySet, HoldQuerySet, ProblemQuerySet
+from .timing import measure
 
 
 # Typing on this seems to be wonky because strawberry.enum is made for stock
@@ -41,7 +53,8 @@ class Visibility(models.TextChoices):  # type: ignore
     PUBLIC = "public"
 
 
-class HoldAnnotationSource(models.TextChoices):
+@strawberry.enum
+class HoldAnnotationSource(models.TextChoices):  # type: ignore
     """
     The source of a hold annotation on an boulder, or of a hold within a problem
     """
@@ -57,12 +70,53 @@ class Boulder(models.Model):
     """
 
     name = models.TextField()  # This field isn't populated yet
-    image = models.ImageField(unique=True, upload_to="boulders")
+    image = models.ImageField(
+        unique=True,
+        upload_to="boulders",
+        width_field="image_width",
+        height_field="image_height",
+    )
+    # Image dimensions are stored so that we never have to open the image file
+    # (which lives in remote storage in prod) just to do coordinate math.
+    # Django populates width/height automatically when the image is assigned.
+    # These are nullable only for rows that predate the columns; see the
+    # backfill_boulder_dimensions command.
+    image_width = models.PositiveIntegerField(
+        null=True, editable=False, help_text="Image width, in pixels"
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, editable=False, help_text="Image height, in pixels"
+    )
+    svg_width = models.FloatField(
+        null=True,
+        editable=False,
+        help_text="Image width in the SVG coordinate system."
+        " Calculated automatically from the image dimensions.",
+    )
+    svg_height = models.FloatField(
+        null=True,
+        editable=False,
+        help_text="Image height in the SVG coordinate system."
+        " Calculated automatically from the image dimensions.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     # TODO override __str__ after name field is actually populated
 
+    def get_svg_dimensions(self) -> tuple[float, float]:
+        """
+        Get the dimensions of this boulder's image in the SVG coordinate
+        system. See `util.get_svg_dimensions` for details.
+        """
+        if self.svg_width is None or self.svg_height is None:
+            # This row hasn't been backfilled yet, so we have no choice but to
+            # read the image itself
+            with measure("storage"):
+                (width, height) = (self.image.width, self.image.height)
+            return util.get_svg_dimensions(width, height)
+        return (self.svg_width, self.svg_height)
+
 
 class Problem(models.Model):
     """
@@ -70,7 +124,27 @@ class Problem(models.Model):
     """
 
     class Meta:
-        ordering = ["-created_at"]
+        # The ID breaks ties, so pagination is stable
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # For keyset pagination (see KeysetConnection)
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="problem_created_at_id_idx",
+            ),
+            # The problems feed is fetched as separate branches for public
+            # problems and the user's own (see Query.problems), each of which
+            # needs an index matching the ordering
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=Q(visibility=Visibility.PUBLIC),
+                name="problem_public_created_at_idx",
+            ),
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="problem_owner_created_at_idx",
+            ),
+        ]
 
     name = models.TextField(default=util.random_problem_name)
     external_link = models.URLField(
@@ -88,9 +162,95 @@ class Problem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProblemQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.name
 
+    @staticmethod
+    def copy_contents(
+        source_id: int, target_id: int, beta_owner_id: Optional[int] = None
+    ) -> None:
+        """
+        Copy all holds from one problem to another. If `beta_owner_id` is
+        given, also copy all betas (and their moves) into the target problem,
+        owned by that user. Moves on the copied betas point to the copied
+        holds, not the originals.
+
+        This is a single INSERT ... SELECT statement, so nothing is loaded
+        into Python and the cost doesn't depend on the size of the problem. New
+        IDs are pulled from the sequences up front, which gives us an old->new
+        mapping to rewrite foreign keys with. The FK constraints are deferred,
+        so it's fine that the rows being pointed to are inserted by sibling
+        parts of the same statement.
+        """
+        qn = connection.ops.quote_name
+        hold_table = qn(Hold._meta.db_table)
+        beta_table = qn(Beta._meta.db_table)
+        move_table = qn(BetaMove._meta.db_table)
+
+        ctes = [
+            f"""hold_map AS (
+                SELECT id AS old_id,
+                    nextval(pg_get_serial_sequence('{hold_table}', 'id'))
+                    AS new_id
+                FROM {hold_table} WHERE problem_id = %(source_id)s
+            )""",
+            f"""new_holds AS (
+                INSERT INTO {hold_table} (
+                    id, problem_id, position, source, annotation,
+                    created_at, updated_at
+                )
+                SELECT hold_map.new_id, %(target_id)s, position, source,
+                    annotation, %(now)s, %(now)s
+                FROM {hold_table} JOIN hold_map ON id = hold_map.old_id
+            )""",
+        ]
+        if beta_owner_id is not None:
+            ctes += [
+                f"""beta_map AS (
+                    SELECT id AS old_id,
+                        nextval(pg_get_serial_sequence('{beta_table}', 'id'))
+                        AS new_id
+                    FROM {beta_table} WHERE problem_id = %(source_id)s
+                )""",
+                f"""new_betas AS (
+                    INSERT INTO {beta_table} (
+                        id, problem_id, owner_id, name, created_at, updated_at
+                    )
+                    SELECT beta_map.new_id, %(target_id)s, %(beta_owner_id)s,
+                        name, %(now)s, %(now)s
+                    FROM {beta_table} JOIN beta_map ON id = beta_map.old_id
+                )""",
+            ]
+            final = f"""
+                INSERT INTO {move_table} (
+                    beta_id, hold_id, position, "order", is_start, body_part,
+                    annotation, created_at, updated_at
+                )
+                SELECT beta_map.new_id, hold_map.new_id, move.position,
+                    move."order", move.is_start, move.body_part,
+                    move.annotation, %(now)s, %(now)s
+                FROM {move_table} AS move
+                JOIN beta_map ON move.beta_id = beta_map.old_id
+                LEFT JOIN hold_map ON move.hold_id = hold_map.old_id
+            """
+        else:
+            # Postgres requires a main statement, even though the real work is
+            # all in the CTEs
+            final = "SELECT 1"
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH {', '.join(ctes)} {final}",
+                {
+                    "source_id": source_id,
+                    "target_id": target_id,
+                    "beta_owner_id": beta_owner_id,
+                    "now": timezone.now(),
+                },
+            )
+
 
 class Hold(models.Model):
     """
@@ -100,6 +260,19 @@ class Hold(models.Model):
     closer to the UX that we present in the frontend.
     """
 
+    class Meta:
+        indexes = [
+            # For spatial lookups within a problem (see HoldQuerySet.near).
+            # Requires the btree_gist extension, for the problem column
+            GistIndex(
+                name="hold_problem_position_idx",
+                fields=["problem", "position"],
+            )
+        ]
+
+    # Custom query set
+    objects = HoldQuerySet.as_manager()
+
     problem = models.ForeignKey(
         Problem, related_name="holds", on_delete=models.CASCADE
     )
@@ -118,6 +291,13 @@ class Hold(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+# Default spacing between the `order` of consecutive moves in a beta. Leaving
+# gaps means we can insert/reorder a move by writing only that one row, instead
+# of shifting every subsequent move. Each insert into the same gap halves it,
+# so this allows ~10 inserts in a single spot before a rebalance is needed.
+MOVE_ORDER_GAP = 1024
+
+
 class Beta(models.Model):
     """
     A prescribed series of moves to solve a problem.
@@ -135,36 +315,128 @@ class Beta(models.Model):
         return self.name
 
     @staticmethod
-    def slide_moves(
-        beta_id: str,
-        direction: Literal["up", "down"],
-        from_order: int,
-        to_order: Optional[int] = None,
-    ) -> None:
+    def get_move_order(
+        beta_id: str, position: int, exclude_id: Optional[int] = None
+    ) -> int:
         """
-        Slide the moves in a beta either up or down one slot, starting from a
-        given order and optionally ending at another order. If `to_order` is
-        not given, this will go to the end of the list.
+        Get an `order` value that will place a move at the given position in a
+        beta. `position` is 1-indexed, i.e. the same numbering that the API
+        exposes. Positions past the end of the beta will go to the end.
 
-        `from_order` and `to_order` are both inclusive.
+        Move orders are sparse, so this will generally pick a value in the gap
+        between the two neighboring moves, without modifying any other rows.
+        If there is no room left in that gap, the beta's orders will be
+        rebalanced first (see `rebalance_moves`).
 
-        In this case, "down" means "increasing order". The metaphor is of a
-        vertical list of increasing orders.
+        If moving an existing move, pass its ID as `exclude_id` so it isn't
+        counted as its own neighbor.
         """
-
-        if direction == "down":
-            order_expr = F("order") + 1
-        elif direction == "up":
-            order_expr = F("order") - 1
+        moves = BetaMove.objects.filter(beta_id=beta_id).order_by("order")
+        if exclude_id is not None:
+            moves = moves.exclude(id=exclude_id)
+
+        # Grab the orders of the moves on either side of the target slot.
+        # There's no move before position 1, so use 0 as a floor there
+        if position <= 1:
+            before = 0
+            after = moves.values_list("order", flat=True).first()
         else:
-            raise ValueError(f"Unexpected slide direction: {direction}")
+            neighbors = list(
+                moves.values_list("order", flat=True)[position - 2 : position]
+            )
+            if len(neighbors) == 2:
+                (before, after) = neighbors
+            elif len(neighbors) == 1:
+                (before, after) = (neighbors[0], None)
+            else:
+                # Past the end of the list, just append
+                before = moves.aggregate(max_order=Max("order"))["max_order"]
+                after = None
+
+        if before is None:
+            # Beta is empty
+            return MOVE_ORDER_GAP
+        if after is None:
+            return before + MOVE_ORDER_GAP
+        if after - before >= 2:
+            return (before + after) // 2
+
+        # No room left between these two moves, so spread everything back out
+        # and try again. This is guaranteed to leave room.
+        Beta.rebalance_moves(beta_id)
+        return Beta.get_move_order(beta_id, position, exclude_id)
 
-        # Find our window basic on from/to values
-        filt = Q(beta_id=beta_id, order__gte=from_order)
-        if to_order is not None:
-            filt &= Q(order__lte=to_order)
+    @staticmethod
+    def copy_moves(source_id: int, target_id: int) -> None:
+        """
+        Copy all moves from one beta to another, in a single INSERT ... SELECT
+        so nothing is loaded into Python. The target beta should be empty.
+        """
+        table = connection.ops.quote_name(BetaMove._meta.db_table)
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (
+                    beta_id, hold_id, position, "order", is_start, body_part,
+                    annotation, created_at, updated_at
+                )
+                SELECT %s, hold_id, position, "order", is_start, body_part,
+                    annotation, %s, %s
+                FROM {table} WHERE beta_id = %s
+                """,
+                [target_id, now, now, source_id],
+            )
+
+    @staticmethod
+    def rebalance_moves(beta_id: str) -> None:
+        """
+        Re-space the orders of all moves in a beta so they're evenly spread
+        out by `MOVE_ORDER_GAP`, preserving their relative ordering. This is
+        done in a single UPDATE, and only needs to happen occasionally, when a
+        gap is exhausted by repeated inserts into the same slot.
+        """
+        BetaMove.objects.filter(beta_id=beta_id).update(
+            order=BetaMove.get_dense_order_expression() * MOVE_ORDER_GAP
+        )
+
+    @staticmethod
+    def reorder_moves(beta_id: str, move_ids: list[int]) -> None:
+        """
+        Set the full order of a beta's moves at once. `move_ids` must contain
+        every move in the beta exactly once, in the desired order. All new
+        orders are written in a single UPDATE, then is_start is re-calculated
+        once for the whole beta.
+        """
+        current_ids = set(
+            BetaMove.objects.filter(beta_id=beta_id).values_list(
+                "id", flat=True
+            )
+        )
+        if len(move_ids) != len(current_ids) or set(move_ids) != current_ids:
+            raise ValidationError(
+                "Move IDs must contain every move in the beta exactly once"
+            )
+        if not move_ids:
+            return
+
+        # Django can't do an UPDATE from a VALUES list, so write it by hand.
+        # The unique constraint on order is deferred, so swapping orders
+        # between rows within the statement is fine
+        values = ", ".join(["(%s, %s)"] * len(move_ids))
+        params: list[Any] = [timezone.now()]
+        for i, move_id in enumerate(move_ids):
+            params.extend([move_id, (i + 1) * MOVE_ORDER_GAP])
+        table = connection.ops.quote_name(BetaMove._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET "order" = new.new_order, updated_at = %s'
+                f" FROM (VALUES {values}) AS new (id, new_order)"
+                f" WHERE {table}.id = new.id",
+                params,
+            )
 
-        BetaMove.objects.filter(filt).update(order=order_expr)
+        BetaMove.update_is_start(beta_id)
 
 
 class BetaMove(models.Model):
@@ -186,8 +458,7 @@ class BetaMove(models.Model):
             models.CheckConstraint(
                 name="hold_position_mutually_exclusive",
                 check=Q(hold_id__isnull=True) ^ Q(position__isnull=True),
-            )
-            # TODO enforce that orders are always consecutive
+            ),
         ]
         ordering = ["order"]
 
@@ -214,7 +485,9 @@ class BetaMove(models.Model):
     order = fields.MoveOrderField(
         blank=True,  # If omitted, will be auto-populated by a signal handler
         db_index=True,  # We sort by this a lot
-        help_text="Ordering number of the hold in the beta, starting at 1",
+        help_text="Sort key of the move within the beta. These are sparse, so"
+        " only the relative ordering is meaningful. Use"
+        " `Beta.get_move_order` to place a move at a particular position.",
     )
     is_start = models.BooleanField(
         # Technically this can be annotated on, but because it's interdependent
@@ -240,12 +513,87 @@ class BetaMove(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def get_dense_order(self) -> int:
+        """
+        Get the position of this move within its beta, starting at 1. Uses the
+        `dense_order` annotation if present (see `BetaMoveQuerySet`), otherwise
+        it has to be queried.
+        """
+        dense_order = getattr(self, "dense_order", None)
+        if dense_order is None:
+            dense_order = BetaMove.objects.filter(
+                beta_id=self.beta_id, order__lte=self.order
+            ).count()
+        return dense_order
+
+    @classmethod
+    def get_dense_order_expression(cls) -> Subquery:
+        """
+        Get a query expression that calculates the position of each move within
+        its beta, starting at 1 with no gaps. This is what the API exposes as
+        `order`, since the stored orders are sparse. Each row counts the moves
+        before it in its beta, which is an index-only scan on (beta, order).
+        """
+        return Subquery(
+            cls.objects.filter(
+                beta_id=OuterRef("beta_id"), order__lte=OuterRef("order")
+            )
+            # Remove annoying django clauses that break shit
+            .remove_group_by_order_by()
+            .annotate(dense_order=Count("id"))
+            .values("dense_order"),
+            output_field=models.PositiveIntegerField(),
+        )
+
+    @classmethod
+    def update_is_start(cls, beta_id: str) -> int:
+        """
+        Re-calculate is_start for all moves in a beta, writing only the moves
+        whose value actually changes. Returns the order of the first non-start
+        move in the beta (or a fake order greater than any real one, if every
+        move is a start move).
+
+        The start moves are all the moves before the first move that repeats a
+        body part. By the pigeonhole principle, that move is always within the
+        first `len(BodyPart) + 1` moves, so we only ever need to look at that
+        many rows, no matter how long the beta is. This is much cheaper than
+        `get_is_start_expression`, which is computed for every row.
+        """
+        first_moves = (
+            cls.objects.filter(beta_id=beta_id)
+            .order_by("order")
+            .values_list("order", "body_part")[: len(BodyPart) + 1]
+        )
+        first_non_start = MOVE_ORDER_MAX + 1
+        seen_body_parts: set[str] = set()
+        for order, body_part in first_moves:
+            if body_part in seen_body_parts:
+                first_non_start = order
+                break
+            seen_body_parts.add(body_part)
+
+        # Only touch moves that are on the wrong side of the boundary. In
+        # practice this is at most a handful of moves near the start
+        should_start = Q(order__lt=first_non_start)
+        cls.objects.filter(
+            (Q(is_start=True) & ~should_start)
+            | (Q(is_start=False) & should_start),
+            beta_id=beta_id,
+        ).update(
+            is_start=ExpressionWrapper(
+                should_start, output_field=models.BooleanField()
+            )
+        )
+        return first_non_start
+
     @classmethod
     def get_is_start_expression(cls) -> ExpressionWrapper:
         """
         Get a query expression used to calculate is_start. This can be passed
         as the is_start keyword to an update query to re-calculate is_start for
-        all moves in the queryset.
+        all moves in the queryset. This is expensive on large tables because
+        it's calculated independently for every row, so prefer
+        `update_is_start` when updating a single beta.
         """
         # Make sure we scope all operations to the move's beta
         filt = cls.objects.filter(beta_id=OuterRef("beta_id"))
@@ -267,11 +615,12 @@ class BetaMove(models.Model):
                     # Remove annoying django clauses that break shit
                     .remove_group_by_order_by()
                     # If no body part has more than 1 move, everything is
-                    # a start move so make up a fake "non-start" order. By
-                    # the pigeon hole principle, this magic number just
-                    # needs to be more than the number of body parts
+                    # a start move so make up a fake "non-start" order that's
+                    # greater than any real order
                     .annotate(
-                        first_non_start=Coalesce(Min("order"), 9999)
+                        first_non_start=Coalesce(
+                            Min("order"), MOVE_ORDER_MAX + 1
+                        )
                     ).values("first_non_start")
                 ),
             ),
@@ -279,9 +628,105 @@ class BetaMove(models.Model):
         )
 
 
+class RequestProfile(models.Model):
+    """
+    A profile of a single API request, recorded on demand by a staff user (see
+    `core.profiling`). Viewable and downloadable in the admin.
+    """
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        help_text="Staff user who made the request",
+    )
+    path = models.TextField(help_text="Path of the profiled request")
+    operation_name = models.TextField(
+        blank=True, help_text="Name of the GraphQL operation, if given"
+    )
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text="Wall time, in seconds")
+    peak_memory = models.PositiveBigIntegerField(
+        help_text="Peak memory allocated by Python during the request, in"
+        " bytes. Includes any other requests that were running at the time."
+    )
+    stats = models.BinaryField(
+        help_text="Raw cProfile stats, in the format read by pstats"
+    )
+    summary = models.TextField(
+        help_text="Functions with the highest cumulative time"
+    )
+    memory_summary = models.TextField(
+        help_text="Lines of code that allocated the most memory"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.path} {self.operation_name} ({self.created_at})"
+
+
 # ========== SIGNALS ==========
 
 
+def is_beta_deletion(origin: Any) -> bool:
+    """
+    Does the given deletion origin delete whole betas? The origin is the model
+    instance or queryset that `.delete()` was called on, which Django passes
+    to all delete signals triggered by the cascade.
+    """
+    if isinstance(origin, models.QuerySet):
+        return issubclass(origin.model, (Boulder, Problem, Beta))
+    return isinstance(origin, (Boulder, Problem, Beta))
+
+
+def is_problem_deletion(origin: Any) -> bool:
+    """
+    Does the given deletion origin delete whole problems? See
+    `is_beta_deletion`.
+    """
+    if isinstance(origin, models.QuerySet):
+        return issubclass(origin.model, (Boulder, Problem))
+    return isinstance(origin, (Boulder, Problem))
+
+
+def is_hold_deletion(origin: Any) -> bool:
+    """
+    Is the given deletion origin a hold (or holds)? See `is_beta_deletion`.
+    """
+    if isinstance(origin, models.QuerySet):
+        return issubclass(origin.model, Hold)
+    return isinstance(origin, Hold)
+
+
+# IDs of the betas with moves on each hold that's being deleted, between its
+# pre- and post-delete signals. Weak keys so nothing leaks if a delete fails
+_hold_deletion_beta_ids: "WeakKeyDictionary[Hold, list[int]]" = (
+    WeakKeyDictionary()
+)
+
+
+@receiver(pre_save, sender=Boulder)
+def boulder_on_pre_save(
+    sender: Any, instance: Boulder, raw: bool, **kwargs: dict
+) -> None:
+    """
+    Before saving a boulder, calculate its SVG dimensions from the image
+    dimensions. Django takes care of populating the image dimensions whenever
+    a new image is assigned.
+    """
+    # Don't do anything for loaded fixtures
+    if raw:
+        return
+
+    if instance.image_width and instance.image_height:
+        (instance.svg_width, instance.svg_height) = util.get_svg_dimensions(
+            instance.image_width, instance.image_height
+        )
+
+
 @receiver(post_delete, sender=Boulder)
 def boulder_on_post_delete(
     sender: Any, instance: Boulder, **kwargs: dict
@@ -316,68 +761,73 @@ def problem_on_post_delete(
     ).delete()
 
 
+@receiver(pre_delete, sender=Hold)
+def hold_on_pre_delete(
+    sender: Any, instance: Hold, origin: Any, **kwargs: dict
+) -> None:
+    """
+    Before deleting a hold, find the betas that have moves on it. Those moves
+    are deleted by the cascade, so is_start has to be re-calculated for those
+    betas afterwards (see `hold_on_post_delete`).
+    """
+    if is_problem_deletion(origin):
+        return
+    _hold_deletion_beta_ids[instance] = list(
+        BetaMove.objects.filter(hold=instance)
+        .values_list("beta_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=Hold)
+def hold_on_post_delete(
+    sender: Any, instance: Hold, origin: Any, **kwargs: dict
+) -> None:
+    """
+    After deleting a hold, re-calculate is_start for all the betas that had
+    moves on it, in a single query. The moves themselves skip this (see
+    `beta_move_on_post_delete`), otherwise it would take a few queries per
+    beta.
+    """
+    beta_ids = _hold_deletion_beta_ids.pop(instance, None)
+    if beta_ids:
+        BetaMove.objects.filter(beta_id__in=beta_ids).update(
+            is_start=BetaMove.get_is_start_expression()
+        )
+
+
 @receiver(pre_save, sender=BetaMove)
 def beta_move_on_pre_save(
     sender: Any, instance: BetaMove, raw: bool, **kwargs: dict
 ) -> None:
     """
-    Before creating a move, slide all the moves below it down 1 to make
-    room. If updating an existing move, we need to slide the moves between
-    the old and new order.
+    Before creating a move, populate its order if not given, so that it's
+    appended to the end of the beta. Inserting a move elsewhere, or reordering
+    an existing one, requires an order from `Beta.get_move_order`. Because
+    orders are sparse, we never have to touch any other moves here.
     """
     # Don't do anything for loaded fixtures
     if raw:
         return
 
-    beta_id = instance.beta_id
     if instance.id is None:
         # Creating a new move
         # is_start will be fixed by the post-save hook
         instance.is_start = False
         if instance.order is None:
-            # No order given, just do max+1 (or default to 1)
+            # No order given, just do max+gap (or default to the first gap)
             # TODO make sure this is atomic
             instance.order = Subquery(
-                BetaMove.objects.filter(beta_id=beta_id)
+                BetaMove.objects.filter(beta_id=instance.beta_id)
                 # Remove annoying django clauses that break shit
                 .remove_group_by_order_by()
-                .annotate(next_order=Coalesce(Max("order") + 1, 1))
+                .annotate(
+                    next_order=Coalesce(
+                        Max("order") + MOVE_ORDER_GAP, MOVE_ORDER_GAP
+                    )
+                )
                 .values("next_order")
             )
-        else:
-            # Order was given, slide everything below that value down to
-            # make room
-            Beta.slide_moves(
-                beta_id=beta_id,
-                direction="down",
-                from_order=instance.order,
-            )
-    else:
-        # Updating existing move: slide the moves between old and new spots
-        old_order = BetaMove.objects.get(id=instance.id).order
-        new_order = instance.order
-
-        if old_order < new_order:
-            # Moving *down* the list, so slide intermediate moves *up*
-            Beta.slide_moves(
-                beta_id=beta_id,
-                direction="up",
-                # If we're moving e.g. 4->7, slide 5-7 to be 4-6
-                from_order=old_order + 1,
-                to_order=new_order,
-            )
-        elif old_order > new_order:
-            # Moving *up* the list, so slide intermediate moves *down*
-            Beta.slide_moves(
-                beta_id=beta_id,
-                direction="down",
-                # If we're moving e.g. 7->4, slide 4-6 to be 5-7
-                from_order=new_order,
-                to_order=old_order - 1,
-            )
-        else:
-            # Order didn't change, do nothing
-            pass
 
 
 @receiver(post_save, sender=BetaMove)
@@ -385,28 +835,87 @@ def beta_move_on_post_save(
     sender: Any, instance: BetaMove, raw: bool, **kwargs: dict
 ) -> None:
     """
-    After creating/updating a move, re-calculate is_start for the whole beta.
-    This kinda sucks because doubles the number of updates, but it should go
-    away once we can use generated columns.
+    After creating/updating a move, re-calculate is_start for the beta. This
+    only reads the first few moves of the beta, and only writes the moves whose
+    value changed.
     """
     # Don't do anything for loaded fixtures
     if raw:
         return
 
-    BetaMove.objects.filter(beta_id=instance.beta_id).update(
-        is_start=BetaMove.get_is_start_expression(),
-    )
+    first_non_start = BetaMove.update_is_start(instance.beta_id)
+    # Keep the in-memory copy in sync too, so it can be returned as-is
+    instance.is_start = instance.order < first_non_start
 
 
 @receiver(post_delete, sender=BetaMove)
 def beta_move_on_post_delete(
-    sender: Any, instance: BetaMove, **kwargs: dict
+    sender: Any, instance: BetaMove, origin: Any, **kwargs: dict
 ) -> None:
     """
-    Upon deleting a move, slide all moves below it in the list up 1
+    After deleting a move, re-calculate is_start for the beta, since removing
+    a move can change which moves are part of the start.
+
+    If the move is being deleted as part of a cascade from its beta (or
+    anything above that), the whole beta is going away so there's nothing to
+    re-calculate. Skipping that keeps deleting a beta/problem to a constant
+    number of queries, rather than a couple per move. If it's a cascade from
+    its hold, all the affected betas are re-calculated at once after the hold
+    is deleted.
     """
-    Beta.slide_moves(
-        beta_id=instance.beta_id,
-        direction="up",
-        from_order=instance.order,
-    )
+    if is_beta_deletion(origin) or is_hold_deletion(origin):
+        return
+    BetaMove.update_is_start(instance.beta_id)
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+def problem_on_change(sender: Any, instance: Problem, **kwargs: Any) -> None:
+    """
+    After any change to a problem, invalidate cached responses that contain
+    it, as well as all lists of problems, since it may have been added to or
+    removed from them
+    """
+    invalidate_tags(get_problem_tag(instance.id), PROBLEM_LIST_TAG)
+
+
+@receiver(post_save, sender=Hold)
+@receiver(post_delete, sender=Hold)
+@receiver(post_save, sender=Beta)
+@receiver(post_delete, sender=Beta)
+def problem_child_on_change(
+    sender: Any,
+    instance: Union[Hold, Beta],
+    origin: Any = None,
+    **kwargs: Any,
+) -> None:
+    """
+    After any change to a hold or beta, invalidate cached responses that
+    contain its problem. If the whole problem is being deleted, that takes
+    care of it already.
+    """
+    if is_problem_deletion(origin):
+        return
+    invalidate_tags(get_problem_tag(instance.problem_id))
+
+
+@receiver(post_save, sender=BetaMove)
+@receiver(post_delete, sender=BetaMove)
+def beta_move_on_change(
+    sender: Any, instance: BetaMove, origin: Any = None, **kwargs: Any
+) -> None:
+    """
+    After any change to a move, invalidate cached responses that contain its
+    problem. If the whole beta or the move's hold is being deleted, that takes
+    care of it already. Mutations load moves with their beta, so use that if
+    it's there, rather than loading the whole beta just for its problem ID.
+    """
+    if is_beta_deletion(origin) or is_hold_deletion(origin):
+        return
+    if BetaMove.beta.is_cached(instance):
+        problem_id = instance.beta.problem_id
+    else:
+        problem_id = Beta.objects.values_list("problem_id", flat=True).get(
+            id=instance.beta_id
+        )
+    invalidate_tags(get_problem_tag(problem_id))
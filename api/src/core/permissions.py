@@ -52,12 +52,25 @@ def is_owner(user: User, obj: Optional[Problem | Beta]) -> bool:
     return obj is not None and obj.owner_id == user.id
 
 
+def get_parent_owner_id(obj: Hold | BetaMove, parent_field: str) -> int:
+    """
+    Get the owner ID of an object's parent (problem or beta). Querysets for
+    API nodes annotate this as e.g. `problem_owner_id` (see
+    `HoldQuerySet.annotate_owner_id`), so use that if available. Otherwise,
+    fall back to loading the parent.
+    """
+    owner_id = getattr(obj, f"{parent_field}_owner_id", None)
+    if owner_id is None:
+        owner_id = getattr(obj, parent_field).owner_id
+    return owner_id
+
+
 @rules.predicate
 def is_problem_owner(user: User, obj: Optional[Hold]) -> bool:
     """
     User can CUD a hold iff they own the problem
     """
-    return obj is not None and is_owner(user, obj.problem)
+    return obj is not None and get_parent_owner_id(obj, "problem") == user.id
 
 
 @rules.predicate
@@ -65,7 +78,7 @@ def is_beta_owner(user: User, obj: Optional[BetaMove]) -> bool:
     """
     User can CUD a beta move iff they own the beta
     """
-    return obj is not None and is_owner(user, obj.beta)
+    return obj is not None and get_parent_owner_id(obj, "beta") == user.id
 
 
 # User
@@ -0,0 +1,85 @@
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Callable
+
+from django.http import HttpRequest, HttpResponse
+from django.urls import reverse
+
+from .models import RequestProfile
+
+# Staff users can set this header (to anything), or the `profile` query param,
+# to profile a request. The response gets the same header, with a link to the
+# profile in the admin.
+PROFILE_HEADER = "X-Beta-Spray-Profile"
+# Number of functions/lines to include in the text summaries
+SUMMARY_SIZE = 50
+
+# tracemalloc is global, so only profile one request at a time
+profile_lock = threading.Lock()
+
+
+def should_profile(request: HttpRequest) -> bool:
+    """
+    Did a staff user ask for this request to be profiled? This loads the user,
+    so it can't be called from an async context.
+    """
+    return bool(
+        request.headers.get(PROFILE_HEADER) or "profile" in request.GET
+    ) and bool(request.user.is_staff)
+
+
+def profile_request(
+    request: HttpRequest,
+    operation_name: str,
+    get_response: Callable[[], HttpResponse],
+) -> HttpResponse:
+    """
+    Get the response for a request under cProfile and tracemalloc, and save
+    the results as a `RequestProfile`. cProfile only sees the current thread,
+    so the whole request has to run in it. tracemalloc sees every thread, so
+    memory usage includes any other requests running at the same time.
+    """
+    with profile_lock:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                response = get_response()
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            (_, peak_memory) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_SIZE)
+    memory_summary = "\n".join(
+        str(statistic)
+        for statistic in snapshot.statistics("lineno")[:SUMMARY_SIZE]
+    )
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        path=request.path,
+        operation_name=operation_name,
+        status_code=response.status_code,
+        duration=duration,
+        peak_memory=peak_memory,
+        # This is the format written by cProfile.Profile.dump_stats
+        stats=marshal.dumps(stats.stats),  # type: ignore[attr-defined]
+        summary=summary.getvalue(),
+        memory_summary=memory_summary,
+    )
+    response[PROFILE_HEADER] = reverse(
+        "admin:core_requestprofile_change", args=[profile.id]
+    )
+    return response
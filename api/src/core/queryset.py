@@ -1,8 +1,111 @@
-from django.db.models import QuerySet, Value
+from functools import reduce
+from operator import or_
+
+from django.db.models import BigIntegerField, F, Q, QuerySet, Value
+from django.db.models.functions import Cast, Power, Sqrt
 from typing_extensions import Self
 
+from .fields import BoulderPosition, PositionX, PositionY
+
+
+class ProblemQuerySet(QuerySet):
+    # Disjoint filters that were OR'd together by filter_any
+    branches: list[Q] = []
+
+    def _clone(self) -> Self:
+        clone = super()._clone()  # type: ignore[misc]
+        clone.branches = self.branches
+        return clone
+
+    def filter_any(self, *branches: Q) -> Self:
+        """
+        Filter to rows that match any of the given conditions. Postgres can't
+        use an index to serve an OR across different columns, so the branches
+        are also stored on the queryset. This allows KeysetConnection to fetch
+        each branch separately from its own index, and merge them with a
+        UNION ALL. For that to be correct, **the branches must be disjoint**,
+        otherwise rows may show up twice.
+        """
+        clone = self.filter(reduce(or_, branches))
+        clone.branches = list(branches)
+        return clone
+
+
+class HoldQuerySet(QuerySet):
+    def annotate_owner_id(self) -> Self:
+        """
+        Annotate each hold with `problem_owner_id`, the ID of the user that
+        owns its problem. Permission checks use this, so they don't have to
+        load the problem for every hold in a list.
+        """
+        return self.annotate(problem_owner_id=F("problem__owner_id"))
+
+    def near(
+        self,
+        problem_id: int,
+        center: BoulderPosition,
+        radius: float,
+        scale: tuple[float, float],
+    ) -> Self:
+        """
+        Filter to holds in a problem within `radius` of a position, ordered
+        nearest first. Normalized positions are stretched differently along
+        each axis, so distance is measured after multiplying X/Y by `scale`
+        (e.g. the boulder's SVG dimensions), and `radius` is in those units.
+
+        The radius is first applied as a bounding box, which is served by the
+        GiST index on (problem, position), so only holds in the immediate area
+        are ever looked at, no matter how many the problem has.
+        """
+        (scale_x, scale_y) = scale
+        (radius_x, radius_y) = (radius / scale_x, radius / scale_y)
+        distance = Sqrt(
+            Power((PositionX("position") - center.x) * scale_x, 2)
+            + Power((PositionY("position") - center.y) * scale_y, 2)
+        )
+        return (
+            self.filter(
+                # The GiST opclass for bigint has no cross-type operators, so
+                # the ID has to be cast, or the index can't be used for it
+                problem_id=Cast(Value(problem_id), BigIntegerField()),
+                position__within_box=(
+                    BoulderPosition(center.x - radius_x, center.y - radius_y),
+                    BoulderPosition(center.x + radius_x, center.y + radius_y),
+                ),
+            )
+            .alias(distance=distance)
+            .filter(distance__lte=radius)
+            .order_by("distance")
+        )
+
 
 class BetaMoveQuerySet(QuerySet):
+    def annotate_owner_id(self) -> Self:
+        """
+        Annotate each move with `beta_owner_id`, the ID of the user that owns
+        its beta. Permission checks use this, so they don't have to load the
+        beta for every move in a list.
+        """
+        return self.annotate(beta_owner_id=F("beta__owner_id"))
+
+    def annotate_problem_id(self) -> Self:
+        """
+        Annotate each move with `beta_problem_id`, the ID of the problem that
+        its beta belongs to. Cached responses are tagged by problem, so this
+        lets moves be tagged without loading their betas.
+        """
+        return self.annotate(beta_problem_id=F("beta__problem_id"))
+
+    def annotate_dense_order(self) -> Self:
+        """
+        Annotate each move with `dense_order`, its position within its beta
+        starting at 1. Stored orders are sparse, so this is what should be
+        shown to the user.
+        """
+        return self.annotate(
+            dense_order=self.model.get_dense_order_expression()
+        )
+
     def remove_group_by_order_by(self) -> Self:
         """
         Prevent Django from generating a GROUP BY or ORDER BY clause on this
@@ -5,8 +5,16 @@ from strawberry.custom_scalar import ScalarDefinition
 from strawberry.schema.types.scalar import DEFAULT_SCALAR_REGISTRY
 from strawberry_django.optimizer import DjangoOptimizerExtension
 
+from .cost import QueryCostLimiter
+from .document_cache import DocumentCache
+from .instrumentation import (
+    Instrumentation,
+    OperationMetrics,
+    ServerTimingPhases,
+)
 from .mutation import Mutation
 from .query import Query
+from .response_cache import ResponseCache
 
 # https://github.com/blb-ventures/strawberry-django-plus/issues/166#issuecomment-1414420627
 # Sets the name from GlobalID! to ID!
@@ -26,5 +34,14 @@ DEFAULT_SCALAR_REGISTRY[relay.GlobalID] = ScalarDefinition(
 schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
-    extensions=[DjangoOptimizerExtension],
+    extensions=[
+        # First, so they time everything else
+        OperationMetrics,
+        Instrumentation,
+        ServerTimingPhases,
+        DjangoOptimizerExtension,
+        DocumentCache,
+        QueryCostLimiter,
+        ResponseCache,
+    ],
 )
@@ -0,0 +1,309 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Iterable, Optional
+
+import strawberry
+from asgiref.sync import sync_to_async
+from django.db.models import F, Field, Func, Model, QuerySet, Value
+from strawberry import relay
+from strawberry.relay.types import NodeIterableType
+from strawberry.types import Info
+from strawberry.utils.await_maybe import AwaitableOrValue
+from strawberry.utils.inspect import in_async_context
+from typing_extensions import Self
+
+CURSOR_PREFIX = "keyset"
+
+# (field, descending?) for each field that the list is sorted by
+SortKey = list[tuple[Field, bool]]
+
+
+@strawberry.type(
+    name="Connection", description="A connection to a list of items."
+)
+class KeysetConnection(relay.ListConnection[relay.NodeType]):
+    """
+    A connection that paginates by keyset, rather than by offset. Each cursor
+    holds the sort key of its node, which is the queryset's ordering plus the
+    primary key as a tiebreaker. Pages are fetched with a row comparison on
+    that key, e.g. `WHERE (created_at, id) < (...)`, so with a matching index
+    deep pages are as cheap as the first one, and concurrent inserts don't
+    shift pages around.
+
+    Querysets that have already been evaluated (e.g. from a prefetch) are
+    paginated in memory, with the same cursors. Any other iterable falls back
+    to offset pagination.
+    """
+
+    @classmethod
+    def resolve_connection(
+        cls,
+        nodes: NodeIterableType[relay.NodeType],
+        *,
+        info: Info,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        first: Optional[int] = None,
+        last: Optional[int] = None,
+        **kwargs: Any,
+    ) -> AwaitableOrValue[Self]:
+        if not isinstance(nodes, QuerySet):
+            return super().resolve_connection(
+                nodes,
+                info=info,
+                before=before,
+                after=after,
+                first=first,
+                last=last,
+                **kwargs,
+            )
+
+        # Pages are fetched with the sync ORM, so in an async view, do it all
+        # in a thread. Already-loaded lists don't need the DB
+        if in_async_context() and nodes._result_cache is None:  # type: ignore
+            return sync_to_async(cls.resolve_connection)(  # type: ignore
+                nodes,
+                info=info,
+                before=before,
+                after=after,
+                first=first,
+                last=last,
+                **kwargs,
+            )
+
+        max_results = info.schema.config.relay_max_results
+        for name, value in [("first", first), ("last", last)]:
+            if value is None:
+                continue
+            if value < 0:
+                raise ValueError(
+                    f"Argument '{name}' must be a non-negative integer."
+                )
+            if value > max_results:
+                raise ValueError(
+                    f"Argument '{name}' cannot be higher than {max_results}."
+                )
+
+        sort_key = get_sort_key(nodes)
+        after_values = decode_cursor(sort_key, after) if after else None
+        before_values = decode_cursor(sort_key, before) if before else None
+        # Only go from the end if that's the only thing we were asked for
+        backward = last is not None and first is None
+        limit = last if backward else first
+        if limit is None:
+            limit = max_results
+
+        # Grab one more than requested, to see if there's another page
+        if nodes._result_cache is None:  # type: ignore[attr-defined]
+            items = cls._fetch_page(
+                nodes, sort_key, after_values, before_values, backward, limit
+            )
+        else:
+            items = cls._slice_page(
+                nodes, sort_key, after_values, before_values, backward, limit
+            )
+
+        has_more = len(items) > limit
+        items = items[:limit]
+        if backward:
+            items.reverse()
+            has_previous_page = has_more
+            has_next_page = before is not None
+        else:
+            has_previous_page = after is not None
+            has_next_page = has_more
+        if first is not None and last is not None:
+            has_previous_page = has_previous_page or len(items) > last
+            items = items[-last:] if last else []
+
+        edges = [
+            relay.Edge(
+                cursor=encode_cursor(sort_key, item),
+                node=cls.resolve_node(item, info=info, **kwargs),
+            )
+            for item in items
+        ]
+        return cls(
+            edges=edges,
+            page_info=relay.PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            ),
+        )
+
+    @classmethod
+    def _fetch_page(
+        cls,
+        queryset: QuerySet,
+        sort_key: SortKey,
+        after_values: Optional[list[Any]],
+        before_values: Optional[list[Any]],
+        backward: bool,
+        limit: int,
+    ) -> list[Any]:
+        """
+        Fetch up to `limit + 1` rows from the DB, in iteration order (i.e.
+        reversed if going backward)
+        """
+        if after_values is not None:
+            queryset = keyset_filter(queryset, sort_key, after_values, True)
+        if before_values is not None:
+            queryset = keyset_filter(queryset, sort_key, before_values, False)
+        # Cursors are built from the sort key, so make sure it isn't deferred
+        sort_names = {field.name for field, _ in sort_key}
+        (loading_names, is_defer) = queryset.query.deferred_loading
+        if is_defer and loading_names & sort_names:
+            queryset = queryset.defer(None).defer(*(loading_names - sort_names))
+        elif not is_defer and loading_names:
+            queryset = queryset.only(*loading_names, *sort_names)
+        ordering = [
+            # Flip the direction when going backward
+            f"{'-' if descending != backward else ''}{field.attname}"
+            for field, descending in sort_key
+        ]
+        queryset = queryset.order_by(*ordering)
+
+        # A filter that was split into branches (see ProblemQuerySet) is
+        # fetched as one page per branch, which are then merged. Each branch
+        # can walk its own index, rather than the DB sorting the whole OR
+        branches = getattr(queryset, "branches", None)
+        if branches:
+            (first_branch, *other_branches) = (
+                queryset.filter(branch)[: limit + 1] for branch in branches
+            )
+            queryset = first_branch.union(*other_branches, all=True).order_by(
+                *ordering
+            )
+
+        return list(queryset[: limit + 1])
+
+    @classmethod
+    def _slice_page(
+        cls,
+        nodes: Iterable[Model],
+        sort_key: SortKey,
+        after_values: Optional[list[Any]],
+        before_values: Optional[list[Any]],
+        backward: bool,
+        limit: int,
+    ) -> list[Any]:
+        """
+        Equivalent of `_fetch_page` for a list that's already been loaded
+        """
+        # All fields sort in the same direction, so we can just compare tuples
+        descending = sort_key[0][1]
+
+        def comes_after(obj: Model, values: list[Any]) -> bool:
+            key = tuple(getattr(obj, field.attname) for field, _ in sort_key)
+            return key < tuple(values) if descending else key > tuple(values)
+
+        def comes_before(obj: Model, values: list[Any]) -> bool:
+            key = tuple(getattr(obj, field.attname) for field, _ in sort_key)
+            return key > tuple(values) if descending else key < tuple(values)
+
+        items = [
+            node
+            for node in nodes
+            if (after_values is None or comes_after(node, after_values))
+            and (before_values is None or comes_before(node, before_values))
+        ]
+        if backward:
+            items.reverse()
+        return items[: limit + 1]
+
+
+def get_sort_key(queryset: QuerySet) -> SortKey:
+    """
+    Get the fields that a queryset is sorted by, with the primary key added
+    to break ties. Only plain fields on the model are supported, and they all
+    have to sort in the same direction so they can be compared as one row.
+    """
+    query = queryset.query
+    ordering = query.order_by or (
+        query.default_ordering and queryset.model._meta.ordering
+    )
+    meta = queryset.model._meta
+    sort_key: SortKey = []
+    for order in ordering or []:
+        if not isinstance(order, str):
+            raise TypeError(
+                f"Keyset pagination only supports ordering by field name,"
+                f" not {order!r}"
+            )
+        name = order.removeprefix("-")
+        field = meta.pk if name == "pk" else meta.get_field(name)
+        sort_key.append((field, order.startswith("-")))
+    if not any(field == meta.pk for field, _ in sort_key):
+        sort_key.append((meta.pk, bool(sort_key) and sort_key[-1][1]))
+    if len({descending for _, descending in sort_key}) > 1:
+        raise ValueError(
+            f"Keyset pagination requires all fields to sort in the same"
+            f" direction, but got {ordering}"
+        )
+    return sort_key
+
+
+def keyset_filter(
+    queryset: QuerySet, sort_key: SortKey, values: list[Any], after: bool
+) -> QuerySet:
+    """
+    Filter a queryset to rows that come after (or before) the given sort key
+    values. This is done as a single row comparison, e.g.
+    `(created_at, id) < (%s, %s)`, so it can be served by an index on those
+    columns.
+    """
+    descending = sort_key[0][1]
+    lookup = "gt" if after != descending else "lt"
+    return queryset.alias(
+        keyset=Func(
+            *(F(field.attname) for field, _ in sort_key),
+            function="ROW",
+            output_field=Field(),
+        )
+    ).filter(
+        **{
+            f"keyset__{lookup}": Func(
+                *(
+                    Value(value, output_field=field)
+                    for (field, _), value in zip(sort_key, values)
+                ),
+                function="ROW",
+                output_field=Field(),
+            )
+        }
+    )
+
+
+def encode_cursor(sort_key: SortKey, obj: Model) -> str:
+    """
+    Build a cursor from an object's sort key values
+    """
+    values = [
+        value.isoformat() if isinstance(value, date) else value
+        for value in (getattr(obj, field.attname) for field, _ in sort_key)
+    ]
+    data = f"{CURSOR_PREFIX}:{json.dumps(values)}"
+    return base64.b64encode(data.encode()).decode()
+
+
+def decode_cursor(sort_key: SortKey, cursor: str) -> list[Any]:
+    """
+    Parse sort key values from a cursor
+    """
+    try:
+        (prefix, data) = base64.b64decode(cursor).decode().split(":", 1)
+        values = json.loads(data)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+    if (
+        prefix != CURSOR_PREFIX
+        or not isinstance(values, list)
+        or len(values) != len(sort_key)
+    ):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return [
+        field.to_python(value) for (field, _), value in zip(sort_key, values)
+    ]
@@ -0,0 +1,241 @@
+import logging
+from typing import Any, Iterator, Optional, Union, cast
+
+from django.conf import settings
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLInt,
+    GraphQLNamedType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    SelectionSetNode,
+    get_named_type,
+    get_operation_ast,
+    is_leaf_type,
+    value_from_ast,
+)
+from graphql.type.definition import GraphQLFieldMap
+from strawberry.extensions import SchemaExtension
+
+logger = logging.getLogger(__name__)
+
+# Cost of resolving a field, keyed by "Type.field". Any field that isn't
+# listed here costs 1 if it returns an object, or 0 for a scalar. Fields that
+# are especially expensive, e.g. because of file processing, get a higher
+# weight.
+FIELD_WEIGHTS: dict[str, int] = {
+    "Mutation.createBoulderWithFriends": 20,
+    "Query.holdsNear": 5,
+}
+
+# Arguments that set the number of items that a list field returns. The cost
+# of everything selected within the list is multiplied by this.
+PAGE_SIZE_ARGUMENTS = ["first", "last", "limit"]
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Reject operations that are too expensive, before executing them. This
+    computes a static cost for the operation, which is roughly the number of
+    objects it could load: each object field costs 1 (or its weight from
+    `FIELD_WEIGHTS`), and the cost of everything within a paginated field is
+    multiplied by the page size. Operations deeper than
+    `GRAPHQL_MAX_QUERY_DEPTH`, or more expensive than
+    `GRAPHQL_MAX_QUERY_COST`, get an error. Introspection fields are free.
+
+    The cost depends on variables (e.g. `first: $count`), so unlike validation
+    rules, it can't be cached with the document.
+    """
+
+    def on_validate(self) -> Iterator[None]:
+        yield
+        execution_context = self.execution_context
+        # Let validation errors take priority. They also mean the document
+        # can't be trusted to match the schema
+        document = execution_context.graphql_document
+        if execution_context.errors or document is None:
+            return
+        operation = get_operation_ast(
+            document, execution_context.operation_name
+        )
+        if operation is None:
+            return
+
+        schema = execution_context.schema
+        calculator = CostCalculator(
+            schema=schema._schema,
+            fragments={
+                definition.name.value: definition
+                for definition in document.definitions
+                if isinstance(definition, FragmentDefinitionNode)
+            },
+            variables=execution_context.variables or {},
+            default_page_size=schema.config.relay_max_results,
+        )
+        root_type = schema._schema.get_root_type(operation.operation)
+        assert root_type
+        (cost, depth) = calculator.get_cost(
+            [operation.selection_set], root_type
+        )
+
+        name = operation.name.value if operation.name else "(anonymous)"
+        logger.info(
+            f"GraphQL {operation.operation.value} {name}:"
+            f" cost {cost}, depth {depth}"
+        )
+
+        error = None
+        if depth > settings.GRAPHQL_MAX_QUERY_DEPTH:
+            error = (
+                f"Query depth of {depth} exceeds the maximum of"
+                f" {settings.GRAPHQL_MAX_QUERY_DEPTH}"
+            )
+        elif cost > settings.GRAPHQL_MAX_QUERY_COST:
+            error = (
+                f"Query cost of {cost} exceeds the maximum of"
+                f" {settings.GRAPHQL_MAX_QUERY_COST}. Request fewer items or"
+                " fewer nested fields."
+            )
+        if error:
+            logger.warning(f"Rejected GraphQL operation {name}: {error}")
+            # Validation is already done by now, so setting errors wouldn't
+            # stop the operation. Setting the result skips execution instead
+            execution_context.result = ExecutionResult(
+                data=None, errors=[GraphQLError(error, nodes=[operation])]
+            )
+
+
+class CostCalculator:
+    """
+    Walk an operation to compute its cost and depth. See `QueryCostLimiter`
+    """
+
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        fragments: dict[str, FragmentDefinitionNode],
+        variables: dict[str, Any],
+        default_page_size: int,
+    ) -> None:
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+        self.default_page_size = default_page_size
+
+    def get_cost(
+        self,
+        selection_sets: list[SelectionSetNode],
+        parent_type: GraphQLNamedType,
+    ) -> tuple[int, int]:
+        """
+        Get the (cost, depth) of one or more selection sets on the same type.
+        Fields that are selected multiple times (e.g. by different fragments)
+        are merged, the same way they are during execution, so they're only
+        counted once.
+        """
+        fields: dict[tuple[str, str], list[FieldNode]] = {}
+        field_types: dict[str, GraphQLNamedType] = {}
+        for selection_set in selection_sets:
+            self.collect_fields(selection_set, parent_type, fields, field_types)
+
+        cost = 0
+        depth = 0
+        for (type_name, _), field_nodes in fields.items():
+            (field_cost, field_depth) = self.get_field_cost(
+                field_nodes, field_types[type_name]
+            )
+            # Fragments on different types of a union/interface are all
+            # counted, so this is an upper bound
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return (cost, depth)
+
+    def collect_fields(
+        self,
+        selection_set: SelectionSetNode,
+        parent_type: GraphQLNamedType,
+        fields: dict[tuple[str, str], list[FieldNode]],
+        field_types: dict[str, GraphQLNamedType],
+    ) -> None:
+        """
+        Group the fields in a selection set, including those from fragments,
+        by their parent type and response key
+        """
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                key = (selection.alias or selection.name).value
+                field_types[parent_type.name] = parent_type
+                fields.setdefault((parent_type.name, key), []).append(selection)
+                continue
+
+            if isinstance(selection, FragmentSpreadNode):
+                fragment: Union[
+                    FragmentDefinitionNode, InlineFragmentNode
+                ] = self.fragments[selection.name.value]
+            else:
+                fragment = cast(InlineFragmentNode, selection)
+            type_condition = fragment.type_condition
+            fragment_type = (
+                self.schema.get_type(type_condition.name.value)
+                if type_condition
+                else parent_type
+            )
+            assert fragment_type
+            self.collect_fields(
+                fragment.selection_set, fragment_type, fields, field_types
+            )
+
+    def get_field_cost(
+        self, field_nodes: list[FieldNode], parent_type: GraphQLNamedType
+    ) -> tuple[int, int]:
+        """
+        Get the (cost, depth) of a field, which may be selected by multiple
+        nodes
+        """
+        field = field_nodes[0]
+        name = field.name.value
+        if name.startswith("__"):
+            return (0, 0)
+        fields: GraphQLFieldMap = parent_type.fields  # type: ignore
+        field_definition = fields[name]
+        field_type = get_named_type(field_definition.type)
+        weight = FIELD_WEIGHTS.get(
+            f"{parent_type.name}.{name}", 0 if is_leaf_type(field_type) else 1
+        )
+        selection_sets = [
+            node.selection_set for node in field_nodes if node.selection_set
+        ]
+        if not selection_sets:
+            return (weight, 1)
+
+        (child_cost, child_depth) = self.get_cost(selection_sets, field_type)
+        page_size = self.get_page_size(field, field_definition.args)
+        return (weight + page_size * child_cost, child_depth + 1)
+
+    def get_page_size(self, field: FieldNode, argument_types: Any) -> int:
+        """
+        Get the max number of items that a field can return. This is 1 for
+        anything that isn't paginated. Values outside of [0, max page size]
+        are clamped, so a negative page size can't cancel out the cost of
+        other fields.
+        """
+        names = [name for name in PAGE_SIZE_ARGUMENTS if name in argument_types]
+        if not names:
+            return 1
+        for argument in field.arguments or []:
+            if argument.name.value in names:
+                value: Optional[int] = value_from_ast(
+                    argument.value, GraphQLInt, self.variables
+                )
+                if isinstance(value, int):
+                    return min(max(value, 0), self.default_page_size)
+        # Fall back to the argument's default, then the max page size
+        for name in names:
+            default = argument_types[name].default_value
+            if isinstance(default, int):
+                return default
+        return self.default_page_size
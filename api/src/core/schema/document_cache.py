@@ -0,0 +1,127 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from graphql import DocumentNode, GraphQLError
+from strawberry.extensions import SchemaExtension
+
+from .persisted import get_persisted_queries
+
+
+@dataclass
+class CachedDocument:
+    document: DocumentNode
+    # None until the document has been validated
+    errors: Optional[list[GraphQLError]] = None
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    # Number of cached documents, not including pinned ones
+    size: int
+    maxsize: int
+    pinned: int
+
+
+class DocumentLRU:
+    """
+    A bounded LRU cache of parsed documents (and their validation results),
+    keyed by a hash of the query text. Documents for persisted queries are
+    pinned, so they never get evicted by one-off queries and don't count
+    against the size limit. The set of persisted queries is fixed at build
+    time, so that can't grow without bound (in development the manifest can
+    be regenerated, but that's bounded by how often you edit the UI).
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._documents: OrderedDict[str, CachedDocument] = OrderedDict()
+        self._pinned: dict[str, CachedDocument] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(query: str) -> str:
+        return hashlib.sha256(query.encode()).hexdigest()
+
+    def get(self, query: str) -> Optional[CachedDocument]:
+        key = self.get_key(query)
+        with self._lock:
+            cached = self._pinned.get(key) or self._documents.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if key in self._documents:
+                    self._documents.move_to_end(key)
+            return cached
+
+    def add(self, query: str, cached: CachedDocument) -> None:
+        key = self.get_key(query)
+        with self._lock:
+            if query in get_persisted_queries().texts:
+                self._pinned[key] = cached
+                return
+            self._documents[key] = cached
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                size=len(self._documents),
+                maxsize=self.maxsize,
+                pinned=len(self._pinned),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._pinned.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+document_cache = DocumentLRU(maxsize=settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+class DocumentCache(SchemaExtension):
+    """
+    Skip parsing and validation for queries that have been seen before, by
+    keeping the results in a process-wide LRU cache (see `document_cache`).
+    Documents that fail to parse aren't cached.
+    """
+
+    cached: Optional[CachedDocument] = None
+
+    def on_parse(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        # Strawberry rejects requests without a query before parsing
+        query = execution_context.query or ""
+        self.cached = document_cache.get(query)
+        if self.cached is not None:
+            # Setting this skips parsing
+            execution_context.graphql_document = self.cached.document
+        yield
+        if self.cached is None and execution_context.graphql_document:
+            self.cached = CachedDocument(execution_context.graphql_document)
+            document_cache.add(query, self.cached)
+
+    def on_validate(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        cached = self.cached
+        if cached is not None and cached.errors is not None:
+            # Setting this skips validation. Copy so the cached list can't be
+            # modified by whoever handles the errors
+            execution_context.errors = list(cached.errors)
+        yield
+        if cached is not None and cached.errors is None:
+            cached.errors = list(execution_context.errors or [])
@@ -0,0 +1,266 @@
+import json
+import random
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from inspect import isawaitable
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from graphql import GraphQLResolveInfo
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionContext
+
+from .. import metrics
+from ..middleware import graphql_logger
+from ..timing import current_server_timing, measure
+from .persisted import get_persisted_queries
+
+# Only the slowest fields are logged, to keep log lines readable
+MAX_LOGGED_FIELDS = 10
+
+
+@dataclass
+class Timing:
+    """
+    Wall time and SQL queries for an operation, or one field within it
+    """
+
+    calls: int = 0
+    time: float = 0.0
+    sql_count: int = 0
+    sql_time: float = 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "time_ms": round(self.time * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_time_ms": round(self.sql_time * 1000, 2),
+        }
+
+
+@dataclass
+class OperationTimings:
+    operation: Timing = field(default_factory=Timing)
+    # Keyed by "Type.field"
+    fields: dict[str, Timing] = field(
+        default_factory=lambda: defaultdict(Timing)
+    )
+
+
+# Timings for the operation being executed, if it's sampled. These are context
+# variables, rather than attributes on the extension, so that queries from
+# resolvers in other threads (under an async view) and concurrent async
+# resolvers are attributed correctly.
+current_timings: ContextVar[Optional[OperationTimings]] = ContextVar(
+    "current_timings", default=None
+)
+current_field: ContextVar[Optional[str]] = ContextVar(
+    "current_field", default=None
+)
+
+
+class Instrumentation(SchemaExtension):
+    """
+    Record wall time, SQL query count and SQL time for a sample of operations
+    (`GRAPHQL_INSTRUMENTATION_SAMPLE_RATE`), in total and per field. Each
+    sampled operation is logged as one JSON line to `beta_spray.graphql`,
+    including its slowest fields.
+
+    Field times only cover the field's own resolver, not its children. SQL
+    queries are attributed to the innermost field whose resolver ran them.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        # Connections that are created later get the wrapper from
+        # connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        if random.random() >= settings.GRAPHQL_INSTRUMENTATION_SAMPLE_RATE:
+            yield
+            return
+
+        timings = OperationTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings.operation.calls = 1
+            timings.operation.time = time.perf_counter() - start
+            current_timings.reset(token)
+        self.log(timings)
+
+    def resolve(
+        self,
+        _next: Callable,
+        root: Any,
+        info: GraphQLResolveInfo,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        timings = current_timings.get()
+        if timings is None:
+            return _next(root, info, *args, **kwargs)
+
+        key = f"{info.parent_type.name}.{info.field_name}"
+        timing = timings.fields[key]
+        timing.calls += 1
+        token = current_field.set(key)
+        start = time.perf_counter()
+        try:
+            result = _next(root, info, *args, **kwargs)
+        finally:
+            timing.time += time.perf_counter() - start
+            current_field.reset(token)
+
+        if isawaitable(result):
+
+            async def time_result() -> Any:
+                # This runs in its own task, so the field can be set for
+                # anything that happens while it's awaited
+                current_field.set(key)
+                start = time.perf_counter()
+                try:
+                    return await result
+                finally:
+                    timing.time += time.perf_counter() - start
+
+            return time_result()
+        return result
+
+    def log(self, timings: OperationTimings) -> None:
+        execution_context = self.execution_context
+        result = execution_context.result
+        fields = sorted(
+            timings.fields.items(),
+            key=lambda item: item[1].time,
+            reverse=True,
+        )
+        record = {
+            "operation_name": execution_context.operation_name,
+            "operation_type": get_operation_type(execution_context),
+            "errors": bool(execution_context.errors)
+            or bool(result and result.errors),
+            **timings.operation.to_json(),
+            "fields": {
+                name: timing.to_json()
+                for name, timing in fields[:MAX_LOGGED_FIELDS]
+            },
+        }
+        graphql_logger.info(json.dumps(record))
+
+
+class OperationMetrics(SchemaExtension):
+    """
+    Record the latency and errors of every operation, for Prometheus (see
+    `core.metrics`)
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        execution_context = self.execution_context
+        # Operation names come from the client, so only trust the UI's
+        if (
+            execution_context.operation_name
+            and execution_context.query in get_persisted_queries().texts
+        ):
+            operation_name = execution_context.operation_name
+        else:
+            operation_name = "other"
+        labels = {
+            "operation_name": operation_name,
+            "operation_type": get_operation_type(execution_context)
+            or "invalid",
+        }
+        metrics.GRAPHQL_OPERATION_SECONDS.labels(**labels).observe(elapsed)
+        result = execution_context.result
+        if execution_context.errors or (result and result.errors):
+            metrics.GRAPHQL_ERRORS.labels(**labels).inc()
+
+
+class ServerTimingPhases(SchemaExtension):
+    """
+    Add the time spent in each phase of GraphQL execution to the
+    `Server-Timing` header (see `ServerTimingMiddleware`)
+    """
+
+    def on_parse(self) -> Iterator[None]:
+        with measure("parse"):
+            yield
+
+    def on_validate(self) -> Iterator[None]:
+        with measure("validate"):
+            yield
+
+    def on_execute(self) -> Iterator[None]:
+        with measure("execute"):
+            yield
+
+
+def get_operation_type(execution_context: ExecutionContext) -> Optional[str]:
+    if execution_context.graphql_document is None:
+        return None
+    try:
+        return execution_context.operation_type.value
+    except RuntimeError:
+        # Operation name doesn't match the document
+        return None
+
+
+def install_query_recorder(connection: BaseDatabaseWrapper) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def connection_on_create(
+    sender: Any, connection: BaseDatabaseWrapper, **kwargs: Any
+) -> None:
+    install_query_recorder(connection)
+
+
+def record_query(
+    execute: Callable,
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """
+    DB execute wrapper, which records metrics for each query, and adds it to
+    the timings of the current request, operation and field, if they're being
+    recorded
+    """
+    start = time.perf_counter()
+    metrics.DB_QUERIES_IN_FLIGHT.inc()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.DB_QUERIES_IN_FLIGHT.dec()
+        metrics.DB_QUERY_SECONDS.observe(elapsed)
+        server_timing = current_server_timing.get()
+        if server_timing is not None:
+            server_timing.add("db", elapsed)
+        timings = current_timings.get()
+        if timings is not None:
+            record_query_timing(timings, elapsed)
+
+
+def record_query_timing(timings: OperationTimings, elapsed: float) -> None:
+    timings.operation.sql_count += 1
+    timings.operation.sql_time += elapsed
+    field_name = current_field.get()
+    if field_name is not None:
+        timing = timings.fields[field_name]
+        timing.sql_count += 1
+        timing.sql_time += elapsed
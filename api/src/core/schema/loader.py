@@ -0,0 +1,158 @@
+from typing import Any, Iterable, TypeVar
+from weakref import WeakKeyDictionary
+
+from django.db.models import Model
+from strawberry import relay
+from strawberry.types import Info
+from strawberry_django.utils.typing import get_django_definition
+
+from ..models import Beta, BetaMove, Hold, Problem
+
+_M = TypeVar("_M", bound=Model)
+
+# Related objects to load along with each type of node. This should cover
+# everything that mutations and permission checks access on the loaded object,
+# so nothing has to be lazy-loaded later
+SELECT_RELATED: dict[type[Model], list[str]] = {
+    Problem: ["boulder"],
+    Hold: ["problem__boulder"],
+    Beta: ["problem__boulder"],
+    BetaMove: ["beta__problem__boulder"],
+}
+
+# The current loader for each request, along with the root field it belongs
+# to. Weak keys so loaders die with their requests
+_loaders: "WeakKeyDictionary[Any, tuple[str, NodeLoader]]" = WeakKeyDictionary()
+
+
+class NodeLoader:
+    """
+    A request-scoped identity map of model instances. Nodes are loaded by
+    global ID, along with the related objects that mutations and permission
+    checks need (see `SELECT_RELATED`), and each object is only loaded once
+    per root field. Related objects are shared between instances, so e.g. a
+    hold and a beta on the same problem point to the same `Problem` instance,
+    and a permission check on either one doesn't need another query.
+
+    Each root field (i.e. each mutation in a document) gets its own loader,
+    since an earlier mutation may have changed or deleted objects that it
+    loaded. Use `NodeLoader.from_info` to get the loader for the current field.
+    """
+
+    def __init__(self) -> None:
+        self._objects: dict[tuple[type[Model], Any], Model] = {}
+
+    @classmethod
+    def from_info(cls, info: Info) -> "NodeLoader":
+        """
+        Get the loader for the current root field, creating it if necessary.
+        Mutation fields are executed one at a time, so only the latest loader
+        has to be kept.
+        """
+        request = info.context.request
+        path = info.path
+        while path.prev is not None:
+            path = path.prev
+        root_field = str(path.key)
+        current = _loaders.get(request)
+        if current is None or current[0] != root_field:
+            current = _loaders[request] = (root_field, cls())
+        return current[1]
+
+    @classmethod
+    def clear(cls, request: Any) -> None:
+        """
+        Drop the loader for a request, so everything is re-fetched the next
+        time it's needed. Operations in a batch share a request, but one of
+        them may change or delete objects that an earlier one loaded.
+        """
+        _loaders.pop(request, None)
+
+    def load(
+        self, info: Info, global_id: relay.GlobalID, ensure_type: type[_M]
+    ) -> _M:
+        """
+        Load a single node of the given model type. Raises `DoesNotExist` if
+        the node doesn't exist, or `TypeError` if the ID is for a different
+        type of node.
+        """
+        (obj,) = self.load_many(info, [global_id], ensure_type)
+        return obj
+
+    def load_many(
+        self,
+        info: Info,
+        global_ids: Iterable[relay.GlobalID],
+        ensure_type: type[_M],
+    ) -> list[_M]:
+        """
+        Load multiple nodes of the same model type, in the given order. Any
+        that haven't already been loaded are fetched in a single query.
+        """
+        global_ids = list(global_ids)
+        node_types = {global_id.resolve_type(info) for global_id in global_ids}
+        for node_type in node_types:
+            model = get_django_definition(node_type, strict=True).model
+            if not issubclass(model, ensure_type):
+                raise TypeError(
+                    f"Cannot resolve. GlobalID requires {ensure_type.__name__},"
+                    f" received {model.__name__}. Verify that the supplied ID"
+                    " is intended for this Query/Mutation"
+                )
+
+        pk_field = ensure_type._meta.pk
+        pks = [
+            pk_field.to_python(global_id.node_id) for global_id in global_ids
+        ]
+        missing_pks = {
+            pk for pk in pks if (ensure_type, pk) not in self._objects
+        }
+        if missing_pks:
+            queryset = ensure_type._default_manager.filter(
+                pk__in=missing_pks
+            ).select_related(*SELECT_RELATED.get(ensure_type, []))
+            # Apply the same customizations that the node type uses
+            for node_type in node_types:
+                get_queryset = getattr(node_type, "get_queryset", None)
+                if get_queryset:
+                    queryset = get_queryset(queryset, info)
+            for obj in queryset:
+                self.add(obj)
+
+        try:
+            objects = [self._objects[(ensure_type, pk)] for pk in pks]
+        except KeyError:
+            raise ensure_type.DoesNotExist(  # type: ignore[attr-defined]
+                f"{ensure_type.__name__} matching query does not exist."
+            )
+        return objects  # type: ignore[return-value]
+
+    def add(self, obj: _M) -> _M:
+        """
+        Add an object to the identity map, replacing any previous copy of it.
+        Related objects that are cached on it (e.g. from `select_related`)
+        are swapped for the copies already in the map, or added if they aren't
+        in it yet. Relations that *aren't* cached are filled in from the map
+        when possible. Use this on objects returned from mutations, so any
+        follow-up permission checks don't re-fetch their parents.
+        """
+        self._objects[(type(obj), obj.pk)] = obj
+        for field in obj._meta.concrete_fields:
+            if not field.many_to_one:
+                continue
+            if field.is_cached(obj):
+                related = field.get_cached_value(obj)
+                if related is None:
+                    continue
+                existing = self._objects.get((type(related), related.pk))
+                if existing is None:
+                    self.add(related)
+                else:
+                    field.set_cached_value(obj, existing)
+            else:
+                existing = self._objects.get(
+                    (field.related_model, getattr(obj, field.attname))
+                )
+                if existing is not None:
+                    field.set_cached_value(obj, existing)
+        return obj
@@ -5,6 +5,7 @@ import strawberry
 import strawberry.django
 from django.contrib.auth import logout
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
 from django.forms import ValidationError
 from strawberry import relay
 from strawberry.field_extensions import InputMutationExtension
@@ -13,7 +14,9 @@ from strawberry_django import mutations
 from strawberry_django.mutations import resolvers
 from strawberry_django.permissions import HasRetvalPerm
 
-from .. import util
+from .. import metrics, util
+from ..atomic import atomic_resolver
+from ..cache import get_problem_tag, invalidate_tags
 from ..directives import CreateGuestUser
 from ..fields import BoulderPosition
 from ..models import (
@@ -27,12 +30,13 @@ from ..models import (
     Visibility,
 )
 from ..permissions import PermissionType, permission
+from .loader import NodeLoader
 from .query import (
     BetaMoveNode,
     BetaNode,
     HoldNode,
-    Image,
     ProblemNode,
+    SVGPositionInput,
     UserNode,
 )
 
@@ -47,20 +51,6 @@ ImageUpload = strawberry.scalar(
 )
 
 
-@strawberry.input
-class SVGPositionInput:
-    x: float = strawberry.field(description="X position, 0-100ish")
-    y: float = strawberry.field(description="Y position, 0-100ish")
-
-    def to_normalized(self, image: Image) -> BoulderPosition:
-        """
-        Normalize a position, such that the x/y values are both [0,1] rather
-        than based on the SVG dimensions.
-        """
-        (svg_width, svg_height) = util.get_svg_dimensions(image)
-        return BoulderPosition(self.x / svg_width, self.y / svg_height)
-
-
 @strawberry.django.partial(User)
 class UpdateUserInput(strawberry.django.NodeInput):
     id: relay.GlobalID
@@ -88,6 +78,7 @@ class UpdateBetaInput(strawberry.django.NodeInput):
 @strawberry.type
 class Mutation:
     @strawberry.mutation
+    @atomic_resolver
     def log_out(self, info: Info) -> None:
         """
         Log out the current user (if any)
@@ -102,6 +93,7 @@ class Mutation:
     @strawberry.mutation(
         extensions=[InputMutationExtension(), CreateGuestUser()]
     )
+    @atomic_resolver
     def create_boulder_with_friends(
         self,
         info: Info,
@@ -116,6 +108,7 @@ class Mutation:
         Returns the created beta, which can be used to grab the created problem
         and boulder as well (via nested objects).
         """
+        metrics.UPLOAD_BYTES.observe(image.size)
         # A nice big party!
         boulder = resolvers.create(
             # The `name` field isn't used yet, but it needs a placeholder value
@@ -149,6 +142,7 @@ class Mutation:
             HasRetvalPerm(permission(Hold, PermissionType.CREATE)),
         ],
     )
+    @atomic_resolver
     def create_hold(
         self,
         info: Info,
@@ -171,14 +165,12 @@ class Mutation:
         a hold just on a boulder, because there's no use case for that yet.
         """
         # Resolve input to a django object
-        problem_dj: Problem = problem.resolve_node_sync(
-            info, ensure_type=Problem
-        )
+        problem_dj = NodeLoader.from_info(info).load(info, problem, Problem)
 
         normal_position: BoulderPosition
         if position:
             # Convert SVG position to normalized position
-            normal_position = position.to_normalized(problem_dj.boulder.image)
+            normal_position = position.to_normalized(problem_dj.boulder)
             source = HoldAnnotationSource.USER
         else:
             # Pick a random position on the image. # Bias toward the middle,
@@ -189,24 +181,86 @@ class Mutation:
             source = HoldAnnotationSource.AUTO
 
         # Create the hold, then link it to the problem
-        hold_dj = resolvers.create(
-            info,
-            Hold,
-            {
-                "problem": problem_dj,
-                "position": normal_position,
-                "source": source,
-            },
+        hold_dj = NodeLoader.from_info(info).add(
+            resolvers.create(
+                info,
+                Hold,
+                {
+                    "problem": problem_dj,
+                    "position": normal_position,
+                    "source": source,
+                },
+            )
         )
 
         return hold_dj
 
+    @strawberry.mutation(extensions=[InputMutationExtension()])
+    @atomic_resolver
+    def create_holds(
+        self,
+        info: Info,
+        problem: Annotated[
+            relay.GlobalID,
+            strawberry.argument(
+                description="The ID of the problem to add the holds to."
+            ),
+        ],
+        positions: Annotated[
+            list[SVGPositionInput],
+            strawberry.argument(
+                description="Position of each hold within the boulder image"
+            ),
+        ],
+        # Django's choices enums confuse mypy, hence the ignore below
+        source: Annotated[
+            HoldAnnotationSource,
+            strawberry.argument(
+                description="Where the holds came from. Use AUTO for"
+                " machine-generated holds."
+            ),
+        ] = HoldAnnotationSource.USER,  # type: ignore[assignment]
+    ) -> list[HoldNode]:
+        """
+        Create many holds on a problem at once. This is much cheaper than
+        calling createHold repeatedly, e.g. when importing or auto-detecting
+        holds for a whole wall.
+        """
+        problem_dj = NodeLoader.from_info(info).load(info, problem, Problem)
+        boulder = problem_dj.boulder
+
+        holds = [
+            Hold(
+                problem=problem_dj,
+                position=position.to_normalized(boulder),
+                source=source,
+            )
+            for position in positions
+        ]
+
+        # All the holds belong to the same problem, so the permission check is
+        # the same for each one. Check it once up front instead of per hold.
+        if not info.context.request.user.has_perm(
+            permission(Hold, PermissionType.CREATE), Hold(problem=problem_dj)
+        ):
+            raise PermissionDenied(
+                "You don't have permission to add holds to this problem"
+            )
+
+        for hold in holds:
+            # Problem is already known to exist, skip the extra query
+            hold.full_clean(exclude=["problem"])
+        # Bulk creation doesn't trigger signals
+        invalidate_tags(get_problem_tag(problem_dj.id))
+        return Hold.objects.bulk_create(holds)
+
     @strawberry.mutation(
         extensions=[
             InputMutationExtension(),
             HasRetvalPerm(permission(Hold, PermissionType.EDIT)),
         ],
     )
+    @atomic_resolver
     def update_hold(
         self,
         info: Info,
@@ -214,18 +268,21 @@ class Mutation:
         position: Optional[SVGPositionInput],
         annotation: Optional[str],
     ) -> HoldNode:
-        hold: Hold = id.resolve_node_sync(info, ensure_type=Hold)
+        loader = NodeLoader.from_info(info)
+        hold = loader.load(info, id, Hold)
         # Convert position from SVG coords to normalized (DB) coords
         normal_position = position and position.to_normalized(
-            hold.problem.boulder.image
+            hold.problem.boulder
         )
-        return resolvers.update(
-            info,
-            hold,
-            {
-                "position": normal_position,
-                "annotation": annotation,
-            },
+        return loader.add(
+            resolvers.update(
+                info,
+                hold,
+                {
+                    "position": normal_position,
+                    "annotation": annotation,
+                },
+            )
         )
 
     delete_hold: HoldNode = mutations.delete(
@@ -245,14 +302,24 @@ class Mutation:
     @strawberry.mutation(
         extensions=[InputMutationExtension(), CreateGuestUser()]
     )
-    def copy_problem(self, info: Info, id: relay.GlobalID) -> ProblemNode:
+    @atomic_resolver
+    def copy_problem(
+        self,
+        info: Info,
+        id: relay.GlobalID,
+        deep: Annotated[
+            bool,
+            strawberry.argument(
+                description="Also copy all betas (and their moves) on the"
+                " problem. Copied betas are owned by the current user."
+            ),
+        ] = False,
+    ) -> ProblemNode:
         """
         Copy a problem. A new problem will be created with the same boulder
-        and holds as the original.
+        and holds as the original, and optionally the same betas.
         """
-        original_problem: Problem = id.resolve_node_sync(
-            info, ensure_type=Problem
-        )
+        original_problem = NodeLoader.from_info(info).load(info, id, Problem)
         # Copy the base problem. We'll point the new problem to the same
         # boulder, so we get the same image.
         new_problem = resolvers.create(
@@ -265,35 +332,37 @@ class Mutation:
             },
         )
 
-        # Copy each hold in one big INSERT
-        new_holds = list(original_problem.holds.all())
-        for hold in new_holds:
-            hold.id = None  # This forces django to create a new move
-            hold.problem_id = new_problem.id
-        Hold.objects.bulk_create(new_holds)
+        # Copy holds (and betas) in the DB, without loading them into Python
+        Problem.copy_contents(
+            original_problem.id,
+            new_problem.id,
+            beta_owner_id=info.context.request.user.id if deep else None,
+        )
 
         return new_problem
 
     @strawberry.mutation(
         extensions=[InputMutationExtension(), CreateGuestUser()]
     )
+    @atomic_resolver
     def create_beta(
         self,
         info: Info,
         problem: relay.GlobalID,
         name: Optional[str],
     ) -> BetaNode:
-        problem_dj: Problem = problem.resolve_node_sync(
-            info, ensure_type=Problem
-        )
-        return resolvers.create(
-            info,
-            Beta,
-            {
-                "problem": problem_dj,
-                "owner": info.context.request.user,
-                "name": name,
-            },
+        loader = NodeLoader.from_info(info)
+        problem_dj = loader.load(info, problem, Problem)
+        return loader.add(
+            resolvers.create(
+                info,
+                Beta,
+                {
+                    "problem": problem_dj,
+                    "owner": info.context.request.user,
+                    "name": name,
+                },
+            )
         )
 
     update_beta: BetaNode = mutations.update(
@@ -308,8 +377,9 @@ class Mutation:
     @strawberry.mutation(
         extensions=[InputMutationExtension(), CreateGuestUser()]
     )
+    @atomic_resolver
     def copy_beta(self, info: Info, id: relay.GlobalID) -> BetaNode:
-        original_beta = id.resolve_node_sync(info, ensure_type=Beta)
+        original_beta = NodeLoader.from_info(info).load(info, id, Beta)
         # Copy the base beta
         new_beta = resolvers.create(
             info,
@@ -321,12 +391,8 @@ class Mutation:
             },
         )
 
-        # Copy each move in one big INSERT
-        new_moves = list(original_beta.moves.all())
-        for move in new_moves:
-            move.id = None  # This forces django to create a new move
-            move.beta_id = new_beta.id
-        BetaMove.objects.bulk_create(new_moves)
+        # Copy moves in the DB, without loading them into Python
+        Beta.copy_moves(original_beta.id, new_beta.id)
 
         return new_beta
 
@@ -336,6 +402,7 @@ class Mutation:
             HasRetvalPerm(permission(BetaMove, PermissionType.CREATE)),
         ],
     )
+    @atomic_resolver
     def create_beta_move(
         self,
         info: Info,
@@ -357,15 +424,16 @@ class Mutation:
         """
 
         # Convert GQL IDs to PKs
-        beta_dj: Beta = beta.resolve_node_sync(info, ensure_type=Beta)
-        hold_dj = hold and (hold.resolve_node_sync(info, ensure_type=Hold))
-        previous_beta_move_dj = previous_beta_move and (
-            previous_beta_move.resolve_node_sync(info, ensure_type=BetaMove)
+        loader = NodeLoader.from_info(info)
+        beta_dj = loader.load(info, beta, Beta)
+        hold_dj = hold and loader.load(info, hold, Hold)
+        previous_beta_move_dj = previous_beta_move and loader.load(
+            info, previous_beta_move, BetaMove
         )
 
         # Convert position from SVG coords to normalized [0,1]
         normal_position = position and position.to_normalized(
-            beta_dj.problem.boulder.image
+            beta_dj.problem.boulder
         )
 
         # ===== Validation =====
@@ -385,21 +453,28 @@ class Mutation:
                 "Exactly one of hold or position must be given"
             )
 
-        return resolvers.create(
-            info,
-            BetaMove,
-            {
-                "beta": beta_dj,
-                "hold": hold_dj,
-                "body_part": body_part,
-                "order": previous_beta_move_dj
-                and previous_beta_move_dj.order + 1,
-                "position": normal_position,
-            },
-            # By default, Django will enforce beta+order uniqueness, but we want
-            # to disable this to allow for mid-beta inserts. A pre-save trigger
-            # will take care of sliding orders around to keep them compliant
-            full_clean={"exclude": ["beta"]},
+        return loader.add(
+            resolvers.create(
+                info,
+                BetaMove,
+                {
+                    "beta": beta_dj,
+                    "hold": hold_dj,
+                    "body_part": body_part,
+                    # If not inserting, the order is populated by a pre-save
+                    # hook to append to the end
+                    "order": previous_beta_move_dj
+                    and Beta.get_move_order(
+                        beta_dj.id, previous_beta_move_dj.get_dense_order() + 1
+                    ),
+                    "position": normal_position,
+                },
+                # Skip beta+order uniqueness validation. The order is always
+                # picked to be unique, but when appending it's a subquery
+                # expression that can't be validated in Python. The hold was
+                # already loaded above, so we know it exists.
+                full_clean={"exclude": ["beta", "hold"]},
+            )
         )
 
     @strawberry.mutation(
@@ -408,6 +483,7 @@ class Mutation:
             HasRetvalPerm(permission(BetaMove, PermissionType.EDIT)),
         ],
     )
+    @atomic_resolver
     def update_beta_move(
         self,
         info: Info,
@@ -417,12 +493,11 @@ class Mutation:
         position: Optional[SVGPositionInput],
         annotation: Optional[str],
     ) -> BetaMoveNode:
-        beta_move_dj: BetaMove = id.resolve_node_sync(
-            info, ensure_type=BetaMove
-        )
-        hold_dj = hold and (hold.resolve_node_sync(info, ensure_type=Hold))
+        loader = NodeLoader.from_info(info)
+        beta_move_dj = loader.load(info, id, BetaMove)
+        hold_dj = hold and loader.load(info, hold, Hold)
         normal_position = position and position.to_normalized(
-            beta_move_dj.beta.problem.boulder.image
+            beta_move_dj.beta.problem.boulder
         )
 
         # Because these fields are mutually exclusive, if one of them is passed
@@ -435,20 +510,73 @@ class Mutation:
         elif normal_position:
             hold_dj = None
 
-        return resolvers.update(
-            info,
-            beta_move_dj,
-            {
-                "order": order,
-                "hold": hold_dj,
-                "position": normal_position,
-                "annotation": annotation,
-            },
-            # By default, Django will enforce beta+order uniqueness, but we want
-            # to disable this to allow for reordering moves. A pre-save trigger
-            # will take care of sliding orders around to keep them compliant
-            full_clean={"exclude": ["beta"]},
+        return loader.add(
+            resolvers.update(
+                info,
+                beta_move_dj,
+                {
+                    # The API takes a dense position, which we have to map to a
+                    # sparse order. This only ever modifies the one move
+                    # (except in the rare case that the beta needs to be
+                    # rebalanced)
+                    "order": order
+                    and Beta.get_move_order(
+                        beta_move_dj.beta_id, order, exclude_id=beta_move_dj.id
+                    ),
+                    "hold": hold_dj,
+                    "position": normal_position,
+                    "annotation": annotation,
+                },
+                # Skip beta+order uniqueness validation. The new order is
+                # picked to be unique already, so this would just be an extra
+                # query. Same for the hold, which was loaded above.
+                full_clean={"exclude": ["beta", "hold"]},
+            )
+        )
+
+    @strawberry.mutation(
+        extensions=[
+            InputMutationExtension(),
+            HasRetvalPerm(permission(Beta, PermissionType.EDIT)),
+        ],
+    )
+    @atomic_resolver
+    def reorder_beta_moves(
+        self,
+        info: Info,
+        beta: relay.GlobalID,
+        move_ids: Annotated[
+            list[relay.GlobalID],
+            strawberry.argument(
+                description="Every move in the beta, in the desired order"
+            ),
+        ],
+    ) -> BetaNode:
+        """
+        Set the order of every move in a beta at once. This is much cheaper
+        than moving one move at a time via updateBetaMove.
+        """
+        beta_dj = NodeLoader.from_info(info).load(info, beta, Beta)
+        # The reorder is written straight to the DB, so the permission has to
+        # be checked before that, rather than on the returned beta
+        if not info.context.request.user.has_perm(
+            permission(Beta, PermissionType.EDIT), beta_dj
+        ):
+            raise PermissionDenied(
+                "You don't have permission to reorder moves in this beta"
+            )
+        # Grab the PKs directly instead of resolving each node, which would
+        # be a query per move. The model validates that they all belong to
+        # the beta.
+        move_type_name = BetaMoveNode.__name__
+        if any(move_id.type_name != move_type_name for move_id in move_ids):
+            raise ValidationError(f"Move IDs must be of type {move_type_name}")
+        Beta.reorder_moves(
+            beta_dj.id, [int(move_id.node_id) for move_id in move_ids]
         )
+        # Bulk updates don't trigger signals
+        invalidate_tags(get_problem_tag(beta_dj.problem_id))
+        return beta_dj
 
     delete_beta_move: BetaMoveNode = mutations.delete(
         strawberry.django.NodeInput,
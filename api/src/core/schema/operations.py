@@ -0,0 +1,271 @@
+import re
+from pathlib import Path
+from typing import Any, Optional
+
+from graphql import (
+    REMOVE,
+    DefinitionNode,
+    DirectiveNode,
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLInputType,
+    GraphQLSchema,
+    NameNode,
+    OperationDefinitionNode,
+    OperationType,
+    SelectionSetNode,
+    StringValueNode,
+    TypeInfo,
+    TypeInfoVisitor,
+    VariableDefinitionNode,
+    VariableNode,
+    Visitor,
+    parse,
+    parse_type,
+    print_ast,
+    visit,
+)
+
+# Matches the body of each graphql`...` tag in the UI source
+GRAPHQL_TAG_REGEX = re.compile(r"\bgraphql`(.*?)`", re.DOTALL)
+# Matches the docblock of each client-side Relay resolver, and the tags in it
+RELAY_RESOLVER_REGEX = re.compile(r"@RelayResolver\b(.*?)\*/", re.DOTALL)
+RESOLVER_TAG_REGEX = re.compile(r"@(\w+) (\w+)")
+
+
+def load_ui_operations(ui_src: Path, schema: GraphQLSchema) -> dict[str, str]:
+    """
+    Extract every GraphQL operation that the UI can send from the `graphql`
+    tags in its source, mapped by operation name to a standalone query with
+    all the fragments it uses. This approximates what the Relay compiler
+    generates, so the UI's operations can be used without running it:
+
+    - Relay-only directives and fields are removed, and fields from
+      client-side resolvers are replaced with the fields they read
+    - A query is generated for each `@refetchable` fragment
+    - Variable definitions are added for variables that fragments use
+      implicitly, and removed if nothing uses them anymore
+    """
+    definitions: list[DefinitionNode] = []
+    resolver_fragments: dict[tuple[str, str], str] = {}
+    for path in sorted(ui_src.rglob("*.ts*")):
+        source = path.read_text()
+        for match in GRAPHQL_TAG_REGEX.finditer(source):
+            definitions.extend(parse(match.group(1)).definitions)
+        for match in RELAY_RESOLVER_REGEX.finditer(source):
+            tags = dict(RESOLVER_TAG_REGEX.findall(match.group(1)))
+            resolver_fragments[(tags["onType"], tags["fieldName"])] = tags[
+                "rootFragment"
+            ]
+
+    # Refetch queries have to be generated before Relay directives are removed
+    definitions.extend(
+        filter(None, map(get_refetch_query, definitions))  # type: ignore
+    )
+    type_info = TypeInfo(schema)
+    document = visit(
+        DocumentNode(definitions=definitions),
+        TypeInfoVisitor(
+            type_info,
+            RelayTransformVisitor(schema, type_info, resolver_fragments),
+        ),
+    )
+
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    ui_operations = {}
+    for operation in document.definitions:
+        if not isinstance(operation, OperationDefinitionNode):
+            continue
+        fragment_names = sorted(get_fragment_names(operation, fragments))
+        operation_document = fix_variable_definitions(
+            DocumentNode(
+                definitions=[
+                    operation,
+                    *(fragments[name] for name in fragment_names),
+                ]
+            ),
+            schema,
+        )
+        name = operation.name.value  # type: ignore[union-attr]
+        ui_operations[name] = print_ast(operation_document)
+    return ui_operations
+
+
+def get_refetch_query(
+    definition: DefinitionNode,
+) -> Optional[OperationDefinitionNode]:
+    """
+    Build the query that Relay generates for a `@refetchable` fragment on the
+    root query type. Returns `None` for any other definition.
+    """
+    if not isinstance(definition, FragmentDefinitionNode):
+        return None
+    fragment = definition
+    for directive in fragment.directives or []:
+        if directive.name.value != "refetchable":
+            continue
+        if fragment.type_condition.name.value != "Query":
+            raise ValueError(
+                "Only @refetchable fragments on Query are supported, but"
+                f" {fragment.name.value} is on"
+                f" {fragment.type_condition.name.value}"
+            )
+        (query_name,) = (
+            argument.value.value
+            for argument in directive.arguments or []
+            if argument.name.value == "queryName"
+            and isinstance(argument.value, StringValueNode)
+        )
+        return OperationDefinitionNode(
+            operation=OperationType.QUERY,
+            name=NameNode(value=query_name),
+            variable_definitions=(),
+            directives=(),
+            selection_set=SelectionSetNode(
+                selections=(
+                    FragmentSpreadNode(name=fragment.name, directives=()),
+                )
+            ),
+        )
+    return None
+
+
+def get_fragment_names(
+    node: Any, fragments: dict[str, FragmentDefinitionNode]
+) -> set[str]:
+    """
+    Get the names of all fragments that a node uses, transitively
+    """
+    names: set[str] = set()
+
+    class SpreadVisitor(Visitor):
+        def enter_fragment_spread(
+            self, node: FragmentSpreadNode, *args: Any
+        ) -> None:
+            name = node.name.value
+            if name not in names:
+                names.add(name)
+                visit(fragments[name], self)
+
+    visit(node, SpreadVisitor())
+    return names
+
+
+class RelayTransformVisitor(Visitor):
+    """
+    Convert Relay's extensions to plain GraphQL, the way the Relay compiler
+    does before sending a query:
+
+    - Remove directives that aren't defined in the schema
+    - Replace the client-only `__id` field with `__typename`, so selections
+      that only contained it stay valid
+    - Replace fields that are computed by client-side resolvers with the
+      resolver's root fragment
+    """
+
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        type_info: TypeInfo,
+        resolver_fragments: dict[tuple[str, str], str],
+    ) -> None:
+        super().__init__()
+        self.directive_names = {
+            directive.name for directive in schema.directives
+        }
+        self.type_info = type_info
+        self.resolver_fragments = resolver_fragments
+
+    def enter_directive(self, node: DirectiveNode, *args: Any) -> Any:
+        if node.name.value not in self.directive_names:
+            return REMOVE
+        return None
+
+    def enter_field(self, node: FieldNode, *args: Any) -> Any:
+        if node.name.value == "__id":
+            return FieldNode(name=NameNode(value="__typename"), directives=())
+        parent_type = self.type_info.get_parent_type()
+        fragment_name = parent_type and self.resolver_fragments.get(
+            (parent_type.name, node.name.value)
+        )
+        if fragment_name:
+            return FragmentSpreadNode(
+                name=NameNode(value=fragment_name), directives=()
+            )
+        return None
+
+
+def fix_variable_definitions(
+    document: DocumentNode, schema: GraphQLSchema
+) -> DocumentNode:
+    """
+    Make the operation in a document declare exactly the variables that it
+    and its fragments use. Existing definitions are kept as-is. Missing ones
+    are declared with the type of the argument they're passed to.
+    """
+    (operation, *fragments) = document.definitions
+    assert isinstance(operation, OperationDefinitionNode)
+    # Visit without the existing definitions, so only usages are found
+    type_info = TypeInfo(schema)
+    usages: dict[str, Optional[GraphQLInputType]] = {}
+
+    class UsageVisitor(Visitor):
+        def enter_variable(self, node: VariableNode, *args: Any) -> None:
+            usages.setdefault(node.name.value, type_info.get_input_type())
+
+    visit(
+        DocumentNode(
+            definitions=[
+                OperationDefinitionNode(
+                    operation=operation.operation,
+                    name=operation.name,
+                    variable_definitions=(),
+                    directives=operation.directives,
+                    selection_set=operation.selection_set,
+                ),
+                *fragments,
+            ]
+        ),
+        TypeInfoVisitor(type_info, UsageVisitor()),
+    )
+
+    existing = {
+        definition.variable.name.value: definition
+        for definition in operation.variable_definitions or []
+    }
+    variable_definitions = [
+        definition for name, definition in existing.items() if name in usages
+    ]
+    for name, input_type in usages.items():
+        if name in existing:
+            continue
+        if input_type is None:
+            raise ValueError(
+                f"Cannot determine type of variable ${name} in"
+                f" {operation.name.value if operation.name else 'operation'}"
+            )
+        variable_definitions.append(
+            VariableDefinitionNode(
+                variable=VariableNode(name=NameNode(value=name)),
+                type=parse_type(str(input_type)),
+                directives=(),
+            )
+        )
+    return DocumentNode(
+        definitions=[
+            OperationDefinitionNode(
+                operation=operation.operation,
+                name=operation.name,
+                variable_definitions=tuple(variable_definitions),
+                directives=operation.directives,
+                selection_set=operation.selection_set,
+            ),
+            *fragments,
+        ]
+    )
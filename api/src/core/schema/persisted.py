@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PersistedQueries(NamedTuple):
+    # ID (hash) => query text
+    queries: dict[str, str]
+    # All query texts in the manifest, for quick lookup
+    texts: frozenset[str]
+
+
+def get_persisted_queries() -> PersistedQueries:
+    """
+    Load the manifest of persisted queries, which is generated by the Relay
+    compiler from the operations in the UI. The parsed manifest is cached, and
+    only reloaded when the file is modified. In production the manifest is
+    baked into the image, but in development the Relay compiler rewrites it
+    whenever a UI operation changes, and we need to pick up the new IDs.
+    """
+    path = settings.GRAPHQL_PERSISTED_QUERIES_PATH
+    try:
+        mtime: Optional[int] = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    return _load_persisted_queries(Path(path), mtime)
+
+
+@lru_cache(maxsize=1)
+def _load_persisted_queries(
+    path: Path, mtime: Optional[int]
+) -> PersistedQueries:
+    # mtime is only included to bust the cache
+    try:
+        with open(path) as f:
+            queries: dict[str, str] = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Persisted query manifest {path} does not exist")
+        queries = {}
+    return PersistedQueries(queries=queries, texts=frozenset(queries.values()))
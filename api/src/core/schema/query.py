@@ -1,14 +1,15 @@
-from typing import Annotated, Iterable, Optional
+from typing import Annotated, Any, Iterable, Optional
+from weakref import WeakKeyDictionary
 
 import strawberry
 from django.contrib.auth.models import User
-from django.db.models import Model, Q
-from django.db.models.fields.files import ImageFieldFile
+from django.db.models import Model, Prefetch, Q, QuerySet
 from strawberry import UNSET, relay
 from strawberry.types import Info
+from strawberry_django.optimizer import optimizer
+from strawberry_django.resolvers import django_resolver
 from typing_extensions import Self
 
-from .. import util
 from ..fields import BoulderPosition
 from ..models import (
     Beta,
@@ -20,6 +21,8 @@ from ..models import (
     Visibility,
 )
 from ..permissions import PermissionType, permission
+from ..timing import measure
+from .connection import KeysetConnection
 
 
 @strawberry.type
@@ -34,17 +37,44 @@ class Permissions:
     )
 
 
+# Computed permissions for each request, keyed by model+PK. Weak keys so the
+# cache dies with its request
+_PermissionsCache = dict[tuple[type[Model], Any], Permissions]
+_permissions_cache: "WeakKeyDictionary[Any, _PermissionsCache]" = (
+    WeakKeyDictionary()
+)
+
+
+def clear_permissions_cache(request: Any) -> None:
+    """
+    Drop the permissions computed for a request (see `NodeLoader.clear`)
+    """
+    _permissions_cache.pop(request, None)
+
+
+# Permission rules can load related objects, so they can't run in an async
+# context directly
+@django_resolver(qs_hook=None)
 def get_permissions(self: Model, info: Info) -> Permissions:
     """
     Permissions for the requesting user (you) on the parent object.
     Attempting any mutation that you don't have permission for will result
     in an error.
     """
-    user = info.context.request.user
-    return Permissions(
-        can_edit=user.has_perm(permission(self, PermissionType.EDIT), self),
-        can_delete=user.has_perm(permission(self, PermissionType.DELETE), self),
-    )
+    request = info.context.request
+    cache = _permissions_cache.setdefault(request, {})
+    # The same object can appear multiple times in one response (e.g. a hold
+    # that's also the target of a move), so only compute each one once
+    key = (type(self), self.pk)
+    if key not in cache:
+        user = request.user
+        cache[key] = Permissions(
+            can_edit=user.has_perm(permission(self, PermissionType.EDIT), self),
+            can_delete=user.has_perm(
+                permission(self, PermissionType.DELETE), self
+            ),
+        )
+    return cache[key]
 
 
 @strawberry.type
@@ -56,21 +86,34 @@ class Image:
     url: str = strawberry.field(description="Image access URL")
     width: int = strawberry.field(description="Image width, in pixels")
     height: int = strawberry.field(description="Image height, in pixels")
+    svg_width: float = strawberry.field(
+        description="Image width, either `100` if portrait or"
+        " `width/height*100` if landscape"
+    )
+    svg_height: float = strawberry.field(
+        description="Image height, either `100` if landscape or"
+        " `height/width*100` if portrait"
+    )
 
-    @strawberry.field
-    def svg_width(self) -> float:
-        """
-        Image width, either `100` if portrait or `width/height*100` if landscape
-        """
-        return util.get_svg_dimensions(self)[0]
-
-    @strawberry.field
-    def svg_height(self) -> float:
+    @classmethod
+    def from_boulder(cls, boulder: Boulder) -> Self:
         """
-        Image height, either `100` if landscape or `height/width*100` if
-        portrait
+        Build an image from a boulder. All dimensions come from the boulder's
+        stored columns, so this doesn't need to read the image file.
         """
-        return util.get_svg_dimensions(self)[1]
+        (svg_width, svg_height) = boulder.get_svg_dimensions()
+        # In prod, this signs a URL for the storage bucket
+        with measure("storage"):
+            url = boulder.image.url
+        return cls(
+            url=url,
+            # Django populates these when the row is loaded, if they haven't
+            # been backfilled yet
+            width=boulder.image_width,
+            height=boulder.image_height,
+            svg_width=svg_width,
+            svg_height=svg_height,
+        )
 
 
 @strawberry.type
@@ -94,19 +137,33 @@ class SVGPosition:
 
     @classmethod
     def from_boulder_position(
-        cls, boulder_position: BoulderPosition, image: Image | ImageFieldFile
+        cls, boulder_position: BoulderPosition, boulder: Boulder
     ) -> Self:
         """
         Map a normalized position, where both components are [0,1], to an SVG
-        position, where X and Y are in SVG coordinates, based on image
-        dimensions.
+        position, where X and Y are in SVG coordinates, based on the boulder's
+        image dimensions.
         """
-        (svg_width, svg_height) = util.get_svg_dimensions(image)
+        (svg_width, svg_height) = boulder.get_svg_dimensions()
         return cls(
             x=boulder_position.x * svg_width, y=boulder_position.y * svg_height
         )
 
 
+@strawberry.input
+class SVGPositionInput:
+    x: float = strawberry.field(description="X position, 0-100ish")
+    y: float = strawberry.field(description="Y position, 0-100ish")
+
+    def to_normalized(self, boulder: Boulder) -> BoulderPosition:
+        """
+        Normalize a position, such that the x/y values are both [0,1] rather
+        than based on the SVG dimensions of the boulder's image.
+        """
+        (svg_width, svg_height) = boulder.get_svg_dimensions()
+        return BoulderPosition(self.x / svg_width, self.y / svg_height)
+
+
 @strawberry.type
 class NoUser:
     """
@@ -159,7 +216,18 @@ class BoulderNode(relay.Node):
         description="Date+time of object creation"
     )
     permissions: Permissions = strawberry.field(resolver=get_permissions)
-    image: Image = strawberry.field()
+
+    @strawberry.django.field(
+        only=[
+            "image",
+            "image_width",
+            "image_height",
+            "svg_width",
+            "svg_height",
+        ]
+    )
+    def image(self: Boulder) -> Image:  # type: ignore[misc]
+        return Image.from_boulder(self)
 
 
 @strawberry.django.type(Problem)
@@ -179,15 +247,74 @@ class ProblemNode(relay.Node):
         description="Date+time of object creation"
     )
     owner: UserNode = strawberry.field()
-    permissions: Permissions = strawberry.field(resolver=get_permissions)
+    permissions: Permissions = strawberry.django.field(
+        resolver=get_permissions, only=["owner"]
+    )
     visibility: Visibility = strawberry.field()
     boulder: BoulderNode = strawberry.field()
-    holds: relay.ListConnection["HoldNode"] = strawberry.django.connection(
-        prefetch_related="holds"
+    holds: KeysetConnection["HoldNode"] = strawberry.django.connection(
+        # Holds need an annotation for permission checks. This has to be a
+        # callable, because the optimizer mutates Prefetch objects
+        prefetch_related=[
+            lambda info: Prefetch(
+                "holds", queryset=Hold.objects.annotate_owner_id()
+            )
+        ]
+    )
+    betas: KeysetConnection["BetaNode"] = strawberry.django.connection(
+        # The optimizer doesn't look inside nested connections, so load what
+        # the UI shows for each beta's owner here
+        prefetch_related=[
+            lambda info: Prefetch(
+                "betas", queryset=Beta.objects.select_related("owner__profile")
+            )
+        ]
     )
-    betas: relay.ListConnection["BetaNode"] = strawberry.django.connection(
-        prefetch_related="betas"
+
+    @strawberry.django.field(
+        select_related=["boulder"],
+        only=["boulder__svg_width", "boulder__svg_height"],
     )
+    def holds_near(  # type: ignore[misc]
+        self: Problem,
+        info: Info,
+        position: SVGPositionInput,
+        radius: Annotated[
+            float,
+            strawberry.argument(
+                description="Max distance from the position, in SVG units"
+            ),
+        ],
+        limit: Annotated[
+            int, strawberry.argument(description="Max number of holds")
+        ] = 10,
+    ) -> list["HoldNode"]:
+        """
+        Holds within a given distance of a position, nearest first. Useful for
+        snapping to holds while editing.
+        """
+        max_results = info.schema.config.relay_max_results
+        if limit < 0:
+            raise ValueError("Argument 'limit' must be a non-negative integer.")
+        if limit > max_results:
+            raise ValueError(
+                f"Argument 'limit' cannot be higher than {max_results}."
+            )
+
+        boulder = self.boulder
+        holds = list(
+            Hold.objects.near(
+                self.id,
+                position.to_normalized(boulder),
+                radius,
+                boulder.get_svg_dimensions(),
+            )[:limit]
+        )
+        # We already have the problem+boulder, so save a query per hold when
+        # resolving fields that need them
+        for hold in holds:
+            hold.problem = self
+        return holds
 
 
 @strawberry.django.type(Hold)
@@ -201,17 +328,32 @@ class HoldNode(relay.Node):
     created_at: strawberry.auto = strawberry.field(
         description="Date+time of object creation"
     )
-    permissions: Permissions = strawberry.field(resolver=get_permissions)
+    # Permission checks use the problem_owner_id annotation, but still need
+    # the FK to be loaded in case it's missing
+    permissions: Permissions = strawberry.django.field(
+        resolver=get_permissions, only=["problem"]
+    )
     annotation: strawberry.auto = strawberry.field(
         description="Informative text related to the hold, created by the user"
     )
 
+    @classmethod
+    def get_queryset(
+        cls, queryset: QuerySet[Hold], info: Info, **kwargs: Any
+    ) -> QuerySet[Hold]:
+        # Don't touch querysets that have already been evaluated (e.g. from a
+        # prefetch), otherwise we'd throw away the results and query again
+        if queryset._result_cache is not None:  # type: ignore[attr-defined]
+            return queryset
+        return queryset.annotate_owner_id()  # type: ignore[attr-defined]
+
     @strawberry.django.field(
-        select_related=["problem__boulder"], only=["problem__boulder__image"]
+        select_related=["problem__boulder"],
+        only=["problem__boulder__svg_width", "problem__boulder__svg_height"],
     )
-    def position(self) -> SVGPosition:
+    def position(self: Hold) -> SVGPosition:  # type: ignore[misc]
         return SVGPosition.from_boulder_position(
-            self.position, self.problem.boulder.image
+            self.position, self.problem.boulder
         )
 
 
@@ -230,10 +372,24 @@ class BetaNode(relay.Node):
         description="Date+time of object creation"
     )
     owner: UserNode = strawberry.field()
-    permissions: Permissions = strawberry.field(resolver=get_permissions)
+    permissions: Permissions = strawberry.django.field(
+        resolver=get_permissions, only=["owner"]
+    )
     problem: ProblemNode = strawberry.field()
-    moves: relay.ListConnection["BetaMoveNode"] = strawberry.django.connection(
-        prefetch_related="moves"
+    moves: KeysetConnection["BetaMoveNode"] = strawberry.django.connection(
+        # Moves need annotations to calculate their exposed order and check
+        # permissions. The optimizer doesn't look inside nested connections,
+        # so also load the holds that moves target. This has to be a callable,
+        # because the optimizer mutates Prefetch objects
+        prefetch_related=[
+            lambda info: Prefetch(
+                "moves",
+                queryset=BetaMove.objects.annotate_dense_order()
+                .annotate_owner_id()
+                .annotate_problem_id()
+                .select_related("hold__problem__boulder"),
+            )
+        ]
     )
 
 
@@ -253,12 +409,22 @@ class BetaMoveNode(relay.Node):
     created_at: strawberry.auto = strawberry.field(
         description="Date+time of object creation"
     )
-    permissions: Permissions = strawberry.field(resolver=get_permissions)
+    # Permission checks use the beta_owner_id annotation, but still need the
+    # FK to be loaded in case it's missing
+    permissions: Permissions = strawberry.django.field(
+        resolver=get_permissions, only=["beta"]
+    )
     beta: BetaNode = strawberry.field()
     body_part: BodyPart = strawberry.field(description="Body part being moved")
-    order: int = strawberry.field(
-        description="The ordering of this move within the beta, starting at 1"
+
+    @strawberry.django.field(
+        description="The ordering of this move within the beta, starting at 1",
+        only=["beta", "order"],
     )
+    def order(self: BetaMove) -> int:  # type: ignore[misc]
+        # The stored order is sparse, so we need to map it to a dense position
+        return self.get_dense_order()
+
     is_start: bool = strawberry.field(
         description="Is this one of the initial moves for the beta?"
     )
@@ -266,10 +432,24 @@ class BetaMoveNode(relay.Node):
         description="Informative text related to the move, created by the user"
     )
 
+    @classmethod
+    def get_queryset(
+        cls, queryset: QuerySet[BetaMove], info: Info, **kwargs: Any
+    ) -> QuerySet[BetaMove]:
+        # Don't touch querysets that have already been evaluated (e.g. from a
+        # prefetch), otherwise we'd throw away the results and query again
+        if queryset._result_cache is not None:  # type: ignore[attr-defined]
+            return queryset
+        queryset = queryset.annotate_dense_order()  # type: ignore[attr-defined]
+        return queryset.annotate_owner_id().annotate_problem_id()
+
     @strawberry.django.field(
         description="Where the move is going; either a hold or a free position",
         select_related=["beta__problem__boulder"],
-        only=["beta__problem__boulder__image"],
+        only=[
+            "beta__problem__boulder__svg_width",
+            "beta__problem__boulder__svg_height",
+        ],
     )
     def target(self: BetaMove) -> HoldNode | SVGPosition:  # type: ignore[misc]
         # Note: You may be tempted to have this return the hold position when
@@ -279,14 +459,14 @@ class BetaMoveNode(relay.Node):
         # so the data gets out of sync.
         if self.position:
             return SVGPosition.from_boulder_position(
-                self.position, self.beta.problem.boulder.image
+                self.position, self.beta.problem.boulder
             )
         return self.hold
 
 
 @strawberry.type
 class Query:
-    @strawberry.relay.connection(relay.ListConnection[ProblemNode])
+    @strawberry.relay.connection(KeysetConnection[ProblemNode])
     def problems(
         self,
         info: Info,
@@ -312,19 +492,28 @@ class Query:
         is_mine_query = Q(
             owner_id=info.context.request.user.id, owner_id__isnull=False
         )
-
-        # By default, don't show anyone else's unlisted problems
-        q = Q(visibility=Visibility.PUBLIC) | is_mine_query
-
-        if is_mine is not UNSET:
-            if is_mine:
-                q &= is_mine_query
-            else:
-                q &= ~is_mine_query
+        is_public_query = Q(visibility=Visibility.PUBLIC)
+
+        if is_mine is UNSET:
+            # By default, don't show anyone else's unlisted problems. An OR
+            # here would prevent Postgres from using an index for the sort,
+            # so keep the two cases as separate (disjoint) branches, which
+            # are each served by their own index
+            problems = Problem.objects.filter_any(
+                is_public_query, is_mine_query & ~is_public_query
+            )
+        elif is_mine:
+            problems = Problem.objects.filter(is_mine_query)
+        else:
+            problems = Problem.objects.filter(is_public_query & ~is_mine_query)
         if visibility is not UNSET:
-            q &= Q(visibility=visibility)
+            problems = problems.filter(visibility=visibility)
 
-        return Problem.objects.filter(q)
+        # Only strawberry_django's own fields are optimized automatically
+        extension = optimizer.get()
+        if extension is not None:
+            problems = extension.optimize(problems, info=info)
+        return problems
 
     problem: Optional[ProblemNode] = strawberry.django.node(
         description="Get a problem by ID"
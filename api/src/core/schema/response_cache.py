@@ -0,0 +1,251 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from inspect import isawaitable
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model
+from django.http import HttpRequest
+from django.utils.cache import parse_etags
+from graphql import ExecutionResult, GraphQLResolveInfo
+from strawberry.django.context import StrawberryDjangoContext
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from ..cache import (
+    PROBLEM_LIST_TAG,
+    get_problem_tag,
+    get_tag_versions,
+    initialize_tags,
+)
+from ..models import Beta, BetaMove, Hold, Problem
+
+KEY_PREFIX = "graphql-response"
+
+# Root query fields that return a list of problems
+PROBLEM_LIST_FIELDS = {"problems"}
+
+
+@dataclass
+class GraphQLContext(StrawberryDjangoContext):
+    """
+    Context for GraphQL requests from the view. `ResponseCache` fills in the
+    response's tags, so the view can set its ETag.
+    """
+
+    response_tags: Optional[set[str]] = None
+    operation_digest: Optional[str] = None
+
+
+class ResponseCache(SchemaExtension):
+    """
+    Cache query responses, on the server and the client:
+
+    - Responses for anonymous users, which are mostly the same few public
+      problems, are stored in Django's cache for
+      `GRAPHQL_RESPONSE_CACHE_TIMEOUT`. Responses are keyed by the query,
+      operation and variables. Authenticated responses depend on the user
+      (e.g. permissions), so they're never stored.
+    - GET requests get an ETag, derived from the versions of the response's
+      tags. The tags are passed back to the view on the `GraphQLContext`,
+      which sets the ETag (see `set_etag`).
+
+    Each response is tagged with the problems it contains, and whether it
+    includes a list of problems. Changes to any problem (or its holds, betas
+    and moves) invalidate the tags for that problem, via model signals (see
+    `core.cache`).
+    """
+
+    tags: Optional[set[str]] = None
+
+    def on_execute(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        request = getattr(execution_context.context, "request", None)
+        # Result may already be set if the operation was rejected
+        if (
+            not settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT
+            or execution_context.operation_type != OperationType.QUERY
+            or request is None
+            or execution_context.result is not None
+        ):
+            yield
+            return
+
+        key = self.get_cache_key(request)
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            (data, tag_versions) = cached
+            if get_tag_versions(tag_versions) == tag_versions:
+                # Setting the result skips execution
+                execution_context.result = ExecutionResult(data=data)
+                yield
+                self.set_response_tags(set(tag_versions))
+                return
+
+        # Collect tags as the response is resolved
+        self.tags = set()
+        started_at = time.time_ns()
+        yield
+        result = execution_context.result
+        if result is None or result.errors:
+            return
+        self.set_response_tags(self.tags)
+        if key is None:
+            return
+
+        # Tags that are new (or were evicted) get the start time as their
+        # version, so they count as unchanged since then
+        initialize_tags(self.tags, version=started_at)
+        tag_versions = get_tag_versions(self.tags)
+        # If anything was invalidated while we were executing, the response
+        # may already be stale
+        if len(tag_versions) == len(self.tags) and all(
+            version <= started_at for version in tag_versions.values()
+        ):
+            cache.set(
+                key,
+                (result.data, tag_versions),
+                timeout=settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT,
+            )
+
+    def resolve(
+        self,
+        _next: Callable,
+        root: Any,
+        info: GraphQLResolveInfo,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        result = _next(root, info, *args, **kwargs)
+        tags = self.tags
+        if tags is None:
+            return result
+
+        if info.parent_type.name == "Query" and info.field_name in (
+            PROBLEM_LIST_FIELDS
+        ):
+            tags.add(PROBLEM_LIST_TAG)
+        if isinstance(root, Model):
+            tags.update(get_object_tags(root))
+        # In an async view, most resolvers return awaitables
+        if isawaitable(result):
+
+            async def tag_result() -> Any:
+                value = await result
+                if isinstance(value, Model):
+                    tags.update(get_object_tags(value))
+                return value
+
+            return tag_result()
+        if isinstance(result, Model):
+            tags.update(get_object_tags(result))
+        return result
+
+    def get_cache_key(self, request: HttpRequest) -> Optional[str]:
+        """
+        Get the cache key for the current operation, or `None` if it shouldn't
+        be cached
+        """
+        if request.user.is_authenticated:
+            return None
+        return f"{KEY_PREFIX}:anonymous:{self.get_operation_digest()}"
+
+    def get_operation_digest(self) -> str:
+        """
+        Get a hash of the current operation, including its variables
+        """
+        execution_context = self.execution_context
+        operation = json.dumps(
+            [
+                execution_context.query,
+                execution_context.operation_name,
+                execution_context.variables,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(operation.encode()).hexdigest()
+
+    def set_response_tags(self, tags: set[str]) -> None:
+        """
+        Pass a successful response's tags to the view, to set the ETag
+        """
+        context = self.execution_context.context
+        if isinstance(context, GraphQLContext):
+            context.response_tags = tags
+            context.operation_digest = self.get_operation_digest()
+
+
+def get_object_tags(obj: Model) -> list[str]:
+    """
+    Get the cache tags for a resolved object. Moves are tagged by their beta's
+    problem, so a response can't be cached without tags even if it resolves
+    moves without their beta. The problem ID comes from an annotation (see
+    `BetaMoveNode.get_queryset`), or from the beta otherwise.
+    """
+    if isinstance(obj, Problem):
+        return [get_problem_tag(obj.id)]
+    if isinstance(obj, (Hold, Beta)):
+        return [get_problem_tag(obj.problem_id)]
+    if isinstance(obj, BetaMove):
+        problem_id = getattr(obj, "beta_problem_id", None)
+        if problem_id is None:
+            problem_id = obj.beta.problem_id
+        return [get_problem_tag(problem_id)]
+    return []
+
+
+def set_etag(context: GraphQLContext) -> None:
+    """
+    Set the ETag header for a GET request, and the 304 status if the client
+    already has the current response. Responses that don't contain any
+    problems are skipped, since nothing else is tracked. This reads from the
+    cache, which may block, so in an async view it has to be run in a thread.
+    """
+    request = context.request
+    response = context.response
+    if request.method != "GET" or not context.response_tags:
+        return
+
+    # The response depends on the user. Anything else that isn't tracked by
+    # tags (e.g. usernames) can only be stale until the cache timeout rolls
+    # over, same as cached responses
+    window = time.time() // settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT
+    state = [
+        request.user.pk,
+        context.operation_digest,
+        window,
+        get_tags_state(context.response_tags),
+    ]
+    digest = hashlib.sha256(
+        json.dumps(state, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+    etag = f'"{digest}"'
+    # Clients always have to revalidate, since the ETag can change at any
+    # moment
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response.status_code = 304
+
+
+def get_tags_state(tags: set[str]) -> list[tuple[str, int]]:
+    """
+    Get the current version of each tag, giving a version to any that don't
+    have one yet. Any change to the objects covered by the tags (including
+    adding or deleting one) invalidates them, so this changes too. That
+    includes writes that skip model signals (e.g. reordering moves or
+    re-calculating is_start), because those always happen alongside a change
+    that does invalidate. Versions are kept in the cache, so this doesn't
+    touch the DB. If a tag is evicted, it gets a new version that has never
+    been used, so old ETags can't match again (see `core.cache`).
+    """
+    versions = get_tag_versions(tags)
+    missing = tags - versions.keys()
+    if missing:
+        initialize_tags(missing)
+        versions.update(get_tag_versions(missing))
+    return sorted(versions.items())
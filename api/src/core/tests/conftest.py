@@ -1 +1,14 @@
+from collections.abc import Iterator
+
+import pytest
+from django.core.cache import cache
+
 from .factories import *  # noqa: F403
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> Iterator[None]:
+    """The cache outlives the DB transaction, so reset it for each test"""
+    cache.clear()
+    yield
+    cache.clear()
@@ -1,10 +1,11 @@
+import random
 from contextlib import AbstractContextManager, nullcontext
 
 import pytest
 from django.db import IntegrityError
 
 from core.fields import BoulderPosition
-from core.models import Beta, Hold
+from core.models import Beta, BetaMove, BodyPart, Hold
 from core.tests.factories import BetaMoveFactory
 
 pytestmark = pytest.mark.django_db
@@ -39,3 +40,96 @@ def test_beta_move_hold_or_position(
         )
         assert beta_move.hold == hold
         assert beta_move.position is None
+
+
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_get_move_order_insert(beta: Beta) -> None:
+    """
+    Inserting a move should pick an order in the gap between its neighbors,
+    without modifying any other moves
+    """
+    moves = [
+        BetaMoveFactory(beta=beta, order=order) for order in (1024, 2048, 3072)
+    ]
+    assert Beta.get_move_order(beta.id, 1) == 512
+    assert Beta.get_move_order(beta.id, 2) == 1536
+    assert Beta.get_move_order(beta.id, 4) == 4096
+    assert Beta.get_move_order(beta.id, 100) == 4096  # Past the end
+    # Moving the last move to the front
+    assert Beta.get_move_order(beta.id, 1, exclude_id=moves[2].id) == 512
+    # Moving the first move to the back
+    assert Beta.get_move_order(beta.id, 3, exclude_id=moves[0].id) == 4096
+    assert list(beta.moves.values_list("order", flat=True)) == [
+        1024,
+        2048,
+        3072,
+    ]
+
+
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_get_move_order_rebalance(beta: Beta) -> None:
+    """
+    When there's no gap left to insert into, the beta should be rebalanced
+    """
+    for order in (1, 2, 3):
+        BetaMoveFactory(beta=beta, order=order)
+    assert Beta.get_move_order(beta.id, 2) == 1536
+    assert list(beta.moves.values_list("order", flat=True)) == [
+        1024,
+        2048,
+        3072,
+    ]
+    assert list(
+        beta.moves.annotate_dense_order().values_list("dense_order", flat=True)
+    ) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("beta__moves", [[]])
+@pytest.mark.parametrize("seed", range(20))
+def test_update_is_start_matches_expression(beta: Beta, seed: int) -> None:
+    """
+    The incremental is_start calculation, which runs on every save/delete,
+    should always match the full is_start expression. Build a random beta via
+    a random series of inserts, reorders and deletes to check that.
+    """
+    rng = random.Random(seed)
+    body_parts = [body_part for body_part, _ in BodyPart.choices]
+
+    def assert_is_start() -> None:
+        moves = BetaMove.objects.filter(beta=beta)
+        actual = dict(moves.values_list("id", "is_start"))
+        expected = dict(
+            moves.annotate(
+                expected_is_start=BetaMove.get_is_start_expression()
+            ).values_list("id", "expected_is_start")
+        )
+        assert actual == expected
+
+    for _ in range(rng.randint(1, 15)):
+        num_moves = beta.moves.count()
+        action = rng.choice(["append", "insert", "reorder", "delete"])
+        if action == "append" or num_moves == 0:
+            BetaMoveFactory(
+                beta=beta,
+                body_part=rng.choice(body_parts),
+                order=None,
+                is_free=True,
+            )
+        elif action == "insert":
+            BetaMoveFactory(
+                beta=beta,
+                body_part=rng.choice(body_parts),
+                order=Beta.get_move_order(
+                    beta.id, rng.randint(1, num_moves + 1)
+                ),
+                is_free=True,
+            )
+        elif action == "reorder":
+            move = rng.choice(list(beta.moves.all()))
+            move.order = Beta.get_move_order(
+                beta.id, rng.randint(1, num_moves), exclude_id=move.id
+            )
+            move.save()
+        else:
+            rng.choice(list(beta.moves.all())).delete()
+        assert_is_start()
@@ -0,0 +1,63 @@
+import pytest
+from django.core.management import call_command
+from pytest_mock import MockerFixture
+
+from core.models import Boulder
+from core.tests.factories import BoulderFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    "width,height,expected_svg",
+    [(200, 100, (200.0, 100.0)), (100, 400, (100.0, 400.0))],
+    ids=["landscape", "portrait"],
+)
+def test_boulder_dimensions_on_create(
+    width: int, height: int, expected_svg: tuple[float, float]
+) -> None:
+    """
+    Image and SVG dimensions should be populated when a boulder is created
+    """
+    boulder = BoulderFactory(image__width=width, image__height=height)
+    boulder.refresh_from_db()
+    assert (boulder.image_width, boulder.image_height) == (width, height)
+    assert (boulder.svg_width, boulder.svg_height) == expected_svg
+    assert boulder.get_svg_dimensions() == expected_svg
+
+
+def test_boulder_svg_dimensions_no_image_access(
+    boulder: Boulder, mocker: MockerFixture
+) -> None:
+    """
+    SVG dimensions should come from stored columns, without opening the image
+    """
+    get_image_dimensions = mocker.patch(
+        "django.core.files.images.get_image_dimensions"
+    )
+    boulder = Boulder.objects.only("svg_width", "svg_height").get(id=boulder.id)
+    assert boulder.get_svg_dimensions() == (100.0, 100.0)
+    get_image_dimensions.assert_not_called()
+
+
+def test_backfill_boulder_dimensions() -> None:
+    """
+    The backfill command should populate dimensions for old rows
+    """
+    boulder = BoulderFactory(image__width=300, image__height=100)
+    # Simulate a row from before dimensions were stored
+    Boulder.objects.filter(id=boulder.id).update(
+        image_width=None, image_height=None, svg_width=None, svg_height=None
+    )
+
+    call_command("backfill_boulder_dimensions")
+
+    values = Boulder.objects.values(
+        "image_width", "image_height", "svg_width", "svg_height"
+    ).get(id=boulder.id)
+    assert values == {
+        "image_width": 300,
+        "image_height": 100,
+        "svg_width": 300.0,
+        "svg_height": 100.0,
+    }
@@ -1,11 +1,41 @@
+import os
+from pathlib import Path
 from unittest.mock import Mock
 
 import pytest
+from django.conf import settings
 from django.contrib.auth import login
 from django.contrib.auth.models import User
 from strawberry.django.context import StrawberryDjangoContext
 from strawberry.types.execution import ExecutionResult
 
+from core.schema import schema
+from core.schema.operations import load_ui_operations
+
+# The UI source, to test the operations that the UI sends. In docker, this is
+# mounted at /ui/src (see docker-compose.yml)
+UI_SRC = settings.BASE_DIR.parent.parent / "ui" / "src"
+
+
+@pytest.fixture(scope="session")
+def ui_src() -> Path:
+    """
+    Path to the UI source. Tests that need it are skipped if it isn't there,
+    except in CI, where they fail instead, so they can't be skipped without
+    anyone noticing.
+    """
+    if not UI_SRC.exists():
+        if os.getenv("CI"):
+            pytest.fail(f"UI source not found at {UI_SRC}")
+        pytest.skip("UI source not available")
+    return UI_SRC
+
+
+@pytest.fixture(scope="session")
+def ui_operations(ui_src: Path) -> dict[str, str]:
+    """Every operation that the UI sends, keyed by name"""
+    return load_ui_operations(ui_src, schema._schema)
+
 
 @pytest.fixture
 def context_anonymous(mocker: Mock) -> StrawberryDjangoContext:
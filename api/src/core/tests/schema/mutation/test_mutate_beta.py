@@ -0,0 +1,281 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from pytest_factoryboy import LazyFixture
+from strawberry import relay
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.models import Beta, BetaMove, BodyPart, Problem
+from core.schema import schema
+from core.schema.query import BetaMoveNode, BetaNode
+from core.tests.factories import BetaFactory, BetaMoveFactory
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+delete_beta_mutation = """
+    mutation($input: NodeInput!) {
+        deleteBeta(input: $input) {
+            id
+        }
+    }
+"""
+
+copy_beta_mutation = """
+    mutation($input: CopyBetaInput!) {
+        copyBeta(input: $input) {
+            name
+            moves {
+                edges {
+                    node {
+                        order
+                        bodyPart
+                        isStart
+                    }
+                }
+            }
+        }
+    }
+"""
+
+reorder_beta_moves_mutation = """
+    mutation($input: ReorderBetaMovesInput!) {
+        reorderBetaMoves(input: $input) {
+            moves {
+                edges {
+                    node {
+                        id
+                        order
+                        isStart
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+@pytest.mark.parametrize("beta__owner", [LazyFixture("user")])
+def test_delete_beta(context: StrawberryDjangoContext, beta: Beta) -> None:
+    beta_id = relay.to_base64(BetaNode, beta.id)
+    assert_graphql_result(
+        schema.execute_sync(
+            delete_beta_mutation,
+            context_value=context,
+            variable_values={"input": {"id": beta_id}},
+        ),
+        {"deleteBeta": {"id": beta_id}},
+    )
+    assert not Beta.objects.filter(id=beta.id).exists()
+    assert not BetaMove.objects.filter(beta_id=beta.id).exists()
+
+
+def test_delete_beta_query_count(
+    context: StrawberryDjangoContext, problem: Problem, user: User
+) -> None:
+    """
+    Deleting a beta should take a constant number of queries, regardless of
+    how many moves it has
+    """
+
+    def get_num_queries(num_moves: int) -> int:
+        beta = BetaFactory(problem=problem, owner=user, moves=[])
+        BetaMoveFactory.create_batch(num_moves, beta=beta, is_free=True)
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                delete_beta_mutation,
+                context_value=context,
+                variable_values={
+                    "input": {"id": relay.to_base64(BetaNode, beta.id)}
+                },
+            )
+        assert result.errors is None
+        return len(queries)
+
+    # Warm up per-user caches (e.g. permissions) so they don't skew the count
+    get_num_queries(1)
+    assert get_num_queries(1) == get_num_queries(30)
+
+
+def test_copy_beta(context: StrawberryDjangoContext, beta: Beta) -> None:
+    BetaMoveFactory.create_batch(5, beta=beta)
+    moves = list(beta.moves.order_by("order"))
+    result = schema.execute_sync(
+        copy_beta_mutation,
+        context_value=context,
+        variable_values={"input": {"id": relay.to_base64(BetaNode, beta.id)}},
+    )
+    assert_graphql_result(
+        result,
+        {
+            "copyBeta": {
+                "name": f"{beta.name} Copy",
+                "moves": {
+                    "edges": [
+                        {
+                            "node": {
+                                "order": i + 1,
+                                "bodyPart": BodyPart(move.body_part).name,
+                                "isStart": move.is_start,
+                            }
+                        }
+                        for i, move in enumerate(moves)
+                    ]
+                },
+            }
+        },
+    )
+
+
+@pytest.mark.parametrize("beta__owner", [LazyFixture("user")])
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_reorder_beta_moves(
+    context: StrawberryDjangoContext, beta: Beta
+) -> None:
+    """
+    Reordering should apply the full new order and re-calculate is_start
+    """
+    moves = [
+        BetaMoveFactory(beta=beta, body_part=body_part)
+        for body_part in ["LH", "RH", "LH", "LF"]
+    ]
+    move_ids = [relay.to_base64(BetaMoveNode, move.id) for move in moves]
+    # Move the last move to the front, so the first repeated body part shifts
+    new_move_ids = [move_ids[3], move_ids[0], move_ids[1], move_ids[2]]
+
+    assert_graphql_result(
+        schema.execute_sync(
+            reorder_beta_moves_mutation,
+            context_value=context,
+            variable_values={
+                "input": {
+                    "beta": relay.to_base64(BetaNode, beta.id),
+                    "moveIds": new_move_ids,
+                }
+            },
+        ),
+        {
+            "reorderBetaMoves": {
+                "moves": {
+                    "edges": [
+                        {
+                            "node": {
+                                "id": move_id,
+                                "order": i + 1,
+                                "isStart": is_start,
+                            }
+                        }
+                        for i, (move_id, is_start) in enumerate(
+                            zip(new_move_ids, [True, True, True, False])
+                        )
+                    ]
+                }
+            }
+        },
+    )
+
+
+@pytest.mark.parametrize("beta__owner", [LazyFixture("user")])
+@pytest.mark.parametrize("beta__moves", [[]])
+@pytest.mark.parametrize(
+    "move_indexes",
+    [[0, 1, 2], [0, 1, 2, 3, 3], [0, 1, 2, 2]],
+    ids=["missing", "duplicate", "duplicate_missing"],
+)
+def test_reorder_beta_moves_invalid(
+    context: StrawberryDjangoContext, beta: Beta, move_indexes: list[int]
+) -> None:
+    """
+    The move list must contain every move in the beta exactly once
+    """
+    moves = BetaMoveFactory.create_batch(4, beta=beta)
+    original_orders = [move.order for move in moves]
+    result = schema.execute_sync(
+        reorder_beta_moves_mutation,
+        context_value=context,
+        variable_values={
+            "input": {
+                "beta": relay.to_base64(BetaNode, beta.id),
+                "moveIds": [
+                    relay.to_base64(BetaMoveNode, moves[i].id)
+                    for i in move_indexes
+                ],
+            }
+        },
+    )
+    assert_graphql_result(
+        result,
+        None,
+        ["Move IDs must contain every move in the beta exactly once"],
+    )
+    assert [move.order for move in beta.moves.all()] == original_orders
+
+
+@pytest.mark.parametrize("beta__owner", [LazyFixture("other_user")])
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_reorder_beta_moves_no_permission(
+    context: StrawberryDjangoContext, beta: Beta
+) -> None:
+    """
+    Only the owner can reorder a beta's moves, and a denied request shouldn't
+    write anything
+    """
+    moves = BetaMoveFactory.create_batch(3, beta=beta)
+    original_orders = [move.order for move in moves]
+    result = schema.execute_sync(
+        reorder_beta_moves_mutation,
+        context_value=context,
+        variable_values={
+            "input": {
+                "beta": relay.to_base64(BetaNode, beta.id),
+                "moveIds": [
+                    relay.to_base64(BetaMoveNode, move.id)
+                    for move in reversed(moves)
+                ],
+            }
+        },
+    )
+    assert_graphql_result(result, None, ["You don't have permission"])
+    assert [move.order for move in beta.moves.all()] == original_orders
+
+
+def test_reorder_beta_moves_query_count(
+    context: StrawberryDjangoContext, problem: Problem, user: User
+) -> None:
+    """
+    Reordering should take a constant number of queries, regardless of how
+    many moves are in the beta
+    """
+
+    def get_num_queries(num_moves: int) -> int:
+        beta = BetaFactory(problem=problem, owner=user, moves=[])
+        moves = BetaMoveFactory.create_batch(num_moves, beta=beta, is_free=True)
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                # Don't select moves in the response, because that's
+                # proportional to size
+                """
+                mutation($input: ReorderBetaMovesInput!) {
+                    reorderBetaMoves(input: $input) {
+                        id
+                    }
+                }
+                """,
+                context_value=context,
+                variable_values={
+                    "input": {
+                        "beta": relay.to_base64(BetaNode, beta.id),
+                        "moveIds": [
+                            relay.to_base64(BetaMoveNode, move.id)
+                            for move in reversed(moves)
+                        ],
+                    }
+                },
+            )
+        assert result.errors is None
+        return len(queries)
+
+    # Warm up per-user caches (e.g. permissions) so they don't skew the count
+    get_num_queries(1)
+    assert get_num_queries(5) == get_num_queries(50)
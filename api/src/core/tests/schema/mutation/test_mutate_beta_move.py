@@ -1,11 +1,14 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from pytest_factoryboy import LazyFixture
 from strawberry import relay
 from strawberry.django.context import StrawberryDjangoContext
 
-from core.models import BetaMove
+from core.models import Beta, BetaMove
 from core.schema import schema
-from core.schema.query import BetaMoveNode
+from core.schema.query import BetaMoveNode, BetaNode, HoldNode
+from core.tests.factories import BetaMoveFactory, HoldFactory
 from core.tests.schema.conftest import assert_graphql_result
 
 pytestmark = pytest.mark.django_db
@@ -45,6 +48,15 @@ update_annotation_mutation = """
     }
 """
 
+update_order_mutation = """
+    mutation($input: UpdateBetaMoveInput!) {
+        updateBetaMove(input: $input) {
+            id
+            order
+        }
+    }
+"""
+
 delete_beta_move_mutation = """
     mutation($input: NodeInput!) {
         deleteBetaMove(input: $input) {
@@ -106,7 +118,9 @@ def test_delete_beta_move(
                             {
                                 "node": {
                                     "id": beta_move_id,
-                                    "order": beta_move.order,
+                                    # Order is a dense position, not the
+                                    # stored (sparse) value
+                                    "order": 1,
                                 }
                             }
                         ]
@@ -118,6 +132,33 @@ def test_delete_beta_move(
     assert BetaMove.objects.filter(id=beta_move.id).count() == 0
 
 
+def test_update_after_delete(
+    context: StrawberryDjangoContext, beta_move: BetaMove
+) -> None:
+    """
+    Each mutation field loads its own objects, so a move deleted by an earlier
+    field in the same document can't be written back by a later one
+    """
+    beta_move_id = relay.to_base64(BetaMoveNode, beta_move.id)
+    result = schema.execute_sync(
+        """
+        mutation($id: ID!) {
+            a: updateBetaMove(input: {id: $id, annotation: "a"}) { id }
+            b: deleteBetaMove(input: {id: $id}) { id }
+            c: updateBetaMove(input: {id: $id, annotation: "c"}) { id }
+        }
+        """,
+        context_value=context,
+        variable_values={"id": beta_move_id},
+    )
+    # Mutation fields are non-null, so the error nulls out the whole result
+    assert result.errors is not None
+    [error] = result.errors
+    assert error.path == ["c"]
+    assert "does not exist" in error.message
+    assert not BetaMove.objects.filter(id=beta_move.id).exists()
+
+
 @pytest.mark.parametrize("beta__owner", [LazyFixture("other_user")])
 def test_delete_beta_move_no_permission(
     context: StrawberryDjangoContext, beta_move: BetaMove
@@ -132,3 +173,104 @@ def test_delete_beta_move_no_permission(
         None,
         ["You don't have permission"],
     )
+
+
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_insert_and_reorder_cost_is_flat(
+    context: StrawberryDjangoContext, beta: Beta
+) -> None:
+    """
+    Inserting a move mid-beta and reordering a move should take the same
+    number of queries no matter how many moves are in the beta, because the
+    sparse orders mean other moves don't have to be shifted
+    """
+
+    def get_num_queries(num_moves: int) -> tuple[int, int]:
+        BetaMove.objects.filter(beta=beta).delete()
+        moves = BetaMoveFactory.create_batch(num_moves, beta=beta, is_free=True)
+        # Factory orders are consecutive, so spread them out first
+        Beta.rebalance_moves(beta.id)
+        middle_move_id = relay.to_base64(BetaMoveNode, moves[num_moves // 2].id)
+        with CaptureQueriesContext(connection) as insert_queries:
+            result = schema.execute_sync(
+                create_beta_move_mutation,
+                context_value=context,
+                variable_values={
+                    "input": {
+                        "beta": relay.to_base64(BetaNode, beta.id),
+                        "bodyPart": "LEFT_HAND",
+                        "position": {"x": 50.0, "y": 50.0},
+                        "previousBetaMove": middle_move_id,
+                    }
+                },
+            )
+        assert result.errors is None and result.data is not None
+        assert result.data["createBetaMove"]["order"] == num_moves // 2 + 2
+
+        with CaptureQueriesContext(connection) as reorder_queries:
+            result = schema.execute_sync(
+                update_order_mutation,
+                context_value=context,
+                variable_values={"input": {"id": middle_move_id, "order": 1}},
+            )
+        assert result.errors is None and result.data is not None
+        assert result.data["updateBetaMove"]["order"] == 1
+        assert list(
+            beta.moves.annotate_dense_order().values_list(
+                "dense_order", flat=True
+            )
+        ) == list(range(1, num_moves + 2))
+
+        return (len(insert_queries), len(reorder_queries))
+
+    # Warm up per-user caches (e.g. permissions) so they don't skew the count
+    get_num_queries(5)
+    assert get_num_queries(5) == get_num_queries(50)
+
+
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_create_and_update_load_parents_once(
+    context: StrawberryDjangoContext, beta: Beta
+) -> None:
+    """
+    Parent objects (beta, hold, problem, boulder) should be loaded at most
+    once per mutation, and shared between the mutation itself and the
+    permission checks on the result
+    """
+    hold = HoldFactory(problem=beta.problem)
+    (move,) = BetaMoveFactory.create_batch(1, beta=beta, is_free=True)
+
+    def get_selected_tables(query: str, input: dict) -> list[str]:
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                query, context_value=context, variable_values={"input": input}
+            )
+        assert result.errors is None
+        return [
+            query["sql"].split(" FROM ")[1].split()[0].strip('"')
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+
+    tables = get_selected_tables(
+        create_beta_move_mutation,
+        {
+            "beta": relay.to_base64(BetaNode, beta.id),
+            "bodyPart": "LEFT_HAND",
+            "hold": relay.to_base64(HoldNode, hold.id),
+            "previousBetaMove": relay.to_base64(BetaMoveNode, move.id),
+        },
+    )
+    for table in ["core_beta", "core_hold", "core_problem", "core_boulder"]:
+        assert tables.count(table) <= 1, tables
+
+    tables = get_selected_tables(
+        update_annotation_mutation,
+        {
+            "id": relay.to_base64(BetaMoveNode, move.id),
+            "hold": relay.to_base64(HoldNode, hold.id),
+            "annotation": "new value",
+        },
+    )
+    for table in ["core_beta", "core_hold", "core_problem", "core_boulder"]:
+        assert tables.count(table) <= 1, tables
@@ -0,0 +1,106 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from strawberry import relay
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.models import Hold, HoldAnnotationSource, Problem
+from core.schema import schema
+from core.schema.query import ProblemNode
+from core.tests.factories import ProblemFactory
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+create_holds_mutation = """
+    mutation($input: CreateHoldsInput!) {
+        createHolds(input: $input) {
+            position {
+                x
+                y
+            }
+        }
+    }
+"""
+
+
+@pytest.mark.parametrize(
+    "source", [HoldAnnotationSource.USER, HoldAnnotationSource.AUTO]
+)
+def test_create_holds(
+    context: StrawberryDjangoContext,
+    problem: Problem,
+    source: HoldAnnotationSource,
+) -> None:
+    positions = [{"x": 10.0, "y": 20.0}, {"x": 50.0, "y": 75.0}]
+    assert_graphql_result(
+        schema.execute_sync(
+            create_holds_mutation,
+            context_value=context,
+            variable_values={
+                "input": {
+                    "problem": relay.to_base64(ProblemNode, problem.id),
+                    "positions": positions,
+                    "source": source.name,
+                }
+            },
+        ),
+        {"createHolds": [{"position": position} for position in positions]},
+    )
+    assert list(
+        Hold.objects.filter(problem=problem).values_list("source", flat=True)
+    ) == [source, source]
+
+
+def test_create_holds_permission_denied(
+    context: StrawberryDjangoContext,
+) -> None:
+    """
+    Only the problem owner can add holds
+    """
+    problem = ProblemFactory()
+    assert_graphql_result(
+        schema.execute_sync(
+            create_holds_mutation,
+            context_value=context,
+            variable_values={
+                "input": {
+                    "problem": relay.to_base64(ProblemNode, problem.id),
+                    "positions": [{"x": 10.0, "y": 20.0}],
+                }
+            },
+        ),
+        None,
+        ["You don't have permission to add holds to this problem"],
+    )
+    assert not Hold.objects.filter(problem=problem).exists()
+
+
+def test_create_holds_query_count(
+    context: StrawberryDjangoContext, user: User
+) -> None:
+    """
+    Creating holds should take a constant number of queries, regardless of
+    how many holds are created
+    """
+
+    def get_num_queries(num_holds: int) -> int:
+        problem = ProblemFactory(owner=user)
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                create_holds_mutation,
+                context_value=context,
+                variable_values={
+                    "input": {
+                        "problem": relay.to_base64(ProblemNode, problem.id),
+                        "positions": [{"x": 10.0, "y": 20.0}] * num_holds,
+                    }
+                },
+            )
+        assert result.errors is None
+        return len(queries)
+
+    # Warm up per-user caches (e.g. permissions) so they don't skew the count
+    get_num_queries(1)
+    assert get_num_queries(1) == get_num_queries(80)
@@ -0,0 +1,196 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from pytest_factoryboy import LazyFixture
+from strawberry import relay
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.models import BetaMove, Boulder, Hold, Problem
+from core.schema import schema
+from core.schema.query import ProblemNode
+from core.tests.factories import (
+    BetaFactory,
+    BetaMoveFactory,
+    HoldFactory,
+    ProblemFactory,
+)
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+delete_problem_mutation = """
+    mutation($input: NodeInput!) {
+        deleteProblem(input: $input) {
+            id
+        }
+    }
+"""
+
+copy_problem_mutation = """
+    mutation($input: CopyProblemInput!) {
+        copyProblem(input: $input) {
+            id
+        }
+    }
+"""
+
+
+@pytest.mark.parametrize("problem__owner", [LazyFixture("user")])
+def test_delete_problem(
+    context: StrawberryDjangoContext, problem: Problem
+) -> None:
+    hold = HoldFactory(problem=problem)
+    beta = BetaFactory(problem=problem, moves=[])
+    BetaMoveFactory(beta=beta, hold=hold, is_free=False)
+
+    problem_id = relay.to_base64(ProblemNode, problem.id)
+    assert_graphql_result(
+        schema.execute_sync(
+            delete_problem_mutation,
+            context_value=context,
+            variable_values={"input": {"id": problem_id}},
+        ),
+        {"deleteProblem": {"id": problem_id}},
+    )
+    assert not Problem.objects.filter(id=problem.id).exists()
+    assert not Hold.objects.filter(problem_id=problem.id).exists()
+    assert not BetaMove.objects.filter(beta_id=beta.id).exists()
+    # Boulder is orphaned, so it should get cleaned up too
+    assert not Boulder.objects.filter(id=problem.boulder_id).exists()
+
+
+def test_delete_problem_query_count(
+    context: StrawberryDjangoContext, user: User
+) -> None:
+    """
+    Deleting a problem should take a constant number of queries, regardless
+    of how many holds, betas, and moves it has
+    """
+
+    def get_num_queries(num_betas: int, num_moves: int) -> int:
+        problem = ProblemFactory(owner=user)
+        holds = HoldFactory.create_batch(num_moves, problem=problem)
+        for _ in range(num_betas):
+            beta = BetaFactory(problem=problem, moves=[])
+            for hold in holds:
+                BetaMoveFactory(beta=beta, hold=hold, is_free=False)
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                delete_problem_mutation,
+                context_value=context,
+                variable_values={
+                    "input": {"id": relay.to_base64(ProblemNode, problem.id)}
+                },
+            )
+        assert result.errors is None
+        return len(queries)
+
+    # Warm up per-user caches (e.g. permissions) so they don't skew the count
+    get_num_queries(1, 1)
+    assert get_num_queries(1, 1) == get_num_queries(5, 20)
+
+
+@pytest.mark.parametrize("deep", [False, True], ids=["shallow", "deep"])
+def test_copy_problem(
+    context: StrawberryDjangoContext, user: User, deep: bool
+) -> None:
+    """
+    Copying should duplicate holds, and betas+moves for a deep copy. Moves in
+    copied betas should point to the copied holds.
+    """
+    problem = ProblemFactory()
+    holds = HoldFactory.create_batch(3, problem=problem)
+    beta = BetaFactory(problem=problem, moves=[])
+    for hold in holds:
+        BetaMoveFactory(beta=beta, hold=hold, is_free=False)
+    BetaMoveFactory(beta=beta, is_free=True)
+
+    result = schema.execute_sync(
+        copy_problem_mutation,
+        context_value=context,
+        variable_values={
+            "input": {
+                "id": relay.to_base64(ProblemNode, problem.id),
+                "deep": deep,
+            }
+        },
+    )
+    assert result.errors is None and result.data is not None
+    (_, new_problem_id) = relay.from_base64(result.data["copyProblem"]["id"])
+    new_problem = Problem.objects.get(id=new_problem_id)
+    assert new_problem.owner == user
+    assert new_problem.boulder_id == problem.boulder_id
+
+    new_holds = list(new_problem.holds.order_by("id"))
+    assert [(hold.position.x, hold.position.y) for hold in new_holds] == [
+        (hold.position.x, hold.position.y) for hold in holds
+    ]
+    assert not {hold.id for hold in new_holds} & {hold.id for hold in holds}
+
+    new_betas = list(new_problem.betas.all())
+    if not deep:
+        assert new_betas == []
+        return
+
+    assert len(new_betas) == 1
+    new_beta = new_betas[0]
+    assert new_beta.owner == user
+    assert new_beta.name == beta.name
+    # Map each original hold to its copy by creation order
+    hold_map = {old.id: new.id for old, new in zip(holds, new_holds)}
+    assert [
+        (
+            move.order,
+            move.body_part,
+            move.is_start,
+            move.hold_id,
+            move.position and move.position.serialize(),
+        )
+        for move in new_beta.moves.all()
+    ] == [
+        (
+            move.order,
+            move.body_part,
+            move.is_start,
+            move.hold_id and hold_map[move.hold_id],
+            move.position and move.position.serialize(),
+        )
+        for move in beta.moves.all()
+    ]
+    # Original is untouched
+    assert beta.moves.count() == 4
+
+
+def test_copy_problem_query_count(
+    context: StrawberryDjangoContext, user: User
+) -> None:
+    """
+    Deep copy should take a constant number of queries, regardless of how
+    many holds, betas, and moves the problem has
+    """
+
+    def get_num_queries(num_betas: int, num_moves: int) -> int:
+        problem = ProblemFactory()
+        holds = HoldFactory.create_batch(num_moves, problem=problem)
+        for _ in range(num_betas):
+            beta = BetaFactory(problem=problem, moves=[])
+            for hold in holds:
+                BetaMoveFactory(beta=beta, hold=hold, is_free=False)
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                copy_problem_mutation,
+                context_value=context,
+                variable_values={
+                    "input": {
+                        "id": relay.to_base64(ProblemNode, problem.id),
+                        "deep": True,
+                    }
+                },
+            )
+        assert result.errors is None
+        return len(queries)
+
+    # Warm up per-user caches (e.g. permissions) so they don't skew the count
+    get_num_queries(1, 1)
+    assert get_num_queries(1, 1) == get_num_queries(5, 20)
@@ -0,0 +1,61 @@
+import pytest
+from strawberry import relay
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.models import Beta
+from core.schema import schema
+from core.schema.query import BetaMoveNode, BetaNode
+from core.tests.factories import BetaMoveFactory
+
+pytestmark = pytest.mark.django_db
+
+beta_moves_query = """
+    query($betaId: ID!, $first: Int, $after: String) {
+        beta(id: $betaId) {
+            moves(first: $first, after: $after) {
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                }
+                edges {
+                    node {
+                        id
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+@pytest.mark.parametrize("beta__moves", [[]])
+def test_query_beta_moves_pagination(
+    context: StrawberryDjangoContext, beta: Beta
+) -> None:
+    """
+    Moves are prefetched, so they get paginated in memory, but that should
+    behave the same as paginating in the DB
+    """
+    moves = BetaMoveFactory.create_batch(5, beta=beta, is_free=True)
+    expected_ids = [relay.to_base64(BetaMoveNode, move.id) for move in moves]
+
+    ids: list[str] = []
+    cursor = None
+    has_next_page = True
+    while has_next_page:
+        result = schema.execute_sync(
+            beta_moves_query,
+            context_value=context,
+            variable_values={
+                "betaId": relay.to_base64(BetaNode, beta.id),
+                "first": 2,
+                "after": cursor,
+            },
+        )
+        assert result.errors is None and result.data is not None
+        connection = result.data["beta"]["moves"]
+        ids.extend(edge["node"]["id"] for edge in connection["edges"])
+        cursor = connection["pageInfo"]["endCursor"]
+        has_next_page = connection["pageInfo"]["hasNextPage"]
+
+    assert ids == expected_ids
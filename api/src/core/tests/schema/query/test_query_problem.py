@@ -1,12 +1,25 @@
+from typing import Any
+
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from strawberry import relay
 from strawberry.django.context import StrawberryDjangoContext
 
+from core.fields import BoulderPosition
 from core.models import Problem, Visibility
 from core.schema import schema
-from core.schema.query import ProblemNode
-from core.tests.factories import BoulderFactory, ProblemFactory, UserFactory
+from core.schema.query import HoldNode, ProblemNode
+from core.tests.factories import (
+    BetaFactory,
+    BetaMoveFactory,
+    BoulderFactory,
+    HoldFactory,
+    ProblemFactory,
+    UserFactory,
+)
 from core.tests.schema.conftest import assert_graphql_result
 
 pytestmark = pytest.mark.django_db
@@ -39,6 +52,69 @@ problems_query = """
     }
 """
 
+problems_page_query = """
+    query($first: Int, $after: String, $last: Int, $before: String) {
+        problems(first: $first, after: $after, last: $last, before: $before) {
+            pageInfo {
+                startCursor
+                endCursor
+                hasPreviousPage
+                hasNextPage
+            }
+            edges {
+                node {
+                    id
+                }
+            }
+        }
+    }
+"""
+
+holds_near_query = """
+    query($problemId: ID!, $position: SVGPositionInput!, $radius: Float!,
+          $limit: Int) {
+        problem(id: $problemId) {
+            holdsNear(position: $position, radius: $radius, limit: $limit) {
+                id
+            }
+        }
+    }
+"""
+
+problem_permissions_query = """
+    query($problemId: ID!) {
+        problem(id: $problemId) {
+            holds {
+                edges {
+                    node {
+                        permissions {
+                            canEdit
+                            canDelete
+                        }
+                    }
+                }
+            }
+            # Nested lists have to be bounded to stay under the cost limit
+            betas(first: 1) {
+                edges {
+                    node {
+                        moves {
+                            edges {
+                                node {
+                                    permissions {
+                                        canEdit
+                                        canDelete
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
 
 @pytest.mark.parametrize(
     "problem_id",
@@ -174,3 +250,274 @@ def test_query_problems(context: StrawberryDjangoContext, user: User) -> None:
         ),
         get_result(problem_mine_unlisted),
     )
+
+
+def test_query_problems_pagination(
+    context: StrawberryDjangoContext,
+) -> None:
+    """
+    Paging through problems should be stable when new problems are created
+    mid-scroll, and ties in creation time should be broken by ID
+    """
+    problems = ProblemFactory.create_batch(5)
+    # Force a tie, so the ID has to be used to order these two
+    Problem.objects.filter(id__in=[problems[1].id, problems[2].id]).update(
+        created_at=timezone.now()
+    )
+    # Newest first
+    expected_ids = [
+        relay.to_base64(ProblemNode, problem_id)
+        for problem_id in Problem.objects.order_by(
+            "-created_at", "-id"
+        ).values_list("id", flat=True)
+    ]
+
+    def get_page(**variables: Any) -> tuple[list[str], dict]:
+        result = schema.execute_sync(
+            problems_page_query,
+            context_value=context,
+            variable_values=variables,
+        )
+        assert result.errors is None and result.data is not None
+        problems = result.data["problems"]
+        return (
+            [edge["node"]["id"] for edge in problems["edges"]],
+            problems["pageInfo"],
+        )
+
+    (ids, page_info) = get_page(first=2)
+    assert ids == expected_ids[:2]
+    assert not page_info["hasPreviousPage"] and page_info["hasNextPage"]
+
+    # A new problem shouldn't shift the next page
+    ProblemFactory()
+    (ids, page_info) = get_page(first=2, after=page_info["endCursor"])
+    assert ids == expected_ids[2:4]
+    assert page_info["hasPreviousPage"] and page_info["hasNextPage"]
+
+    (ids, page_info) = get_page(first=2, after=page_info["endCursor"])
+    assert ids == expected_ids[4:]
+    assert not page_info["hasNextPage"]
+
+    # And back the other way
+    (ids, page_info) = get_page(last=3, before=page_info["startCursor"])
+    assert ids == expected_ids[1:4]
+    assert page_info["hasPreviousPage"] and page_info["hasNextPage"]
+
+
+def test_query_problems_invalid_cursor(
+    context: StrawberryDjangoContext,
+) -> None:
+    assert_graphql_result(
+        schema.execute_sync(
+            problems_page_query,
+            context_value=context,
+            variable_values={"first": 1, "after": "bm9wZQ=="},
+        ),
+        None,
+        ["Invalid cursor"],
+    )
+
+
+@pytest.mark.slow
+def test_query_problems_plan(
+    context: StrawberryDjangoContext, user: User
+) -> None:
+    """
+    The problems feed should walk indexes in order, rather than scanning and
+    sorting the whole table, even when there are a lot of problems
+    """
+    boulder = BoulderFactory()
+    other_user = UserFactory()
+    with connection.cursor() as cursor:
+        # FK checks on a million rows take way longer than the test itself,
+        # and they're not what's being tested. This gets rolled back.
+        constraints = connection.introspection.get_constraints(
+            cursor, Problem._meta.db_table
+        )
+        for name, constraint in constraints.items():
+            if constraint["foreign_key"]:
+                cursor.execute(
+                    "ALTER TABLE core_problem DROP CONSTRAINT"
+                    f" {connection.ops.quote_name(name)}"
+                )
+        # Going through the ORM would take forever too. 1 in 10 problems are
+        # unlisted, and 1 in 100 are ours
+        cursor.execute(
+            """
+            INSERT INTO core_problem (
+                name, external_link, owner_id, visibility, boulder_id,
+                created_at, updated_at
+            )
+            SELECT
+                'Problem ' || i,
+                '',
+                CASE WHEN i %% 100 = 0 THEN %(user_id)s ELSE %(other_id)s END,
+                CASE WHEN i %% 10 = 0 THEN 'unlisted' ELSE 'public' END,
+                %(boulder_id)s,
+                now() - make_interval(secs => i),
+                now()
+            FROM generate_series(1, %(num_problems)s) AS i
+            """,
+            {
+                "user_id": user.id,
+                "other_id": other_user.id,
+                "boulder_id": boulder.id,
+                "num_problems": 1_000_000,
+            },
+        )
+        cursor.execute("ANALYZE core_problem")
+
+    all_variables: list[dict[str, Any]] = [
+        {},
+        {"isMine": True},
+        {"isMine": False},
+        {"visibility": "PUBLIC"},
+    ]
+    for variables in all_variables:
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                problems_query,
+                context_value=context,
+                variable_values=variables,
+            )
+        assert result.errors is None and result.data is not None
+        assert len(result.data["problems"]["edges"]) == 100
+
+        (query,) = queries.captured_queries
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {query['sql']}")
+            plan = "\n".join(row for (row,) in cursor.fetchall())
+        assert "Index Scan" in plan, plan
+        assert "Seq Scan" not in plan, plan
+        # "Sort Key" shows up under Merge Append, which is fine. A Sort node
+        # means all matching rows are being sorted, which is not
+        assert "Sort  (" not in plan, plan
+
+
+@pytest.mark.parametrize(
+    "limit,expected_holds",
+    [(10, ["a", "b", "c"]), (2, ["a", "b"])],
+    ids=["all", "limited"],
+)
+def test_query_problem_holds_near(
+    limit: int, expected_holds: list[str]
+) -> None:
+    """
+    Nearby holds should be ordered by distance in SVG space, which differs
+    from normalized space when the image isn't square
+    """
+    # SVG dimensions are 200x100
+    problem = ProblemFactory(
+        boulder__image__width=400, boulder__image__height=200
+    )
+    holds = {
+        name: HoldFactory(problem=problem, position=BoulderPosition(x, y))
+        for name, x, y in [
+            ("a", 0.5, 0.5),  # Distance 0
+            ("b", 0.55, 0.5),  # Distance 10
+            ("c", 0.5, 0.65),  # Distance 15
+            ("d", 0.6, 0.5),  # Distance 20, out of range
+        ]
+    }
+    # Same spot, different problem
+    HoldFactory(position=BoulderPosition(0.5, 0.5))
+
+    problem_id = relay.to_base64(ProblemNode, problem.id)
+    assert_graphql_result(
+        schema.execute_sync(
+            holds_near_query,
+            variable_values={
+                "problemId": problem_id,
+                "position": {"x": 100.0, "y": 50.0},
+                "radius": 18.0,
+                "limit": limit,
+            },
+        ),
+        {
+            "problem": {
+                "holdsNear": [
+                    {"id": relay.to_base64(HoldNode, holds[name].id)}
+                    for name in expected_holds
+                ]
+            }
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    "limit,message",
+    [
+        (-1, "Argument 'limit' must be a non-negative integer."),
+        (
+            schema.config.relay_max_results + 1,
+            "Argument 'limit' cannot be higher than"
+            f" {schema.config.relay_max_results}.",
+        ),
+    ],
+    ids=["negative", "too_high"],
+)
+def test_query_problem_holds_near_limit_bounds(
+    limit: int, message: str
+) -> None:
+    """
+    The limit should be bounded the same way as connection page sizes
+    """
+    problem = ProblemFactory()
+    HoldFactory(problem=problem)
+
+    result = schema.execute_sync(
+        holds_near_query,
+        variable_values={
+            "problemId": relay.to_base64(ProblemNode, problem.id),
+            "position": {"x": 0.0, "y": 0.0},
+            "radius": 1.0,
+            "limit": limit,
+        },
+    )
+    assert result.errors is not None
+    [error] = result.errors
+    assert error.message == message
+    assert error.path == ["problem", "holdsNear"]
+
+
+@pytest.mark.parametrize("is_mine", [True, False], ids=["mine", "not_mine"])
+def test_query_problem_permissions_cost_is_flat(
+    context: StrawberryDjangoContext, user: User, is_mine: bool
+) -> None:
+    """
+    Permissions for holds and moves should be computed from the owner IDs
+    annotated onto the list, rather than loading the parent of each item
+    """
+    owner = user if is_mine else UserFactory()
+
+    def get_num_queries(num_children: int) -> int:
+        problem = ProblemFactory(owner=owner)
+        HoldFactory.create_batch(num_children, problem=problem)
+        beta = BetaFactory(problem=problem, owner=owner, moves=[])
+        BetaMoveFactory.create_batch(num_children, beta=beta, is_free=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = schema.execute_sync(
+                problem_permissions_query,
+                context_value=context,
+                variable_values={
+                    "problemId": relay.to_base64(ProblemNode, problem.id)
+                },
+            )
+        assert result.errors is None and result.data is not None
+        permissions = {"canEdit": is_mine, "canDelete": is_mine}
+        problem_data = result.data["problem"]
+        assert [
+            edge["node"]["permissions"]
+            for edge in problem_data["holds"]["edges"]
+        ] == [permissions] * num_children
+        assert [
+            edge["node"]["permissions"]
+            for edge in problem_data["betas"]["edges"][0]["node"]["moves"][
+                "edges"
+            ]
+        ] == [permissions] * num_children
+        return len(queries)
+
+    assert get_num_queries(2) == get_num_queries(20)
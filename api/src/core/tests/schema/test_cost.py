@@ -0,0 +1,144 @@
+from typing import Any
+
+import pytest
+from django.conf import settings
+from graphql import FragmentDefinitionNode, get_operation_ast, parse
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.schema import schema
+from core.schema.cost import CostCalculator
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+problems_query = """
+    query($count: Int) {
+        problems(first: $count) {
+            edges {
+                node {
+                    betas {
+                        edges {
+                            node {
+                                id
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+def get_cost(query: str, variables: dict[str, Any] = {}) -> tuple[int, int]:
+    document = parse(query)
+    operation = get_operation_ast(document)
+    assert operation
+    calculator = CostCalculator(
+        schema=schema._schema,
+        fragments={
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        },
+        variables=variables,
+        default_page_size=100,
+    )
+    root_type = schema._schema.get_root_type(operation.operation)
+    assert root_type
+    return calculator.get_cost([operation.selection_set], root_type)
+
+
+@pytest.mark.parametrize(
+    "query,variables,expected",
+    [
+        ("query { currentUser { __typename } }", {}, (1, 1)),
+        # Everything within a connection is multiplied by its page size, which
+        # is the max page size if not given
+        (problems_query, {"count": 1}, (1 + 1 * (3 + 100 * 2), 7)),
+        (problems_query, {"count": 2}, (1 + 2 * (3 + 100 * 2), 7)),
+        # Fields selected multiple times are only counted once
+        (
+            """
+            query {
+                problems(first: 5) { edges { node { id ...F } } }
+            }
+            fragment F on ProblemNode { boulder { id } boulder { id } }
+            """,
+            {},
+            (1 + 5 * 3, 5),
+        ),
+        # Page sizes are clamped, so a negative page size can't offset the
+        # cost of another field, and an oversized one isn't undercounted
+        (
+            """
+            query {
+                a: problems(first: 100) { edges { node { id } } }
+                b: problems(first: -100) { edges { node { id } } }
+                c: problems(first: 1000) { edges { node { id } } }
+            }
+            """,
+            {},
+            ((1 + 100 * 2) + 1 + (1 + 100 * 2), 4),
+        ),
+        (problems_query, {"count": -100}, (1, 7)),
+        # Introspection is free
+        ("query { __schema { types { name } } }", {}, (0, 0)),
+    ],
+)
+def test_get_cost(
+    query: str, variables: dict[str, Any], expected: tuple[int, int]
+) -> None:
+    assert get_cost(query, variables) == expected
+
+
+def test_ui_operations_within_limits(ui_operations: dict[str, str]) -> None:
+    """
+    Every operation that the UI sends has to be allowed
+    """
+    for name, query in ui_operations.items():
+        (cost, depth) = get_cost(query, {"count": 6})
+        assert cost <= settings.GRAPHQL_MAX_QUERY_COST, name
+        assert depth <= settings.GRAPHQL_MAX_QUERY_DEPTH, name
+
+
+def test_query_cost_limit(
+    context: StrawberryDjangoContext, caplog: pytest.LogCaptureFixture
+) -> None:
+    """
+    The cost depends on variables, so the same query can be allowed or
+    rejected, even if the document is cached
+    """
+    caplog.set_level("INFO", logger="core.schema.cost")
+    assert_graphql_result(
+        schema.execute_sync(
+            problems_query,
+            context_value=context,
+            variable_values={"count": 1},
+        ),
+        {"problems": {"edges": []}},
+    )
+    assert "cost 204, depth 7" in caplog.text
+    assert_graphql_result(
+        schema.execute_sync(
+            problems_query,
+            context_value=context,
+            variable_values={"count": 50},
+        ),
+        None,
+        ["Query cost of 10151 exceeds the maximum of 5000"],
+    )
+
+
+def test_query_depth_limit(context: StrawberryDjangoContext) -> None:
+    query = "query { problems(first: 1) { edges { node { id } } } }"
+    for _ in range(3):
+        query = query.replace(
+            "{ id }",
+            "{ id betas(first: 1) { edges { node { problem { id } } } } }",
+        )
+    assert_graphql_result(
+        schema.execute_sync(query, context_value=context),
+        None,
+        ["Query depth of 16 exceeds the maximum of 12"],
+    )
@@ -0,0 +1,89 @@
+from collections.abc import Iterator
+from unittest.mock import Mock
+
+import pytest
+from strawberry.django.context import StrawberryDjangoContext
+from strawberry.schema import execute
+
+from core.schema import schema
+from core.schema.document_cache import CacheInfo, document_cache
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> Iterator[None]:
+    document_cache.clear()
+    yield
+    document_cache.clear()
+
+
+def test_document_cache(context: StrawberryDjangoContext, mocker: Mock) -> None:
+    """
+    Repeated queries should only be parsed and validated once
+    """
+    parse_spy = mocker.spy(execute, "parse_document")
+    validate_spy = mocker.spy(execute, "validate_document")
+    query = "query { currentUser { __typename } }"
+    for _ in range(3):
+        assert_graphql_result(
+            schema.execute_sync(query, context_value=context),
+            {"currentUser": {"__typename": "UserNode"}},
+        )
+    assert parse_spy.call_count == 1
+    assert validate_spy.call_count == 1
+    assert document_cache.info() == CacheInfo(
+        hits=2, misses=1, size=1, maxsize=256, pinned=0
+    )
+
+
+def test_document_cache_errors(
+    context: StrawberryDjangoContext, mocker: Mock
+) -> None:
+    """
+    Validation errors should be cached along with the document. Syntax errors
+    aren't cached, since there's no document to cache.
+    """
+    validate_spy = mocker.spy(execute, "validate_document")
+    for _ in range(2):
+        assert_graphql_result(
+            schema.execute_sync("query { fakeField }", context_value=context),
+            None,
+            ["Cannot query field 'fakeField' on type 'Query'."],
+        )
+    assert validate_spy.call_count == 1
+
+    for _ in range(2):
+        assert_graphql_result(
+            schema.execute_sync("query {", context_value=context),
+            None,
+            ["Syntax Error"],
+        )
+    assert document_cache.info() == CacheInfo(
+        hits=1, misses=3, size=1, maxsize=256, pinned=0
+    )
+
+
+def test_document_cache_eviction(
+    context: StrawberryDjangoContext, mocker: Mock
+) -> None:
+    """
+    The least recently used document should be evicted once the cache is full
+    """
+    mocker.patch.object(document_cache, "maxsize", 2)
+    queries = [
+        "query A { currentUser { __typename } }",
+        "query B { currentUser { __typename } }",
+        "query C { currentUser { __typename } }",
+    ]
+    for query in [queries[0], queries[1], queries[0], queries[2]]:
+        schema.execute_sync(query, context_value=context)
+    assert document_cache.info().size == 2
+
+    parse_spy = mocker.spy(execute, "parse_document")
+    # B was least recently used, so it's the only one that was evicted
+    for query in [queries[2], queries[0], queries[1]]:
+        schema.execute_sync(query, context_value=context)
+    assert parse_spy.call_count == 1
+    parse_spy.assert_called_once_with(queries[1])
@@ -0,0 +1,92 @@
+import json
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+from pytest_django.fixtures import SettingsWrapper
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.models import Problem
+from core.schema import schema
+from core.tests.factories import HoldFactory
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+problems_query = """
+    query Problems {
+        problems(first: 5) {
+            edges { node { name holds(first: 5) { edges { node { id } } } } }
+        }
+    }
+"""
+
+
+def get_records(caplog: pytest.LogCaptureFixture) -> list[dict[str, Any]]:
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == "beta_spray.graphql"
+    ]
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_instrumentation(
+    context: StrawberryDjangoContext,
+    settings: SettingsWrapper,
+    caplog: pytest.LogCaptureFixture,
+    problem: Problem,
+    is_async: bool,
+) -> None:
+    settings.GRAPHQL_INSTRUMENTATION_SAMPLE_RATE = 1.0
+    HoldFactory.create_batch(2, problem=problem)
+    caplog.set_level("INFO", logger="beta_spray.graphql")
+    if is_async:
+        result = async_to_sync(schema.execute)(
+            problems_query, context_value=context
+        )
+    else:
+        result = schema.execute_sync(problems_query, context_value=context)
+    assert_graphql_result(result, result.data)
+
+    [record] = get_records(caplog)
+    assert record["operation_name"] == "Problems"
+    assert record["operation_type"] == "query"
+    assert record["errors"] is False
+    assert record["calls"] == 1
+    assert record["sql_count"] > 0
+    fields = record["fields"]
+    assert fields["Query.problems"]["sql_count"] > 0
+    # Holds are prefetched with the problems, so that's where they're counted
+    assert fields["ProblemNode.holds"]["calls"] == 1
+    assert fields["ProblemNode.holds"]["sql_count"] == 0
+    assert fields["Query.problems"]["time_ms"] <= record["time_ms"]
+    # Every query is run by some field's resolver
+    assert (
+        sum(field["sql_count"] for field in fields.values())
+        == record["sql_count"]
+    )
+
+
+def test_instrumentation_errors(
+    context: StrawberryDjangoContext,
+    settings: SettingsWrapper,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    settings.GRAPHQL_INSTRUMENTATION_SAMPLE_RATE = 1.0
+    caplog.set_level("INFO", logger="beta_spray.graphql")
+    schema.execute_sync("query { fake }", context_value=context)
+    [record] = get_records(caplog)
+    assert record["errors"] is True
+    assert record["fields"] == {}
+
+
+def test_instrumentation_sampled(
+    context: StrawberryDjangoContext,
+    settings: SettingsWrapper,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    settings.GRAPHQL_INSTRUMENTATION_SAMPLE_RATE = 0.0
+    caplog.set_level("INFO", logger="beta_spray.graphql")
+    schema.execute_sync(problems_query, context_value=context)
+    assert get_records(caplog) == []
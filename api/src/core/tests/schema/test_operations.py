@@ -0,0 +1,15 @@
+from graphql import parse, validate
+
+from core.schema import schema
+
+
+def test_load_ui_operations(ui_operations: dict[str, str]) -> None:
+    """
+    Every operation extracted from the UI should be valid against the schema
+    """
+    assert "queriesBetaQuery" in ui_operations
+    # Generated from a @refetchable fragment
+    assert "PublicProblemListQuery" in ui_operations
+    for name, query in ui_operations.items():
+        document = parse(query)
+        assert validate(schema._schema, document) == [], name
@@ -0,0 +1,266 @@
+import io
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from strawberry import relay
+from strawberry.django.context import StrawberryDjangoContext
+
+from core.models import Beta, BetaMove, Hold, Problem
+from core.schema import schema
+from core.schema.query import (
+    BetaMoveNode,
+    BetaNode,
+    HoldNode,
+    ProblemNode,
+    UserNode,
+)
+from core.tests.factories import (
+    BetaFactory,
+    BetaMoveFactory,
+    HoldFactory,
+    ProblemFactory,
+)
+from core.tests.schema.conftest import assert_graphql_result
+
+pytestmark = pytest.mark.django_db
+
+
+@dataclass
+class Size:
+    """Number of objects to create, per parent object"""
+
+    problems: int
+    holds: int
+    betas: int
+    moves: int
+
+
+# Every operation should make the same number of queries for each of these
+SIZES = {
+    "small": Size(problems=1, holds=2, betas=1, moves=2),
+    "medium": Size(problems=2, holds=5, betas=2, moves=5),
+    "large": Size(problems=4, holds=10, betas=3, moves=10),
+}
+
+
+@dataclass
+class Data:
+    """Objects that operations are run against, all owned by the user"""
+
+    user: User
+    problem: Problem
+    hold: Hold
+    beta: Beta
+    move: BetaMove
+
+
+def create_data(user: User, size: Size) -> Data:
+    """
+    Create a set of problems, each with holds and betas, and moves in each
+    beta. Moves alternate between holds and free positions, so both are
+    covered at every size. The first move of every beta is on the first hold
+    of its problem, so deleting that hold touches every beta.
+    """
+    problems = ProblemFactory.create_batch(size.problems, owner=user)
+    for problem in problems:
+        holds = HoldFactory.create_batch(size.holds, problem=problem)
+        for beta in BetaFactory.create_batch(
+            size.betas, problem=problem, owner=user, moves=[]
+        ):
+            for i in range(size.moves):
+                is_free = i % 2 == 1
+                BetaMoveFactory(
+                    beta=beta,
+                    # Let the move be appended, to get the same gaps between
+                    # orders as the UI would
+                    order=None,
+                    is_free=is_free,
+                    hold=None if is_free else holds[(i // 2) % len(holds)],
+                )
+    problem = problems[0]
+    hold = problem.holds.order_by("id").first()
+    beta = problem.betas.order_by("id").first()
+    assert hold and beta
+    move = beta.moves.order_by("order").first()
+    assert move
+    return Data(user=user, problem=problem, hold=hold, beta=beta, move=move)
+
+
+def get_image() -> SimpleUploadedFile:
+    image = io.BytesIO()
+    Image.new("RGB", (30, 20)).save(image, format="PNG")
+    return SimpleUploadedFile(
+        "boulder.png", image.getvalue(), content_type="image/png"
+    )
+
+
+def node_id(node: Any, obj: Any) -> str:
+    return relay.to_base64(node, obj.id)
+
+
+# Variables to run each UI operation with, and the exact number of queries it
+# should make. If a change adds queries on purpose, update the number here.
+# If the number varies between sizes, something is being loaded per object.
+OPERATIONS: dict[str, tuple[Callable[[Data], dict[str, Any]], int]] = {
+    "queriesCurrentUserQuery": (lambda data: {}, 0),
+    "queriesProblemQuery": (
+        lambda data: {"problemId": node_id(ProblemNode, data.problem)},
+        3,
+    ),
+    "queriesBetaQuery": (
+        lambda data: {"betaId": node_id(BetaNode, data.beta)},
+        5,
+    ),
+    "PublicProblemListQuery": (lambda data: {"count": 20}, 2),
+    "YourProblemListQuery": (lambda data: {"count": 20}, 2),
+    "AccountMenu_logOutMutation": (lambda data: {}, 0),
+    "AccountSettings_updateUserMutation": (
+        lambda data: {
+            "input": {"id": node_id(UserNode, data.user), "username": "a"}
+        },
+        10,
+    ),
+    "BetaList_createBetaMutation": (
+        lambda data: {"input": {"problem": node_id(ProblemNode, data.problem)}},
+        11,
+    ),
+    "BetaList_copyBetaMutation": (
+        lambda data: {"input": {"id": node_id(BetaNode, data.beta)}},
+        12,
+    ),
+    "BetaList_deleteBetaMutation": (
+        lambda data: {"input": {"id": node_id(BetaNode, data.beta)}},
+        10,
+    ),
+    "BetaSettings_updateBetaMutation": (
+        lambda data: {
+            "input": {"id": node_id(BetaNode, data.beta), "name": "Beta"}
+        },
+        11,
+    ),
+    "ProblemMetadata_deleteProblemMutation": (
+        lambda data: {"input": {"id": node_id(ProblemNode, data.problem)}},
+        18,
+    ),
+    "ProblemSettings_updateProblemMutation": (
+        lambda data: {
+            "input": {
+                "id": node_id(ProblemNode, data.problem),
+                "name": "Problem",
+            }
+        },
+        11,
+    ),
+    "HoldEditor_createHoldMutation": (
+        lambda data: {
+            "input": {
+                "problem": node_id(ProblemNode, data.problem),
+                "position": {"x": 10, "y": 10},
+            }
+        },
+        10,
+    ),
+    "HoldEditor_updateHoldAnnotationMutation": (
+        lambda data: {
+            "input": {"id": node_id(HoldNode, data.hold), "annotation": "a"}
+        },
+        8,
+    ),
+    "HoldEditor_updateHoldPositionMutation": (
+        lambda data: {
+            "input": {
+                "id": node_id(HoldNode, data.hold),
+                "position": {"x": 10, "y": 10},
+            }
+        },
+        8,
+    ),
+    "HoldEditor_deleteHoldMutation": (
+        lambda data: {"input": {"id": node_id(HoldNode, data.hold)}},
+        12,
+    ),
+    "useBetaMoveMutations_createBetaMoveMutation": (
+        lambda data: {
+            "input": {
+                "beta": node_id(BetaNode, data.beta),
+                "bodyPart": "LEFT_HAND",
+                "hold": node_id(HoldNode, data.hold),
+                "previousBetaMove": node_id(BetaMoveNode, data.move),
+            }
+        },
+        16,
+    ),
+    "useBetaMoveMutations_updateBetaMoveAnnotationMutation": (
+        lambda data: {
+            "input": {
+                "id": node_id(BetaMoveNode, data.move),
+                "annotation": "a",
+            }
+        },
+        9,
+    ),
+    "useBetaMoveMutations_relocateBetaMoveMutation": (
+        lambda data: {
+            "input": {
+                "id": node_id(BetaMoveNode, data.move),
+                "position": {"x": 10, "y": 10},
+            }
+        },
+        9,
+    ),
+    "useBetaMoveMutations_reorderBetaMoveMutation": (
+        lambda data: {
+            "input": {"id": node_id(BetaMoveNode, data.move), "order": 2}
+        },
+        11,
+    ),
+    "useBetaMoveMutations_deleteBetaMoveMutation": (
+        lambda data: {"input": {"id": node_id(BetaMoveNode, data.move)}},
+        11,
+    ),
+    "BoulderImageUpload_createBoulderWithFriendsMutation": (
+        lambda data: {"input": {"image": get_image()}},
+        28,
+    ),
+}
+
+
+def test_all_operations_covered(ui_operations: dict[str, str]) -> None:
+    """
+    Every operation in the UI needs an entry in `OPERATIONS`
+    """
+    assert set(ui_operations) == set(OPERATIONS)
+
+
+@pytest.mark.parametrize("size", SIZES.values(), ids=SIZES.keys())
+@pytest.mark.parametrize("operation_name", OPERATIONS.keys())
+def test_query_count(
+    context: StrawberryDjangoContext,
+    user: User,
+    ui_operations: dict[str, str],
+    operation_name: str,
+    size: Size,
+) -> None:
+    """
+    Each UI operation makes a fixed number of queries, no matter how many
+    objects it loads
+    """
+    data = create_data(user, size)
+    (get_variables, expected) = OPERATIONS[operation_name]
+    variables = get_variables(data)
+    with CaptureQueriesContext(connection) as queries:
+        result = schema.execute_sync(
+            ui_operations[operation_name],
+            variable_values=variables,
+            context_value=context,
+        )
+    assert_graphql_result(result, result.data)
+    assert len(queries) == expected, "\n".join(
+        query["sql"] for query in queries
+    )
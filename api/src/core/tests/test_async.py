@@ -0,0 +1,302 @@
+import io
+import json
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, Client
+from django.urls import path
+from PIL import Image
+from strawberry import relay
+
+from core.models import Beta, BetaMove, Problem
+from core.schema import schema
+from core.schema.query import BetaMoveNode, ProblemNode
+from core.tests.factories import BetaFactory, BetaMoveFactory, HoldFactory
+from core.views import AsyncGraphQLView, GraphQLView
+
+# Async views can run resolvers on a different DB connection from the test,
+# so their writes aren't rolled back with the test transaction. Flush the DB
+# after each test instead, so nothing leaks into later tests.
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.urls(__name__),
+]
+
+# Serve both views side by side, so responses can be compared
+urlpatterns = [
+    path("api/graphql", GraphQLView.as_view(schema=schema)),
+    path("api/graphql/async", AsyncGraphQLView.as_view(schema=schema)),
+]
+
+problem_query = """
+    query($problemId: ID!) {
+        currentUser { __typename }
+        problem(id: $problemId) {
+            name
+            owner { username isCurrentUser }
+            permissions { canEdit canDelete }
+            boulder { permissions { canEdit } }
+            holds(first: 10) {
+                edges { node { annotation permissions { canEdit } } }
+            }
+            betas(first: 10) {
+                edges {
+                    node {
+                        name
+                        moves(first: 10) {
+                            edges {
+                                node { order isStart target { __typename } }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        problems(first: 5) { edges { node { name } } }
+    }
+"""
+
+create_beta_mutation = """
+    mutation($input: CreateBetaInput!) {
+        createBeta(input: $input) {
+            name
+            owner { isCurrentUser }
+        }
+    }
+"""
+
+create_boulder_mutation = """
+    mutation($input: CreateBoulderWithFriendsInput!) {
+        createBoulderWithFriends(input: $input) {
+            name
+            problem { name boulder { image { width height } } }
+        }
+    }
+"""
+
+
+def request(client: AsyncClient, method: str, *args: Any, **kwargs: Any) -> Any:
+    """Send a request from the async client, from a sync test"""
+
+    async def send() -> Any:
+        return await getattr(client, method)(*args, **kwargs)
+
+    return async_to_sync(send)()
+
+
+def post_async(client: AsyncClient, data: Any, **kwargs: Any) -> Any:
+    response = request(client, "post", "/api/graphql/async", data, **kwargs)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def async_client() -> AsyncClient:
+    return AsyncClient()
+
+
+@pytest.mark.parametrize("logged_in", [False, True])
+def test_query(
+    client: Client,
+    async_client: AsyncClient,
+    problem: Problem,
+    user: User,
+    logged_in: bool,
+) -> None:
+    """The async view gives the same responses as the sync one"""
+    if logged_in:
+        client.force_login(user)
+        async_client.force_login(user)
+    HoldFactory.create_batch(2, problem=problem)
+    beta = BetaFactory(problem=problem)
+    BetaMoveFactory.create_batch(3, beta=beta)
+    data = {
+        "query": problem_query,
+        "variables": {"problemId": relay.to_base64(ProblemNode, problem.id)},
+    }
+
+    expected = client.post(
+        "/api/graphql", data, content_type="application/json"
+    ).json()
+    assert "errors" not in expected
+    assert len(expected["data"]["problem"]["betas"]["edges"]) == 1
+    assert (
+        post_async(async_client, data, content_type="application/json")
+        == expected
+    )
+
+
+def test_query_etag(async_client: AsyncClient, problem: Problem) -> None:
+    data = {
+        "query": problem_query,
+        "variables": json.dumps(
+            {"problemId": relay.to_base64(ProblemNode, problem.id)}
+        ),
+    }
+    response = request(async_client, "get", "/api/graphql/async", data)
+    assert response.status_code == 200
+    response = request(
+        async_client,
+        "get",
+        "/api/graphql/async",
+        data,
+        headers={"If-None-Match": response["ETag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_mutation(async_client: AsyncClient, problem: Problem) -> None:
+    """Mutations from anonymous users create a guest user"""
+    result = post_async(
+        async_client,
+        {
+            "query": create_beta_mutation,
+            "variables": {
+                "input": {
+                    "problem": relay.to_base64(ProblemNode, problem.id),
+                    "name": "Beta 1",
+                }
+            },
+        },
+        content_type="application/json",
+    )
+    assert result == {
+        "data": {
+            "createBeta": {"name": "Beta 1", "owner": {"isCurrentUser": True}}
+        }
+    }
+    beta = Beta.objects.get(problem=problem)
+    assert beta.owner.profile.is_guest
+
+
+def test_upload(async_client: AsyncClient) -> None:
+    image = io.BytesIO()
+    Image.new("RGB", (30, 20)).save(image, format="PNG")
+    result = post_async(
+        async_client,
+        {
+            "operations": json.dumps(
+                {
+                    "query": create_boulder_mutation,
+                    "variables": {
+                        "input": {
+                            "image": None,
+                            "problemName": "Problem 1",
+                            "betaName": "Beta 1",
+                        }
+                    },
+                }
+            ),
+            "map": json.dumps({"image": ["variables.input.image"]}),
+            "image": SimpleUploadedFile(
+                "boulder.png", image.getvalue(), content_type="image/png"
+            ),
+        },
+    )
+    assert result == {
+        "data": {
+            "createBoulderWithFriends": {
+                "name": "Beta 1",
+                "problem": {
+                    "name": "Problem 1",
+                    "boulder": {"image": {"width": 30, "height": 20}},
+                },
+            }
+        }
+    }
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_batch(
+    async_client: AsyncClient, problem: Problem, atomic: bool
+) -> None:
+    """Batches run in order, and atomic batches are rolled back by an error"""
+
+    def create_beta(problem_id: int) -> dict:
+        return {
+            "query": create_beta_mutation,
+            "variables": {
+                "input": {
+                    "problem": relay.to_base64(ProblemNode, problem_id),
+                    "name": "Beta 1",
+                }
+            },
+        }
+
+    created = {
+        "data": {
+            "createBeta": {"name": "Beta 1", "owner": {"isCurrentUser": True}}
+        }
+    }
+    results = post_async(
+        async_client,
+        [create_beta(problem.id), create_beta(problem.id)],
+        content_type="application/json",
+        QUERY_STRING="atomic=true" if atomic else "",
+    )
+    assert results == [created, created]
+    assert Beta.objects.filter(problem=problem).count() == 2
+
+    results = post_async(
+        async_client,
+        [create_beta(problem.id), create_beta(0)],
+        content_type="application/json",
+        QUERY_STRING="atomic=true" if atomic else "",
+    )
+    assert len(results) == 2
+    assert results[1]["data"] is None
+    if atomic:
+        assert results[0]["data"] is None
+        assert Beta.objects.filter(problem=problem).count() == 2
+    else:
+        assert results[0] == created
+        assert Beta.objects.filter(problem=problem).count() == 3
+
+
+@pytest.mark.parametrize("url", ["/api/graphql", "/api/graphql/async"])
+def test_batch_deleted(async_client: AsyncClient, user: User, url: str) -> None:
+    """
+    Each operation in a batch sees the changes made by the ones before it, so
+    an object deleted earlier in the batch can't be written back
+    """
+    move = BetaMoveFactory(beta__owner=user)
+    async_client.force_login(user)
+
+    def update_move(annotation: str) -> dict:
+        return {
+            "query": """
+                mutation($input: UpdateBetaMoveInput!) {
+                    updateBetaMove(input: $input) { annotation }
+                }
+            """,
+            "variables": {"input": {"id": move_id, "annotation": annotation}},
+        }
+
+    move_id = relay.to_base64(BetaMoveNode, move.id)
+    response = request(
+        async_client,
+        "post",
+        url,
+        [
+            update_move("first"),
+            {
+                "query": """
+                    mutation($input: NodeInput!) {
+                        deleteBetaMove(input: $input) { annotation }
+                    }
+                """,
+                "variables": {"input": {"id": move_id}},
+            },
+            update_move("second"),
+        ],
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0] == {"data": {"updateBetaMove": {"annotation": "first"}}}
+    assert results[1] == {"data": {"deleteBetaMove": {"annotation": "first"}}}
+    assert results[2]["data"] is None
+    assert not BetaMove.objects.filter(id=move.id).exists()
@@ -0,0 +1,139 @@
+import importlib
+import json
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from django.test import Client
+from prometheus_client import REGISTRY
+from pytest_django.fixtures import SettingsWrapper
+from strawberry import relay
+
+from core.models import Problem
+from core.schema.query import ProblemNode
+
+pytestmark = pytest.mark.django_db
+
+current_user_query = "query CurrentUser { currentUser { __typename } }"
+
+
+@pytest.fixture(autouse=True)
+def persisted_queries(settings: SettingsWrapper, tmp_path: Path) -> None:
+    """Use a persisted query manifest with a single query"""
+    path = tmp_path / "persisted_queries.json"
+    path.write_text(json.dumps({"abc123": current_user_query}))
+    settings.GRAPHQL_PERSISTED_QUERIES_PATH = path
+
+
+def get_value(name: str, **labels: str) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(name, labels)
+    return value or 0
+
+
+def post(client: Client, data: dict) -> None:
+    response = client.post(
+        "/api/graphql", data, content_type="application/json"
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "query,operation_name",
+    [
+        (current_user_query, "CurrentUser"),
+        # Names of queries that aren't persisted aren't trusted
+        ("query Fake { currentUser { __typename } }", "other"),
+    ],
+)
+def test_operation_metrics(
+    client: Client, query: str, operation_name: str
+) -> None:
+    labels = {"operation_name": operation_name, "operation_type": "query"}
+    count = get_value("beta_spray_graphql_operation_seconds_count", **labels)
+    errors = get_value("beta_spray_graphql_errors_total", **labels)
+    queries = get_value("beta_spray_db_query_seconds_count")
+
+    post(client, {"query": query})
+    assert (
+        get_value("beta_spray_graphql_operation_seconds_count", **labels)
+        == count + 1
+    )
+    assert get_value("beta_spray_graphql_errors_total", **labels) == errors
+    assert get_value("beta_spray_db_query_seconds_count") > queries
+
+
+def test_error_metrics(client: Client) -> None:
+    labels = {"operation_name": "other", "operation_type": "query"}
+    errors = get_value("beta_spray_graphql_errors_total", **labels)
+    post(client, {"query": "query { fake }"})
+    assert get_value("beta_spray_graphql_errors_total", **labels) == errors + 1
+
+
+def test_guest_user_metrics(client: Client, problem: Problem) -> None:
+    guest_users = get_value("beta_spray_guest_users_total")
+    mutation = """
+        mutation($input: CreateBetaInput!) {
+            createBeta(input: $input) { name }
+        }
+    """
+    data = {
+        "query": mutation,
+        "variables": {
+            "input": {"problem": relay.to_base64(ProblemNode, problem.id)}
+        },
+    }
+    post(client, data)
+    post(client, data)
+    # The second mutation uses the same guest
+    assert get_value("beta_spray_guest_users_total") == guest_users + 1
+
+
+def test_db_queries_in_flight(client: Client, problem: Problem) -> None:
+    """Queries are only counted while they're executing"""
+    query_seconds = get_value("beta_spray_db_query_seconds_count")
+    post(client, {"query": "query { problems { edges { node { name } } } }"})
+    assert get_value("beta_spray_db_query_seconds_count") > query_seconds
+    assert get_value("beta_spray_db_queries_in_flight") == 0
+
+
+@pytest.mark.parametrize("multiprocess", [False, True])
+def test_metrics_view(
+    client: Client,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    multiprocess: bool,
+) -> None:
+    if multiprocess:
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    post(client, {"query": current_user_query})
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    if not multiprocess:
+        # Metrics from other processes come from files, which aren't written
+        # here
+        assert (
+            "beta_spray_graphql_operation_seconds" in response.content.decode()
+        )
+
+
+def test_metrics_view_pod_ip(
+    client: Client,
+    settings: SettingsWrapper,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Prometheus scrapes the pod directly, so the production settings have to
+    allow the pod IP as a host
+    """
+    monkeypatch.setenv("BETA_SPRAY_HOSTNAME", "betaspray.example.com")
+    monkeypatch.setenv("BETA_SPRAY_POD_IP", "10.0.0.5")
+    settings_prd = importlib.import_module("beta_spray.settings.settings_prd")
+    settings_prd = importlib.reload(settings_prd)
+    settings.ALLOWED_HOSTS = settings_prd.ALLOWED_HOSTS
+    settings.DEBUG = False
+
+    response = client.get("/api/metrics", HTTP_HOST="10.0.0.5:8000")
+    assert response.status_code == 200
+    response = client.get("/api/metrics", HTTP_HOST="10.0.0.6:8000")
+    assert response.status_code == 400
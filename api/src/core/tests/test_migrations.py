@@ -0,0 +1,61 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.db import connection
+
+from core.models import BetaMove, Hold
+from core.tests.factories import BetaMoveFactory, HoldFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_boulder_position_point_migration(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Positions should survive a round trip from points to strings and back
+    """
+    migration = import_module("core.migrations.0020_boulder_position_point")
+    holds = HoldFactory.create_batch(5)
+    free_move = BetaMoveFactory(is_free=True)
+    BetaMoveFactory(is_free=False)
+
+    def get_positions() -> list[tuple]:
+        return [
+            (hold.id, hold.position.x, hold.position.y)
+            for hold in Hold.objects.order_by("id")
+        ] + [
+            (move.id, move.position and (move.position.x, move.position.y))
+            for move in BetaMove.objects.order_by("id")
+        ]
+
+    expected = get_positions()
+    assert len(expected) == len(holds) + 3  # Plus the hold_move's hold
+
+    # Postgres won't alter tables with pending deferred FK checks
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    # Use a small batch size so we get multiple batches
+    monkeypatch.setattr(migration, "BATCH_SIZE", 2)
+    with connection.schema_editor() as schema_editor:
+        migration.positions_to_string(apps, schema_editor)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT position FROM core_betamove WHERE id = %s",
+                [free_move.id],
+            )
+            (position,) = cursor.fetchone()
+            assert position.strip() == free_move.position.serialize()
+
+        migration.positions_to_point(apps, schema_editor)
+
+    assert get_positions() == expected
+    # The mutually exclusive constraint was re-created
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_constraint"
+            " WHERE conname = 'hold_position_mutually_exclusive'"
+        )
+        assert cursor.fetchone() is not None
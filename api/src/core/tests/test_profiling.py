@@ -0,0 +1,127 @@
+import marshal
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
+from django.urls import include, path
+from strawberry import relay
+
+from core.models import Problem, RequestProfile
+from core.profiling import PROFILE_HEADER
+from core.schema import schema
+from core.schema.query import ProblemNode
+from core.views import AsyncGraphQLView, GraphQLView
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+urlpatterns = [
+    path("api/graphql", GraphQLView.as_view(schema=schema)),
+    path("api/graphql/async", AsyncGraphQLView.as_view(schema=schema)),
+    # For the admin
+    path("", include("beta_spray.urls")),
+]
+
+problem_query = """
+    query Problem($problemId: ID!) {
+        problem(id: $problemId) { name }
+    }
+"""
+
+
+@pytest.fixture
+def staff_user(user: User) -> User:
+    user.is_staff = True
+    user.is_superuser = True
+    user.save()
+    return user
+
+
+def get_data(problem: Problem) -> dict[str, Any]:
+    return {
+        "query": problem_query,
+        "variables": {"problemId": relay.to_base64(ProblemNode, problem.id)},
+    }
+
+
+@pytest.mark.parametrize("is_staff", [False, True])
+def test_profile(
+    client: Client, user: User, problem: Problem, is_staff: bool
+) -> None:
+    user.is_staff = is_staff
+    user.save()
+    client.force_login(user)
+    response = client.post(
+        "/api/graphql",
+        get_data(problem),
+        content_type="application/json",
+        headers={PROFILE_HEADER: "1"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"data": {"problem": {"name": problem.name}}}
+
+    if not is_staff:
+        assert PROFILE_HEADER not in response
+        assert not RequestProfile.objects.exists()
+        return
+
+    profile = RequestProfile.objects.get()
+    assert response[PROFILE_HEADER] == (
+        f"/api/admin/core/requestprofile/{profile.id}/change/"
+    )
+    assert profile.user == user
+    assert profile.path == "/api/graphql"
+    assert profile.operation_name == "Problem"
+    assert profile.status_code == 200
+    assert profile.peak_memory > 0
+    assert "execute_sync" in profile.summary
+    # Resolvers ran in this thread, so they were profiled
+    stats = marshal.loads(profile.stats)
+    assert any(function == "resolve" for (_, _, function) in stats)
+
+
+# The async view can run on a different DB connection from the test, so its
+# writes aren't rolled back with the test transaction
+@pytest.mark.django_db(transaction=True)
+def test_profile_async(staff_user: User, problem: Problem) -> None:
+    """The async view hands profiled requests to the sync view"""
+    client = AsyncClient()
+    client.force_login(staff_user)
+
+    async def send() -> Any:
+        return await client.post(
+            "/api/graphql/async?profile",
+            get_data(problem),
+            content_type="application/json",
+        )
+
+    response = async_to_sync(send)()
+    assert response.status_code == 200
+    assert response.json() == {"data": {"problem": {"name": problem.name}}}
+    profile = RequestProfile.objects.get()
+    assert profile.operation_name == "Problem"
+    assert response[PROFILE_HEADER].endswith(f"/{profile.id}/change/")
+
+
+def test_admin(client: Client, staff_user: User, problem: Problem) -> None:
+    client.force_login(staff_user)
+    response = client.get(
+        "/api/graphql",
+        {"query": "{ currentUser { __typename } }", "profile": ""},
+    )
+    profile = RequestProfile.objects.get()
+    assert profile.operation_name == ""
+
+    response = client.get(response[PROFILE_HEADER])
+    assert response.status_code == 200
+    assert "Download" in response.content.decode()
+
+    response = client.get(
+        f"/api/admin/core/requestprofile/{profile.id}/download/"
+    )
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == (
+        f'attachment; filename="profile-{profile.id}.prof"'
+    )
+    assert marshal.loads(response.content)
@@ -0,0 +1,351 @@
+import json
+from typing import Any, Callable
+from unittest.mock import Mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from pytest_django.fixtures import SettingsWrapper
+from strawberry import relay
+
+from core.cache import TAG_KEY_PREFIX, get_problem_tag
+from core.models import Beta, BetaMove, Hold, Problem
+from core.schema import response_cache
+from core.schema.query import BetaMoveNode, BetaNode, ProblemNode
+from core.tests.factories import BetaFactory, HoldFactory, ProblemFactory
+from core.views import GraphQLView
+
+pytestmark = pytest.mark.django_db
+
+problem_query = """
+    query($problemId: ID!) {
+        problem(id: $problemId) {
+            name
+            holds { edges { node { annotation } } }
+            betas { edges { node { name } } }
+        }
+    }
+"""
+
+problems_query = "query { problems { edges { node { name } } } }"
+
+
+def execute(client: Client, query: str, **variables: str) -> tuple[dict, int]:
+    """
+    Execute a query through the view, and return the response body and the
+    number of queries that touched problem data
+    """
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(
+            "/api/graphql",
+            {"query": query, "variables": variables},
+            content_type="application/json",
+        )
+    assert response.status_code == 200
+    num_queries = sum(
+        "core_" in query["sql"] for query in captured.captured_queries
+    )
+    return (response.json(), num_queries)
+
+
+def get_problem_name(client: Client, problem: Problem) -> tuple[str, int]:
+    (body, num_queries) = execute(
+        client,
+        problem_query,
+        problemId=relay.to_base64(ProblemNode, problem.id),
+    )
+    return (body["data"]["problem"]["name"], num_queries)
+
+
+def mutate(problem: Problem, query: str, input: dict[str, Any]) -> None:
+    """
+    Execute a mutation as the problem's owner, with a separate client so the
+    anonymous client's responses can still be cached
+    """
+    client = Client()
+    client.force_login(problem.owner)
+    response = client.post(
+        "/api/graphql",
+        {"query": query, "variables": {"input": input}},
+        content_type="application/json",
+    )
+    assert "errors" not in response.json()
+
+
+def create_holds(problem: Problem) -> None:
+    mutate(
+        problem,
+        """
+        mutation($input: CreateHoldsInput!) {
+            createHolds(input: $input) { id }
+        }
+        """,
+        {
+            "problem": relay.to_base64(ProblemNode, problem.id),
+            "positions": [{"x": 0.5, "y": 0.5}],
+        },
+    )
+
+
+def reorder_beta_moves(problem: Problem) -> None:
+    beta = Beta.objects.get(problem=problem)
+    mutate(
+        problem,
+        """
+        mutation($input: ReorderBetaMovesInput!) {
+            reorderBetaMoves(input: $input) { id }
+        }
+        """,
+        {
+            "beta": relay.to_base64(BetaNode, beta.id),
+            "moveIds": [
+                relay.to_base64(BetaMoveNode, move.id)
+                for move in reversed(beta.moves.all())
+            ],
+        },
+    )
+
+
+def test_cache_hit(client: Client, problem: Problem) -> None:
+    """Repeated anonymous queries are served from the cache"""
+    assert get_problem_name(client, problem)[1] > 0
+    assert get_problem_name(client, problem) == (problem.name, 0)
+
+
+def test_cache_disabled(
+    client: Client, problem: Problem, settings: SettingsWrapper
+) -> None:
+    settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT = 0
+    get_problem_name(client, problem)
+    assert get_problem_name(client, problem)[1] > 0
+
+
+def test_cache_authenticated(
+    client: Client, problem: Problem, user: User
+) -> None:
+    """Authenticated responses depend on the user, so they aren't cached"""
+    client.force_login(user)
+    get_problem_name(client, problem)
+    assert get_problem_name(client, problem)[1] > 0
+
+
+def test_cache_errors(client: Client, mocker: Mock) -> None:
+    """Responses with errors aren't cached"""
+    set_spy = mocker.spy(response_cache.cache, "set")
+    (body, _) = execute(client, problem_query, problemId="not-a-global-id")
+    assert body["errors"]
+    set_spy.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "modify",
+    [
+        pytest.param(
+            lambda problem: Problem.objects.get(id=problem.id).save(),
+            id="problem_save",
+        ),
+        pytest.param(
+            lambda problem: HoldFactory(problem=problem), id="hold_create"
+        ),
+        pytest.param(
+            lambda problem: Hold.objects.filter(problem=problem)
+            .first()
+            .delete(),
+            id="hold_delete",
+        ),
+        pytest.param(
+            lambda problem: BetaFactory(problem=problem), id="beta_create"
+        ),
+        pytest.param(
+            lambda problem: Beta.objects.filter(problem=problem).first().save(),
+            id="beta_save",
+        ),
+        pytest.param(
+            lambda problem: BetaMove.objects.filter(beta__problem=problem)
+            .first()
+            .save(),
+            id="beta_move_save",
+        ),
+        pytest.param(
+            lambda problem: BetaMove.objects.filter(beta__problem=problem)
+            .first()
+            .delete(),
+            id="beta_move_delete",
+        ),
+        pytest.param(create_holds, id="create_holds"),
+        pytest.param(reorder_beta_moves, id="reorder_beta_moves"),
+    ],
+)
+def test_invalidate(
+    client: Client,
+    django_capture_on_commit_callbacks: Any,
+    modify: Callable[[Problem], Any],
+) -> None:
+    """Changing anything within a problem invalidates its responses"""
+    problem = ProblemFactory()
+    HoldFactory(problem=problem)
+    BetaFactory(problem=problem, owner=problem.owner)
+    other_problem = ProblemFactory()
+    get_problem_name(client, problem)
+    get_problem_name(client, other_problem)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        modify(problem)
+    assert get_problem_name(client, problem)[1] > 0
+    # Other problems are unaffected
+    assert get_problem_name(client, other_problem)[1] == 0
+
+
+def test_beta_move_tags(django_assert_num_queries: Any) -> None:
+    """
+    Moves are tagged with their beta's problem, without loading the beta if
+    the problem ID was annotated
+    """
+    move = BetaFactory().moves.first()
+    tags = [get_problem_tag(move.beta.problem_id)]
+    move = BetaMove.objects.annotate_problem_id().get(id=move.id)
+    with django_assert_num_queries(0):
+        assert response_cache.get_object_tags(move) == tags
+    # Falls back to the beta
+    move = BetaMove.objects.get(id=move.id)
+    assert response_cache.get_object_tags(move) == tags
+
+
+def test_invalidate_problem_list(
+    client: Client, django_capture_on_commit_callbacks: Any
+) -> None:
+    """Any new problem invalidates problem lists"""
+    ProblemFactory()
+    (expected, _) = execute(client, problems_query)
+    assert execute(client, problems_query) == (expected, 0)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        problem = ProblemFactory()
+    (body, num_queries) = execute(client, problems_query)
+    assert num_queries > 0
+    assert len(body["data"]["problems"]["edges"]) == 2
+    assert body["data"]["problems"]["edges"][0]["node"]["name"] in {
+        problem.name,
+        expected["data"]["problems"]["edges"][0]["node"]["name"],
+    }
+
+
+def get(client: Client, problem: Problem, **headers: str) -> HttpResponse:
+    return client.get(
+        "/api/graphql",
+        {
+            "query": problem_query,
+            "variables": json.dumps(
+                {"problemId": relay.to_base64(ProblemNode, problem.id)}
+            ),
+        },
+        headers=headers,
+    )
+
+
+def test_etag(
+    client: Client,
+    problem: Problem,
+    mocker: Mock,
+    django_capture_on_commit_callbacks: Any,
+) -> None:
+    """GET requests get an ETag, and a 304 if the client is up to date"""
+    response = get(client, problem)
+    assert response.status_code == 200
+    etag = response["ETag"]
+    assert response["Cache-Control"] == "private, no-cache"
+
+    encode_spy = mocker.spy(GraphQLView, "encode_json")
+    response = get(client, problem, if_none_match=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert response.content == b""
+    encode_spy.assert_not_called()
+
+    # Any change to the problem gets a new ETag
+    with django_capture_on_commit_callbacks(execute=True):
+        HoldFactory(problem=problem)
+    response = get(client, problem, if_none_match=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert len(response.json()["data"]["problem"]["holds"]["edges"]) == 1
+
+
+def test_etag_problem_list(
+    client: Client, django_capture_on_commit_callbacks: Any
+) -> None:
+    """
+    ETags for problem lists come from the tag versions, so a cached response
+    doesn't need any DB queries, even to check the ETag
+    """
+    ProblemFactory()
+    etag = client.get("/api/graphql", {"query": problems_query})["ETag"]
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(
+            "/api/graphql",
+            {"query": problems_query},
+            headers={"if_none_match": etag},
+        )
+    assert response.status_code == 304
+    assert not any(
+        "core_" in query["sql"] for query in captured.captured_queries
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ProblemFactory()
+    response = client.get(
+        "/api/graphql",
+        {"query": problems_query},
+        headers={"if_none_match": etag},
+    )
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_etag_evicted(client: Client, problem: Problem) -> None:
+    """
+    If a tag's version is evicted from the cache, it gets a new one, so an old
+    ETag can't match anymore, in case the data changed in the meantime
+    """
+    etag = get(client, problem)["ETag"]
+    cache.delete(f"{TAG_KEY_PREFIX}:{get_problem_tag(problem.id)}")
+    response = get(client, problem, if_none_match=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_etag_user(client: Client, problem: Problem, user: User) -> None:
+    """ETags differ between users"""
+    etag = get(client, problem)["ETag"]
+    client.force_login(user)
+    response = get(client, problem, if_none_match=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_etag_post(client: Client, problem: Problem) -> None:
+    response = client.post(
+        "/api/graphql",
+        {
+            "query": problem_query,
+            "variables": {
+                "problemId": relay.to_base64(ProblemNode, problem.id)
+            },
+        },
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert "ETag" not in response
+
+
+def test_etag_untracked(client: Client) -> None:
+    """Responses without any problems aren't tracked, so they get no ETag"""
+    response = client.get(
+        "/api/graphql", {"query": "query { currentUser { __typename } }"}
+    )
+    assert response.status_code == 200
+    assert "ETag" not in response
@@ -0,0 +1,137 @@
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
+from django.urls import path
+from pytest_django.fixtures import SettingsWrapper
+
+from core.models import Problem
+from core.schema import schema
+from core.timing import ServerTiming
+from core.views import AsyncGraphQLView, GraphQLView
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+urlpatterns = [
+    path("api/graphql", GraphQLView.as_view(schema=schema)),
+    path("api/graphql/async", AsyncGraphQLView.as_view(schema=schema)),
+]
+
+problems_query = """
+    query {
+        problems(first: 5) { edges { node { boulder { image { url } } } } }
+    }
+"""
+
+
+def get_phases(response: Any) -> list[str]:
+    return [
+        metric.split(";")[0]
+        for metric in response.get("Server-Timing", "").split(", ")
+        if metric
+    ]
+
+
+def test_to_header() -> None:
+    server_timing = ServerTiming()
+    server_timing.add("db", 0.001)
+    server_timing.add("db", 0.0005)
+    server_timing.add("total", 0.01)
+    assert server_timing.to_header() == (
+        'total;dur=10.0;desc="Total", db;dur=1.5;desc="SQL (2x)"'
+    )
+
+
+@pytest.mark.parametrize(
+    "is_staff,enabled,expected",
+    [(False, False, False), (True, False, True), (False, True, True)],
+)
+def test_server_timing(
+    client: Client,
+    settings: SettingsWrapper,
+    user: User,
+    problem: Problem,
+    is_staff: bool,
+    enabled: bool,
+    expected: bool,
+) -> None:
+    settings.SERVER_TIMING = enabled
+    user.is_staff = is_staff
+    user.save()
+    client.force_login(user)
+
+    response = client.post(
+        "/api/graphql",
+        {"query": problems_query},
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    if expected:
+        assert get_phases(response) == [
+            "total",
+            "db",
+            "parse",
+            "validate",
+            "execute",
+            "storage",
+            "serialize",
+        ]
+    else:
+        assert "Server-Timing" not in response
+
+
+def test_server_timing_async(
+    settings: SettingsWrapper, user: User, problem: Problem
+) -> None:
+    user.is_staff = True
+    user.save()
+    client = AsyncClient()
+    client.force_login(user)
+
+    async def send() -> Any:
+        return await client.post(
+            "/api/graphql/async",
+            {"query": problems_query},
+            content_type="application/json",
+        )
+
+    response = async_to_sync(send)()
+    assert response.status_code == 200
+    # DB queries from resolvers in other threads are included
+    assert "db" in get_phases(response)
+    assert "execute" in get_phases(response)
+
+
+@pytest.mark.parametrize("is_async", [False, True])
+def test_server_timing_disallowed_host(
+    settings: SettingsWrapper, is_async: bool
+) -> None:
+    """
+    A request that's rejected before authentication never gets a user, which
+    shouldn't break the header check
+    """
+    settings.SERVER_TIMING = False
+    settings.ALLOWED_HOSTS = ["testserver"]
+    data = {"query": problems_query}
+    if is_async:
+
+        async def send() -> Any:
+            return await AsyncClient().post(
+                "/api/graphql/async",
+                data,
+                content_type="application/json",
+                headers={"host": "evil.example.com"},
+            )
+
+        response = async_to_sync(send)()
+    else:
+        response = Client().post(
+            "/api/graphql",
+            data,
+            content_type="application/json",
+            headers={"host": "evil.example.com"},
+        )
+    assert response.status_code == 400
+    assert "Server-Timing" not in response
@@ -0,0 +1,221 @@
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from django.test import Client
+from pytest_django.fixtures import SettingsWrapper
+from strawberry import relay
+from strawberry.schema import execute
+
+from core.models import Beta, Problem
+from core.schema.document_cache import document_cache
+from core.schema.query import ProblemNode
+
+pytestmark = pytest.mark.django_db
+
+current_user_query = "query { currentUser { __typename } }"
+create_beta_mutation = """
+    mutation($input: CreateBetaInput!) {
+        createBeta(input: $input) { name }
+    }
+"""
+
+
+@pytest.fixture(autouse=True)
+def persisted_queries(
+    settings: SettingsWrapper, tmp_path: Path
+) -> Iterator[None]:
+    """Use a persisted query manifest with a single query"""
+    path = tmp_path / "persisted_queries.json"
+    path.write_text(json.dumps({"abc123": current_user_query}))
+    settings.GRAPHQL_PERSISTED_QUERIES_PATH = path
+    document_cache.clear()
+    yield
+    document_cache.clear()
+
+
+def post(client: Client, data: dict) -> tuple[int, dict | str]:
+    response = client.post(
+        "/api/graphql", data, content_type="application/json"
+    )
+    if response.status_code == 200:
+        return (response.status_code, response.json())
+    return (response.status_code, response.content.decode())
+
+
+def test_persisted_query(client: Client) -> None:
+    assert post(client, {"doc_id": "abc123"}) == (
+        200,
+        {"data": {"currentUser": {"__typename": "NoUser"}}},
+    )
+
+
+def test_persisted_query_get(client: Client) -> None:
+    response = client.get("/api/graphql", {"doc_id": "abc123"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "data": {"currentUser": {"__typename": "NoUser"}}
+    }
+
+
+def test_persisted_query_unknown(client: Client) -> None:
+    assert post(client, {"doc_id": "def456"}) == (
+        400,
+        "Unknown persisted query: def456",
+    )
+
+
+def test_persisted_query_reload(
+    client: Client, settings: SettingsWrapper
+) -> None:
+    """
+    When the Relay compiler regenerates the manifest, new IDs should be picked
+    up without a restart
+    """
+    assert post(client, {"doc_id": "def456"})[0] == 400
+    path = settings.GRAPHQL_PERSISTED_QUERIES_PATH
+    path.write_text(json.dumps({"def456": current_user_query}))
+    # Make sure the mtime changes, even on a coarse-grained filesystem
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert post(client, {"doc_id": "def456"}) == (
+        200,
+        {"data": {"currentUser": {"__typename": "NoUser"}}},
+    )
+    assert post(client, {"doc_id": "abc123"})[0] == 400
+
+
+def test_persisted_query_cached(client: Client, mocker: Mock) -> None:
+    """
+    Persisted queries should only be parsed and validated once per process
+    """
+    parse_spy = mocker.spy(execute, "parse_document")
+    validate_spy = mocker.spy(execute, "validate_document")
+    expected = (200, {"data": {"currentUser": {"__typename": "NoUser"}}})
+    assert post(client, {"doc_id": "abc123"}) == expected
+    assert post(client, {"doc_id": "abc123"}) == expected
+    # Sending the full text uses the same cached document
+    assert post(client, {"query": current_user_query}) == expected
+    assert parse_spy.call_count == 1
+    assert validate_spy.call_count == 1
+
+
+@pytest.mark.parametrize("persisted_only", [False, True])
+def test_non_persisted_query(
+    client: Client, settings: SettingsWrapper, persisted_only: bool
+) -> None:
+    settings.GRAPHQL_PERSISTED_QUERIES_ONLY = persisted_only
+    expected = (200, {"data": {"currentUser": {"__typename": "NoUser"}}})
+    # Persisted queries are always allowed, by ID or text
+    assert post(client, {"doc_id": "abc123"}) == expected
+    assert post(client, {"query": current_user_query}) == expected
+
+    response = post(client, {"query": "query { currentUser { __typename } } "})
+    if persisted_only:
+        assert response == (400, "Only persisted queries are allowed")
+    else:
+        assert response == expected
+
+
+def post_batch(
+    client: Client, data: list, atomic: bool = False
+) -> tuple[int, list | str]:
+    response = client.post(
+        "/api/graphql?atomic=true" if atomic else "/api/graphql",
+        data,
+        content_type="application/json",
+    )
+    if response.status_code == 200:
+        return (response.status_code, response.json())
+    return (response.status_code, response.content.decode())
+
+
+def create_beta(problem_id: int, name: str) -> dict:
+    return {
+        "query": create_beta_mutation,
+        "variables": {
+            "input": {
+                "problem": relay.to_base64(ProblemNode, problem_id),
+                "name": name,
+            }
+        },
+    }
+
+
+def test_batch(client: Client, problem: Problem) -> None:
+    """Operations in a batch run in order, and share a session"""
+    assert post_batch(
+        client,
+        [
+            {"doc_id": "abc123"},
+            create_beta(problem.id, "Beta 1"),
+            {"query": current_user_query},
+        ],
+    ) == (
+        200,
+        [
+            {"data": {"currentUser": {"__typename": "NoUser"}}},
+            {"data": {"createBeta": {"name": "Beta 1"}}},
+            # The mutation created a guest user
+            {"data": {"currentUser": {"__typename": "UserNode"}}},
+        ],
+    )
+    assert Beta.objects.filter(problem=problem).count() == 1
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_batch_error(client: Client, problem: Problem, atomic: bool) -> None:
+    """An atomic batch is rolled back by the first error"""
+    (status, results) = post_batch(
+        client,
+        [
+            create_beta(problem.id, "Beta 1"),
+            create_beta(0, "Beta 2"),
+            create_beta(problem.id, "Beta 3"),
+        ],
+        atomic=atomic,
+    )
+    assert status == 200
+    assert isinstance(results, list)
+    assert results[1]["data"] is None
+    if atomic:
+        assert results[0] == {
+            "data": None,
+            "errors": [{"message": "Rolled back, because operation 1 failed"}],
+        }
+        assert results[2] == {
+            "data": None,
+            "errors": [{"message": "Not executed, because operation 1 failed"}],
+        }
+        assert not Beta.objects.exists()
+        # The guest user was rolled back too
+        assert post(client, {"query": current_user_query}) == (
+            200,
+            {"data": {"currentUser": {"__typename": "NoUser"}}},
+        )
+    else:
+        assert results[0] == {"data": {"createBeta": {"name": "Beta 1"}}}
+        assert results[2] == {"data": {"createBeta": {"name": "Beta 3"}}}
+        assert Beta.objects.count() == 2
+
+
+@pytest.mark.parametrize(
+    "data,error",
+    [
+        ([], "Batch is empty"),
+        ([{"doc_id": "abc123"}] * 3, "Batch is too large: max is 2 operations"),
+        ([{"doc_id": "abc123"}, "query"], "Operation 1 is not an object"),
+        (
+            [{"doc_id": "abc123"}, {"variables": {}}],
+            "No GraphQL query found in operation 1",
+        ),
+    ],
+)
+def test_batch_invalid(
+    client: Client, settings: SettingsWrapper, data: list, error: str
+) -> None:
+    settings.GRAPHQL_MAX_BATCH_SIZE = 2
+    assert post_batch(client, data) == (400, error)
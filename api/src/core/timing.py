@@ -0,0 +1,73 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+# Phases of a request, in the order they're shown, with their descriptions
+PHASES = {
+    "total": "Total",
+    "db": "SQL",
+    "parse": "GraphQL parsing",
+    "validate": "GraphQL validation",
+    "execute": "GraphQL resolvers",
+    "storage": "Image storage",
+    "serialize": "JSON encoding",
+}
+
+
+@dataclass
+class ServerTiming:
+    """
+    Total time spent in each phase of a request, for the `Server-Timing`
+    header. Phases can overlap, e.g. SQL queries run within resolvers.
+    """
+
+    durations: dict[str, float] = field(
+        default_factory=lambda: defaultdict(float)
+    )
+    counts: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def add(self, phase: str, elapsed: float) -> None:
+        self.durations[phase] += elapsed
+        self.counts[phase] += 1
+
+    def to_header(self) -> str:
+        metrics = []
+        for phase, description in PHASES.items():
+            if phase not in self.durations:
+                continue
+            count = self.counts[phase]
+            if count > 1:
+                description = f"{description} ({count}x)"
+            metrics.append(
+                f"{phase};dur={self.durations[phase] * 1000:.1f}"
+                f';desc="{description}"'
+            )
+        return ", ".join(metrics)
+
+
+# Timing for the current request, if it's being timed (see
+# `ServerTimingMiddleware`). A context variable follows the request into
+# threads under the async view.
+current_server_timing: ContextVar[Optional[ServerTiming]] = ContextVar(
+    "current_server_timing", default=None
+)
+
+
+@contextmanager
+def measure(phase: str) -> Iterator[None]:
+    """
+    Add the time spent in this block to a phase of the current request, if it's
+    being timed
+    """
+    server_timing = current_server_timing.get()
+    if server_timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        server_timing.add(phase, time.perf_counter() - start)
@@ -1,14 +1,8 @@
-from __future__ import annotations
-
 import random
 import uuid
-from typing import TYPE_CHECKING, Optional
+from typing import Optional
 
 from django.core.files.uploadedfile import UploadedFile
-from django.db.models.fields.files import ImageFieldFile
-
-if TYPE_CHECKING:
-    from .schema.query import Image
 
 problem_name_phrase_groups: list[list[Optional[str]]] = [
     [
@@ -94,19 +88,17 @@ def clean_input_file(file: UploadedFile) -> UploadedFile:
     return file
 
 
-def get_svg_dimensions(
-    image: ImageFieldFile | Image,
-) -> tuple[float, float]:
+def get_svg_dimensions(width: int, height: int) -> tuple[float, float]:
     """
-    Get the dimensions of this image in the SVG system. The smaller of the
-    two dimensions will always be 100, and the larger will be multiplied
-    or divided by the aspect ratio (whichever would make it >100). This
-    ensures that distance in X is equal to distance in Y.
+    Get the dimensions of an image in the SVG system, given its dimensions in
+    pixels. The smaller of the two dimensions will always be 100, and the
+    larger will be multiplied or divided by the aspect ratio (whichever would
+    make it >100). This ensures that distance in X is equal to distance in Y.
 
-    Thanks to duck typing, this function works on `ImageFieldFile` or the
-    GraphQL `Image` type.
+    This is pure math, so it doesn't touch the image file at all. Generally you
+    want `Boulder.get_svg_dimensions` instead, which uses stored values.
     """
-    aspect_ratio = image.width / image.height
+    aspect_ratio = width / height
     return (
         (100, 100 / aspect_ratio)
         if aspect_ratio < 1
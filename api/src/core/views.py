@@ -0,0 +1,410 @@
+import json
+from contextlib import nullcontext
+from typing import Any, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import logout
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from graphql import GraphQLError, get_operation_ast, parse
+from strawberry.django.views import AsyncGraphQLView as BaseAsyncGraphQLView
+from strawberry.django.views import GraphQLView as BaseGraphQLView
+from strawberry.http import (
+    GraphQLHTTPResponse,
+    GraphQLRequestData,
+    process_result,
+)
+from strawberry.http.async_base_view import AsyncHTTPRequestAdapter
+from strawberry.http.exceptions import HTTPException
+from strawberry.http.sync_base_view import SyncHTTPRequestAdapter
+from strawberry.schema import BaseSchema
+from strawberry.types import ExecutionResult
+from strawberry.types.graphql import OperationType
+from strawberry.unset import UNSET
+
+from .profiling import profile_request, should_profile
+from .schema.loader import NodeLoader
+from .schema.persisted import get_persisted_queries
+from .schema.query import clear_permissions_cache
+from .schema.response_cache import GraphQLContext, set_etag
+from .timing import measure
+
+
+class GraphQLViewMixin:
+    """
+    Behavior shared by the sync and async GraphQL views.
+
+    Clients can send the ID of a query from the persisted manifest as `doc_id`,
+    instead of the full query text. If `GRAPHQL_PERSISTED_QUERIES_ONLY` is
+    enabled, queries that aren't in the manifest are rejected.
+
+    If the client already has the current response to a GET request (see
+    `ResponseCache`), it gets an empty 304 instead.
+
+    A POST body can also be a JSON array of operations, which are executed in
+    order, and get an array of results back. With `?atomic=true`, the whole
+    batch runs in one transaction: the first operation with errors rolls back
+    the batch, and the rest aren't executed.
+
+    Staff users can ask for a request to be profiled (see `core.profiling`).
+    """
+
+    schema: BaseSchema
+
+    def get_request_data(self, data: dict[str, Any]) -> GraphQLRequestData:
+        return GraphQLRequestData(
+            query=self.get_query(data),
+            variables=data.get("variables"),  # type: ignore
+            operation_name=data.get("operationName"),
+        )
+
+    def get_query(self, data: dict[str, Any]) -> Optional[str]:
+        """
+        Get the query text for a request, either directly from the request or
+        by looking up its persisted ID
+        """
+        persisted_queries = get_persisted_queries()
+        doc_id = data.get("doc_id")
+        if doc_id is not None:
+            try:
+                return persisted_queries.queries[doc_id]
+            except (KeyError, TypeError):
+                raise HTTPException(
+                    400, f"Unknown persisted query: {doc_id}"
+                ) from None
+
+        query = data.get("query")
+        if (
+            query is not None
+            and settings.GRAPHQL_PERSISTED_QUERIES_ONLY
+            and query not in persisted_queries.texts
+        ):
+            raise HTTPException(400, "Only persisted queries are allowed")
+        return query
+
+    def get_batch(
+        self, request: HttpRequest
+    ) -> Optional[list[GraphQLRequestData]]:
+        """
+        Get the operations from a batched request, or `None` if the request
+        isn't a batch
+        """
+        if (
+            request.method != "POST"
+            or "application/json" not in (request.content_type or "")
+            or not request.body.lstrip().startswith(b"[")
+        ):
+            return None
+
+        data: Any = self.parse_json(request.body)  # type: ignore[attr-defined]
+        if not data:
+            raise HTTPException(400, "Batch is empty")
+        if len(data) > settings.GRAPHQL_MAX_BATCH_SIZE:
+            raise HTTPException(
+                400,
+                "Batch is too large: max is"
+                f" {settings.GRAPHQL_MAX_BATCH_SIZE} operations",
+            )
+        operations = []
+        # Reject the whole batch up front, so it never runs halfway
+        for index, operation_data in enumerate(data):
+            if not isinstance(operation_data, dict):
+                raise HTTPException(400, f"Operation {index} is not an object")
+            operation = self.get_request_data(operation_data)
+            if operation.query is None:
+                raise HTTPException(
+                    400, f"No GraphQL query found in operation {index}"
+                )
+            operations.append(operation)
+        return operations
+
+    def is_atomic_batch(self, request: HttpRequest) -> bool:
+        return request.GET.get("atomic") == "true"
+
+    def clear_request_caches(self, request: HttpRequest) -> None:
+        """
+        Drop objects and permissions cached for the request, so each operation
+        in a batch sees the changes made by the ones before it
+        """
+        NodeLoader.clear(request)
+        clear_permissions_cache(request)
+
+    def execute_batch_sync(
+        self,
+        operations: list[GraphQLRequestData],
+        context: GraphQLContext,
+        root_value: Any,
+        atomic: bool,
+    ) -> list[GraphQLHTTPResponse]:
+        """
+        Execute a batch of operations in order. Under WSGI, the request is
+        already in a transaction, so an atomic batch gets a savepoint.
+        """
+        request = context.request
+        session_key = request.session.session_key
+        results = []
+        failed = False
+        with transaction.atomic() if atomic else nullcontext():
+            for operation in operations:
+                self.clear_request_caches(request)
+                result = self.schema.execute_sync(
+                    operation.query,
+                    root_value=root_value,
+                    variable_values=operation.variables,
+                    context_value=context,
+                    operation_name=operation.operation_name,
+                    allowed_operation_types=OperationType.from_http("POST"),
+                )
+                results.append(process_result(result))
+                if atomic and result.errors:
+                    transaction.set_rollback(True)
+                    failed = True
+                    break
+        if not failed:
+            return results
+
+        # Logging in (e.g. as a new guest user) creates a new session, which
+        # was just rolled back, along with the user
+        if request.session.session_key != session_key:
+            logout(request)
+        return get_failed_batch_results(results, len(operations))
+
+    def get_operation_name(self, request: HttpRequest) -> str:
+        """
+        Get the name of the operation in a request, for profiling. This
+        doesn't validate anything, since the request hasn't been executed yet.
+        """
+        try:
+            if request.method == "GET":
+                data: Any = request.GET.dict()
+            elif request.content_type.startswith("multipart/form-data"):
+                data = json.loads(request.POST.get("operations", "{}"))
+            else:
+                data = json.loads(request.body)
+            if isinstance(data, list):
+                return "batch"
+            operation = self.get_request_data(data)
+            if operation.operation_name:
+                return operation.operation_name
+            if operation.query is None:
+                return ""
+            operation_ast = get_operation_ast(parse(operation.query))
+        except (ValueError, AttributeError, GraphQLError, HTTPException):
+            return ""
+        if operation_ast is None or operation_ast.name is None:
+            return ""
+        return operation_ast.name.value
+
+    def encode_json(self, response_data: GraphQLHTTPResponse) -> str:
+        with measure("serialize"):
+            return super().encode_json(response_data)  # type: ignore[misc]
+
+    def create_response(
+        self, response_data: GraphQLHTTPResponse, sub_response: HttpResponse
+    ) -> HttpResponse:
+        if sub_response.status_code == HttpResponseNotModified.status_code:
+            # Skip serializing the response, that's the whole point
+            response = HttpResponseNotModified()
+            for name, value in sub_response.items():
+                response[name] = value
+            return response
+        return super().create_response(  # type: ignore[misc]
+            response_data, sub_response
+        )
+
+
+class GraphQLView(GraphQLViewMixin, BaseGraphQLView):
+    """
+    Sync GraphQL view, for WSGI. See `GraphQLViewMixin`
+    """
+
+    def dispatch(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        if should_profile(request):
+            return profile_request(
+                request,
+                self.get_operation_name(request),
+                lambda: super(GraphQLView, self).dispatch(
+                    request, *args, **kwargs
+                ),
+            )
+        return super().dispatch(request, *args, **kwargs)
+
+    def parse_http_body(
+        self, request: SyncHTTPRequestAdapter
+    ) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+
+        if "application/json" in content_type:
+            data = self.parse_json(request.body)
+        elif content_type.startswith("multipart/form-data"):
+            data = self.parse_multipart(request)
+        elif request.method == "GET":
+            data = self.parse_query_params(request.query_params)
+        else:
+            raise HTTPException(400, "Unsupported content type")
+
+        return self.get_request_data(data)
+
+    def get_context(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> GraphQLContext:
+        return GraphQLContext(request=request, response=response)
+
+    def run(
+        self,
+        request: HttpRequest,
+        context: Optional[GraphQLContext] = UNSET,
+        root_value: Any = UNSET,
+    ) -> HttpResponse:
+        operations = self.get_batch(request)
+        if operations is None:
+            return super().run(request, context, root_value)
+
+        sub_response = self.get_sub_response(request)
+        if context is UNSET:
+            context = self.get_context(request, response=sub_response)
+        if root_value is UNSET:
+            root_value = self.get_root_value(request)
+        assert context
+        results = self.execute_batch_sync(
+            operations, context, root_value, self.is_atomic_batch(request)
+        )
+        return self.create_response(
+            results, sub_response  # type: ignore[arg-type]
+        )
+
+    def execute_operation(
+        self,
+        request: HttpRequest,
+        context: GraphQLContext,
+        root_value: Any,
+    ) -> ExecutionResult:
+        result = super().execute_operation(request, context, root_value)
+        set_etag(context)
+        return result
+
+
+class AsyncGraphQLView(GraphQLViewMixin, BaseAsyncGraphQLView):
+    """
+    Async GraphQL view, for ASGI. A slow resolver (e.g. an image upload) only
+    blocks its own request, rather than the whole worker. Resolvers that need
+    the ORM are run in threads (see `atomic_resolver`). See `GraphQLViewMixin`
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs: Any) -> Callable[..., HttpResponse]:
+        # ATOMIC_REQUESTS isn't supported for async views. Mutations get their
+        # own transactions instead
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    async def dispatch(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        if await sync_to_async(should_profile)(request):
+            # cProfile only sees one thread, but resolvers here run in other
+            # threads. Hand the whole request to the sync view instead
+            view = GraphQLView.as_view(schema=self.schema)
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def parse_http_body(
+        self, request: AsyncHTTPRequestAdapter
+    ) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+
+        if "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        elif content_type.startswith("multipart/form-data"):
+            data = await self.parse_multipart(request)
+        elif request.method == "GET":
+            data = self.parse_query_params(request.query_params)
+        else:
+            raise HTTPException(400, "Unsupported content type")
+
+        return self.get_request_data(data)
+
+    async def get_context(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> GraphQLContext:
+        # The user is loaded lazily, which needs the DB. Load it up front, so
+        # resolvers can check it without blocking
+        await sync_to_async(lambda: request.user.is_anonymous)()
+        return GraphQLContext(request=request, response=response)
+
+    async def run(
+        self,
+        request: HttpRequest,
+        context: Optional[GraphQLContext] = UNSET,
+        root_value: Any = UNSET,
+    ) -> HttpResponse:
+        operations = self.get_batch(request)
+        if operations is None:
+            return await super().run(request, context, root_value)
+
+        sub_response = await self.get_sub_response(request)
+        if context is UNSET:
+            context = await self.get_context(request, response=sub_response)
+        if root_value is UNSET:
+            root_value = await self.get_root_value(request)
+        assert context
+        if self.is_atomic_batch(request):
+            # A transaction can't span awaits, so run the whole batch in one
+            # thread instead
+            results = await sync_to_async(self.execute_batch_sync)(
+                operations, context, root_value, True
+            )
+        else:
+            results = []
+            for operation in operations:
+                self.clear_request_caches(request)
+                result = await self.schema.execute(
+                    operation.query,
+                    root_value=root_value,
+                    variable_values=operation.variables,
+                    context_value=context,
+                    operation_name=operation.operation_name,
+                    allowed_operation_types=OperationType.from_http("POST"),
+                )
+                results.append(process_result(result))
+        return self.create_response(
+            results, sub_response  # type: ignore[arg-type]
+        )
+
+    async def execute_operation(
+        self,
+        request: HttpRequest,
+        context: GraphQLContext,
+        root_value: Any,
+    ) -> ExecutionResult:
+        result = await super().execute_operation(request, context, root_value)
+        await sync_to_async(set_etag)(context)
+        return result
+
+
+def get_failed_batch_results(
+    results: list[GraphQLHTTPResponse], count: int
+) -> list[GraphQLHTTPResponse]:
+    """
+    Get the results of an atomic batch, where the last executed operation
+    failed. None of the batch's changes were saved, so every operation gets an
+    error.
+    """
+    failed = len(results) - 1
+
+    def error(message: str) -> GraphQLHTTPResponse:
+        return {"data": None, "errors": [{"message": message}]}
+
+    return [
+        *(
+            error(f"Rolled back, because operation {failed} failed")
+            for _ in range(failed)
+        ),
+        results[failed],
+        *(
+            error(f"Not executed, because operation {failed} failed")
+            for _ in range(count - failed - 1)
+        ),
+    ]
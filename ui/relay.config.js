@@ -4,6 +4,15 @@ module.exports = {
   language: "typescript",
   excludes: ["/node_modules/", "/build/"],
   noFutureProofEnums: true,
+  // To have the UI send only the hash of each query, register each operation
+  // in the manifest that the API loads by adding the config below. Commit the
+  // manifest that `npm run relay` generates along with it, otherwise the API
+  // rejects the UI's hashes as unknown.
+  //
+  // persistConfig: {
+  //   file: "./persisted_queries.json",
+  //   algorithm: "SHA256",
+  // },
   featureFlags: {
     enable_relay_resolver_transform: true,
   },
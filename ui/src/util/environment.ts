@@ -25,21 +25,39 @@ const fetchQuery: FetchFunction = async (
   cacheConfig,
   uploadables
 ) => {
+  // If operations are persisted by the Relay compiler (see relay.config.js),
+  // we only need to send the ID. Otherwise, send the full text
+  const operationBody = operation.id
+    ? { doc_id: operation.id, variables }
+    : { query: operation.text, variables };
   const request: RequestInit = {
     method: "POST",
     headers: {
       Accept: "application/json",
     },
   };
+  let url = "/api/graphql";
 
   // Request format depends on whether or not we're attaching files
-  if (uploadables) {
+  if (operation.operationKind === "query" && operation.id && !uploadables) {
+    // Send persisted queries as GET, so the browser can revalidate its cached
+    // response with the ETag, instead of downloading the whole thing again.
+    // Full query text is too long to reliably fit in a URL
+    request.method = "GET";
+    const params = new URLSearchParams(
+      Object.entries(operationBody).map(([key, value]) => [
+        key,
+        key === "variables" ? JSON.stringify(value) : String(value),
+      ])
+    );
+    url = `${url}?${params}`;
+  } else if (uploadables) {
     // Structure the request according to strawberry's instructions:
     // https://strawberry.rocks/docs/guides/file-upload#sending-file-upload-requests
     const formData = new FormData();
     formData.append(
       "operations",
-      JSON.stringify({ query: operation.text, variables })
+      JSON.stringify(operationBody)
     );
 
     // We need to build a map to tell the API how to map the attached file(s)
@@ -64,14 +82,11 @@ const fetchQuery: FetchFunction = async (
   } else {
     (request.headers as Record<string, string>)["Content-Type"] =
       "application/json";
-    request.body = JSON.stringify({
-      query: operation.text,
-      variables,
-    });
+    request.body = JSON.stringify(operationBody);
   }
 
   try {
-    const response = await fetch("/api/graphql", request);
+    const response = await fetch(url, request);
 
     // An HTTP error indicates something went wrong below GQL on the stack,
     // so raise that as an exception